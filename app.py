@@ -1,12 +1,54 @@
 from flask import Flask, render_template, request, redirect, session
+from werkzeug.middleware.proxy_fix import ProxyFix
+import secrets
 import sqlite3
-from flask_bcrypt import Bcrypt
+import time
 from config import SECRET_KEY
 from datetime import datetime  # import correcto
+import assets
+import cache
+import catalogo
+import control
+import db
+import en_vivo
+import escritor
+import hashing
+import imagenes
+import lecturas
+import limites
+import metricas
+import metricas_prom
+from condicional import condicional
+import migraciones
+import plantillas
+import posiciones
+import recordarme
+from db import get_db
+from pronosticos import ClavesIdempotencia, guardar_pronostico
+from puntos import puntuar_carrera
+from puntos_vectorizados import recalcular_temporada
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
-bcrypt = Bcrypt(app)
+app.config.from_object("config")
+if app.config["PROXY_SALTOS"]:
+    # IP real del cliente detrás de nginx (ver config.PROXY_SALTOS)
+    saltos = app.config["PROXY_SALTOS"]
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos, x_proto=saltos)
+plantillas.init_app(app)
+db.init_app(app)
+metricas.init_app(app)
+metricas_prom.init_app(app)
+escritor.init_app(app)
+hashing.init_app(app)
+imagenes.init_app(app)
+assets.init_app(app)
+recordarme.init_app(app)
+en_vivo.init_app(app)
+
+with app.app_context():
+    migraciones.migrar(get_db())
+    cache.init_app(app, get_db())
 
 #---- Funcion Fecha--------------
 from datetime import datetime
@@ -38,12 +80,11 @@ def datetimeformat(value):
         return fecha.strftime("%d-%m")
     except:
         return value
-# ------------------------------------------
 
-def get_db():
-    conn = sqlite3.connect("prode.db")
-    conn.row_factory = sqlite3.Row
-    return conn
+@app.template_filter('piloto')
+def filtro_piloto(piloto_id):
+    return catalogo.nombre_piloto(piloto_id)
+# ------------------------------------------
 
 @app.route("/")
 def index():
@@ -85,7 +126,7 @@ def register():
             )
 
         # Encriptar contraseña
-        hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
+        hashed_password = hashing.generar(password)
 
         # Fecha de registro
         fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -95,16 +136,41 @@ def register():
             INSERT INTO usuarios (nombre, email, password, avatar, fecha_registro)
             VALUES (?, ?, ?, ?, ?)
         """, (nombre, email, hashed_password, avatar, fecha))
+        posiciones.actualizar_usuarios(conn, [cur.lastrowid])
+        cache.datos_modificados(conn)
 
         conn.commit()
         conn.close()
 
-        print("FORM DATA:", request.form)
         return render_template("index.html", error="Login incorrecto")
 
 
     return render_template("register.html")
 # -------- LOGIN --------
+def iniciar_sesion(user):
+    session["user_id"] = user["id"]
+    session["user_name"] = user["nombre"]
+    session["avatar"] = user["avatar"] if user["avatar"] else "👤"
+    session["admin"] = user["admin"]
+
+
+def falta_restaurar_sesion():
+    # Sesión vencida pero con cookie de "Recordarme": se restaura sin bcrypt
+    return (
+        "user_id" not in session
+        and recordarme.COOKIE in request.cookies
+        and request.endpoint not in ("static", "assets")
+    )
+
+
+@app.before_request
+def restaurar_sesion():
+    if falta_restaurar_sesion():
+        user = recordarme.restaurar(get_db())
+        if user:
+            iniciar_sesion(user)
+
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
@@ -116,23 +182,34 @@ def login():
         conn = get_db()
         cur = conn.cursor()
 
+        # Antes de buscar al usuario y de correr bcrypt (solo lee)
+        espera = limites.espera_login(conn, request.remote_addr, email)
+        if espera:
+            return (
+                render_template(
+                    "login.html",
+                    error="Demasiados intentos. Probá de nuevo en unos minutos."
+                ),
+                429,
+                {"Retry-After": str(espera)},
+            )
+
         cur.execute(
             "SELECT * FROM usuarios WHERE email = ?",
             (email,)
         )
         user = cur.fetchone()
-        conn.close()
 
-        
-
-        if user and bcrypt.check_password_hash(user["password"], password):
-            session["user_id"] = user["id"]
-            session["user_name"] = user["nombre"]
-            session["avatar"] = user["avatar"] if user["avatar"] else "👤"
-            session["admin"] = user["admin"]
+        if user and hashing.verificar(user["password"], password):
+            hashing.rehash_si_corresponde(conn, user["id"], user["password"], password)
+            if request.form.get("recordarme"):
+                recordarme.emitir(conn, user["id"])
+            conn.close()
 
+            iniciar_sesion(user)
             return redirect("/dashboard")
 
+        limites.fallo_login(conn, request.remote_addr, email)
         return render_template("loguin.html", error="Login incorrecto")
 
     return render_template("login.html")
@@ -140,10 +217,14 @@ def login():
 #--------LOGOUT------------
 @app.route("/logout")
 def logout():
+    recordarme.olvidar(get_db())
     session.clear()
     return render_template("index.html")
 
 # -------- DASHBOARD --------
+cache_dashboard = cache.CacheVersionado()
+
+
 @app.route("/dashboard")
 def dashboard():
     if "user_id" not in session:
@@ -152,78 +233,44 @@ def dashboard():
     conn = get_db()
     cur = conn.cursor()
 
-    # 1️⃣ CARRERA ACTIVA (Race Week)
-    cur.execute("""
-        SELECT *
-        FROM carreras
-        WHERE status = 'iniciada'
-        ORDER BY fecha ASC
-        LIMIT 1
-    """)
-    carrera_activa = cur.fetchone()
+    # Parte común a todos los usuarios (cacheada por versión de datos)
+    snapshot = cache_dashboard.obtener(
+        "dashboard", cache.version_actual(conn), lambda: lecturas.snapshot_dashboard(cur)
+    )
+    carrera_activa = snapshot["carrera_activa"]
 
     horas_restantes = None
     ya_pronosticado = False
 
     if carrera_activa and carrera_activa["fecha_limite_pronostico"]:
-        fecha_limite = datetime.strptime(
-            carrera_activa["fecha_limite_pronostico"],
-            "%Y-%m-%dT%H:%M"
-        )
-        delta = fecha_limite - datetime.now()
-        horas_restantes = max(0, int(delta.total_seconds() // 3600))
-
-        cur.execute("""
-            SELECT 1
-            FROM pronosticos
-            WHERE user_id = ? AND carrera_id = ?
-        """, (session["user_id"], carrera_activa["id"]))
-        ya_pronosticado = cur.fetchone() is not None
+        horas_restantes = horas_para_cierre(carrera_activa)
 
-    # 2️⃣ ÚLTIMA CARRERA CORRIDA
-    cur.execute("""
-        SELECT *
-        FROM carreras
-        WHERE status = 'corrida'
-        ORDER BY fecha DESC
-        LIMIT 1
-    """)
-    carrera_anterior = cur.fetchone()
-
-    pronosticos_fecha = []
-    if carrera_anterior:
-        cur.execute("""
-            SELECT u.nombre AS usuario,
-                   p.puntos
-            FROM pronosticos p
-            JOIN usuarios u ON u.id = p.user_id
-            WHERE p.carrera_id = ?
-            ORDER BY p.puntos DESC
-        """, (carrera_anterior["id"],))
-        pronosticos_fecha = cur.fetchall()
-
-    # 3️⃣ PRÓXIMAS CARRERAS
-    cur.execute("""
-        SELECT *
-        FROM carreras
-        WHERE status = 'futura'
-        ORDER BY fecha ASC
-        LIMIT 4
-    """)
-    proximas = cur.fetchall()
+        ya_pronosticado = lecturas.ya_pronosticado(
+            cur, session["user_id"], carrera_activa["id"]
+        )
 
     conn.close()
 
     return render_template(
         "dashboard.html",
         carrera=carrera_activa,
-        carrera_anterior=carrera_anterior,
-        pronosticos_fecha=pronosticos_fecha,
+        carrera_anterior=snapshot["carrera_anterior"],
+        pronosticos_fecha=snapshot["pronosticos_fecha"],
         horas_restantes=horas_restantes,
         ya_pronosticado=ya_pronosticado,
-        proximas=proximas
+        proximas=snapshot["proximas"]
     )
 
+
+def horas_para_cierre(carrera):
+    fecha_limite = datetime.strptime(
+        carrera["fecha_limite_pronostico"],
+        "%Y-%m-%dT%H:%M"
+    )
+    delta = fecha_limite - datetime.now()
+    return max(0, int(delta.total_seconds() // 3600))
+
+
 #---------EDITAR PERFIL-------------
 @app.route("/perfil", methods=["GET", "POST"])
 def perfil():
@@ -253,32 +300,35 @@ def perfil():
 
 # -------- CALENDARIO --------
 @app.route("/calendario")
+@condicional()
 def calendario():
     if "user_id" not in session:
         return render_template("index.html", error="Login incorrecto")
 
 
     conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT id AS nro_carrera, pais, autodromo, fecha, sprint
-        FROM carreras
-        ORDER BY id ASC
-    """)
-
-    carreras = cur.fetchall()
+    carreras = lecturas.calendario(conn.cursor())
     conn.close()
 
     return render_template("calendario.html", carreras=carreras)
 #-----------------------------------------------------------------
 # -------- PRONOSTICO POR CARRERA --------
+claves_pronostico = ClavesIdempotencia()
+
+
 @app.route("/pronostico/<int:carrera_id>", methods=["GET", "POST"])
 def pronostico_carrera(carrera_id):
 
     if "user_id" not in session:
         return render_template("index.html", error="Login incorrecto")
 
+    # Reenvío de un formulario ya guardado (doble click, reintento del
+    # navegador): se responde sin tocar la base
+    clave = None
+    if request.method == "POST" and request.form.get("clave"):
+        clave = f'{session["user_id"]}:{request.form["clave"]}'
+        if claves_pronostico.procesada(clave):
+            return redirect("/dashboard")
 
     conn = get_db()
     cur = conn.cursor()
@@ -291,13 +341,6 @@ def pronostico_carrera(carrera_id):
         conn.close()
         return "Carrera no encontrada", 404
 
-    # Pronóstico existente
-    cur.execute("""
-        SELECT * FROM pronosticos
-        WHERE user_id = ? AND carrera_id = ?
-    """, (session["user_id"], carrera_id))
-    pronostico = cur.fetchone()
-
     # 🔒 Modo solo lectura
     solo_lectura = carrera["clasificacion_iniciada"] == 1
 
@@ -308,35 +351,51 @@ def pronostico_carrera(carrera_id):
             conn.close()
             return "El pronóstico para esta carrera está cerrado", 403
 
-        pole = request.form["pole"]
-        p1 = request.form["p1"]
-        p2 = request.form["p2"]
-        p3 = request.form["p3"]
-
-        sprint_ganador = None
+        campos = ["pole", "p1", "p2", "p3"]
         if carrera["sprint"] == 1:
-            sprint_ganador = request.form.get("sprint_ganador")
-
-        if pronostico:
-            cur.execute("""
-                UPDATE pronosticos
-                SET pole = ?, sprint_ganador = ?, p1 = ?, p2 = ?, p3 = ?
-                WHERE id = ?
-            """, (pole, sprint_ganador, p1, p2, p3, pronostico["id"]))
-        else:
-            cur.execute("""
-                INSERT INTO pronosticos
-                (user_id, carrera_id, pole, sprint_ganador, p1, p2, p3)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (session["user_id"], carrera_id, pole, sprint_ganador, p1, p2, p3))
+            campos.append("sprint_ganador")
+        elegidos = catalogo.pilotos_del_form(request.form, campos)
+
+        # El mismo formulario en vuelo en otro hilo: se espera a que
+        # termine. Si commiteó, listo; si falló, este lo vuelve a intentar
+        escritor_actual = escritor.get_escritor()
+        while clave:
+            en_curso = claves_pronostico.reclamar(clave)
+            if en_curso is None:
+                break
+            commiteado = claves_pronostico.esperar(en_curso, escritor_actual.espera_max)
+            if commiteado:
+                conn.close()
+                return redirect("/dashboard")
+            if commiteado is None:
+                conn.close()
+                raise escritor.EscritorNoDisponible()
+
+        # Un solo upsert, en el lote del escritor agrupado
+        ok = False
+        try:
+            escritor_actual.ejecutar(
+                guardar_pronostico,
+                session["user_id"], carrera_id,
+                elegidos["pole"], elegidos.get("sprint_ganador"),
+                elegidos["p1"], elegidos["p2"], elegidos["p3"],
+            )
+            ok = True
+        finally:
+            if clave:
+                claves_pronostico.terminar(clave, ok)
 
-        conn.commit()
         conn.close()
         return redirect("/dashboard")
 
     # -------- GET --------
-    cur.execute("SELECT * FROM pilotos ORDER BY nombre")
-    pilotos = [p["nombre"] for p in cur.fetchall()]
+    cur.execute("""
+        SELECT * FROM pronosticos
+        WHERE user_id = ? AND carrera_id = ?
+    """, (session["user_id"], carrera_id))
+    pronostico = cur.fetchone()
+
+    pilotos = catalogo.pilotos()["lista"]
 
     conn.close()
     return render_template(
@@ -344,11 +403,13 @@ def pronostico_carrera(carrera_id):
         carrera=carrera,
         pilotos=pilotos,
         pronostico=pronostico,
-        solo_lectura=solo_lectura
+        solo_lectura=solo_lectura,
+        clave=secrets.token_urlsafe(16),
     )
 
 # -------- LISTA Y EDICIÓN DE PILOTOS --------
 @app.route("/pilotos", methods=["GET", "POST"])
+@condicional()
 def listar_pilotos():
     if "user_id" not in session:
         return render_template("index.html")
@@ -381,6 +442,7 @@ def editar_piloto(piloto_id):
         SET nombre = ?, equipo = ?, nacionalidad = ?, dorsal = ?
         WHERE id = ?
     """, (nombre, equipo, nacionalidad, dorsal, piloto_id))
+    cache.datos_modificados(conn)
 
     conn.commit()
     conn.close()
@@ -441,14 +503,18 @@ def admin_usuarios():
             SET nombre = ?, avatar = ?
             WHERE id = ?
         """, (nombre, avatar, user_id))
+        posiciones.renombrar_usuario(conn, user_id, nombre)
+        cache.datos_modificados(conn)
 
         conn.commit()
 
     cur.execute("""
-        SELECT id, nombre, email, avatar, admin
+        SELECT id, nombre, email, avatar, admin,
+               (SELECT COUNT(*) FROM dispositivos d
+                WHERE d.user_id = usuarios.id AND d.expira > ?) AS dispositivos
         FROM usuarios
         ORDER BY nombre
-    """)
+    """, (time.time(),))
     usuarios = cur.fetchall()
 
     conn.close()
@@ -463,6 +529,9 @@ def eliminar_usuario(user_id):
     cur = conn.cursor()
 
     cur.execute("DELETE FROM usuarios WHERE id = ?", (user_id,))
+    recordarme.revocar_usuario(conn, user_id)
+    posiciones.quitar_usuario(conn, user_id)
+    cache.datos_modificados(conn)
     conn.commit()
     conn.close()
 
@@ -481,11 +550,23 @@ def reset_password_usuario(user_id):
         SET password = ''
         WHERE id = ?
     """, (user_id,))
+    recordarme.revocar_usuario(conn, user_id)
 
     conn.commit()
     conn.close()
 
     return redirect("/admin/usuarios")
+#-----------revocar "Recordarme"---------
+@app.route("/admin/usuarios/revocar/<int:user_id>")
+def revocar_dispositivos_usuario(user_id):
+    if "user_id" not in session or not session.get("admin"):
+        return "Acceso denegado", 403
+
+    conn = get_db()
+    recordarme.revocar_usuario(conn, user_id)
+    conn.commit()
+
+    return redirect("/admin/usuarios")
 
 
 
@@ -536,10 +617,11 @@ def admin_carreras():
             """, (fecha_limite, status, imagen, carrera_id))
 
             # ⭐ CLAVE: si pasa a CORRIDA → calcular puntos
+        cache.datos_modificados(conn)
         conn.commit()   # ⬅️ liberar el lock
 
         if estado_anterior != "corrida" and status == "corrida":
-            calcular_puntos_carrera(carrera_id)
+            puntuar_carrera(conn, carrera_id)
 
 
 
@@ -559,6 +641,7 @@ def admin_carreras():
                 WHERE id = ?
             """, (carrera_id,))
 
+        cache.datos_modificados(conn)
         conn.commit()
 
     # ======================
@@ -604,24 +687,24 @@ def admin_resultados(carrera_id):
         return "Carrera no encontrada", 404
 
     # Pilotos
-    cur.execute("SELECT nombre FROM pilotos ORDER BY dorsal ASC")
-    pilotos = [p["nombre"] for p in cur.fetchall()]
+    pilotos = sorted(catalogo.pilotos()["lista"], key=lambda p: p["dorsal"] or 0)
 
     # Resultado existente
     cur.execute("SELECT * FROM resultados WHERE carrera_id = ?", (carrera_id,))
     resultado = cur.fetchone()
 
     if request.method == "POST":
-        pole = request.form["pole"]
-        sprint = request.form.get("sprint")
-        p1 = request.form["p1"]
-        p2 = request.form["p2"]
-        p3 = request.form["p3"]
+        pole = catalogo.piloto_del_form(request.form, "pole")
+        sprint = catalogo.piloto_del_form(request.form, "sprint")
+        p1 = catalogo.piloto_del_form(request.form, "p1")
+        p2 = catalogo.piloto_del_form(request.form, "p2")
+        p3 = catalogo.piloto_del_form(request.form, "p3")
 
         if resultado:
             cur.execute("""
                 UPDATE resultados
-                SET pole = ?, sprint_ganador = ?, p1 = ?, p2 = ?, p3 = ?
+                SET pole = ?, sprint_ganador = ?, p1 = ?, p2 = ?, p3 = ?,
+                    revision = COALESCE(revision, 0) + 1
                 WHERE carrera_id = ?
             """, (pole, sprint, p1, p2, p3, carrera_id))
         else:
@@ -630,7 +713,13 @@ def admin_resultados(carrera_id):
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (carrera_id, pole, sprint, p1, p2, p3))
 
+        cache.datos_modificados(conn)
         conn.commit()
+
+        # Corrección de una carrera ya corrida → re-puntuar (solo lo que cambie)
+        if carrera["status"] == "corrida":
+            puntuar_carrera(conn, carrera_id)
+
         conn.close()
         return redirect("/admin/carreras")
 
@@ -645,34 +734,17 @@ def admin_resultados(carrera_id):
 #----------Resumen Fecha------------
 from datetime import datetime
 
+def version_pronosticos_carrera():
+    return lecturas.version_pronosticos_carrera(
+        get_db().cursor(), request.view_args["carrera_id"]
+    )
+
+
 @app.route("/fecha/<int:carrera_id>")
+@condicional(extra=version_pronosticos_carrera)
 def fecha_detalle(carrera_id):
     conn = get_db()
-    cur = conn.cursor()
-
-    # Carrera
-    cur.execute("SELECT * FROM carreras WHERE id = ?", (carrera_id,))
-    carrera = cur.fetchone()
-
-    # Resultado oficial
-    cur.execute("SELECT * FROM resultados WHERE carrera_id = ?", (carrera_id,))
-    resultado = cur.fetchone()
-
-    # Pronósticos de TODOS
-    cur.execute("""
-        SELECT
-            u.nombre AS usuario,
-            p.pole,
-            p.sprint_ganador,
-            p.p1, p.p2, p.p3,
-            p.puntos
-        FROM pronosticos p
-        JOIN usuarios u ON u.id = p.user_id
-        WHERE p.carrera_id = ?
-        ORDER BY p.puntos DESC
-    """, (carrera_id,))
-    pronosticos = cur.fetchall()
-
+    carrera, resultado, pronosticos = lecturas.fecha(conn.cursor(), carrera_id)
     conn.close()
 
     return render_template(
@@ -684,115 +756,22 @@ def fecha_detalle(carrera_id):
 
 
 
-#----------CALCULAR PUNTOS NUEVA---------
-def calcular_puntos_carrera(carrera_id):
-    conn = get_db()
-    cur = conn.cursor()
-
-    # Resultado oficial
-    cur.execute("""
-        SELECT pole, sprint_ganador, p1, p2, p3
-        FROM resultados
-        WHERE carrera_id = ?
-    """, (carrera_id,))
-    resultado = cur.fetchone()
-
-    if not resultado:
-        conn.close()
-        return
-
-    podio_real = [resultado["p1"], resultado["p2"], resultado["p3"]]
-
-    # Pronósticos
-    cur.execute("""
-        SELECT id, pole, sprint_ganador, p1, p2, p3
-        FROM pronosticos
-        WHERE carrera_id = ?
-    """, (carrera_id,))
-    pronosticos = cur.fetchall()
-
-    for p in pronosticos:
-        puntos = 0
-
-        # POLE → 2 puntos
-        if p["pole"] == resultado["pole"]:
-            puntos += 2
-
-        # SPRINT → 2 puntos (si existe)
-        if resultado["sprint_ganador"]:
-            if p["sprint_ganador"] == resultado["sprint_ganador"]:
-                puntos += 2
-
-        # P1
-        if p["p1"] == resultado["p1"]:
-            puntos += 3
-        elif p["p1"] in podio_real:
-            puntos += 1
-
-        # P2
-        if p["p2"] == resultado["p2"]:
-            puntos += 3
-        elif p["p2"] in podio_real:
-            puntos += 1
-
-        # P3
-        if p["p3"] == resultado["p3"]:
-            puntos += 3
-        elif p["p3"] in podio_real:
-            puntos += 1
-
-        # Guardar total
-        cur.execute("""
-            UPDATE pronosticos
-            SET puntos = ?
-            WHERE id = ?
-        """, (puntos, p["id"]))
+#----------VER PRONOSTICOS ----------
+def version_pronosticos_usuario():
+    if "user_id" not in session:
+        return None
+    return lecturas.version_pronosticos_usuario(get_db().cursor(), session["user_id"])
 
-    conn.commit()
-    conn.close()
 
-#----------VER PRONOSTICOS ----------
 @app.route("/mis_pronosticos")
+@condicional(extra=version_pronosticos_usuario)
 def mis_pronosticos():
     if "user_id" not in session:
         return render_template("index.html", error="Login incorrecto")
 
 
     conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT
-            c.pais,
-            c.fecha,
-
-            -- Resultado oficial
-            r.pole AS res_pole,
-            r.sprint_ganador AS res_sprint,
-            r.p1 AS res_p1,
-            r.p2 AS res_p2,
-            r.p3 AS res_p3,
-
-            -- Pronóstico del usuario
-            p.pole AS pro_pole,
-            p.sprint_ganador AS pro_sprint,
-            p.p1 AS pro_p1,
-            p.p2 AS pro_p2,
-            p.p3 AS pro_p3,
-
-            p.puntos
-        FROM pronosticos p
-        JOIN carreras c ON c.id = p.carrera_id
-        LEFT JOIN resultados r ON r.carrera_id = c.id
-        WHERE p.user_id = ?
-        ORDER BY c.fecha ASC
-    """, (session["user_id"],))
-
-
-    pronosticos = cur.fetchall()
-
-    print("DEBUG pronosticos:", pronosticos)
-
+    pronosticos = lecturas.mis_pronosticos(conn.cursor(), session["user_id"])
     conn.close()
 
     return render_template(
@@ -810,45 +789,14 @@ def admin_calcular_puntos(carrera_id):
     if not session.get("admin"):
         return "Acceso denegado", 403
 
-    conn = get_db()
-    cur = conn.cursor()
-
-    # 1️⃣ Resultado oficial
-    cur.execute("""
-        SELECT *
-        FROM resultados
-        WHERE carrera_id = ?
-    """, (carrera_id,))
-    resultado = cur.fetchone()
-
-    if not resultado:
-        conn.close()
+    cambiados = puntuar_carrera(get_db(), carrera_id)
+    if cambiados is None:
         return "No hay resultados cargados", 400
 
-    # 2️⃣ Pronósticos de la carrera
-    cur.execute("""
-        SELECT *
-        FROM pronosticos
-        WHERE carrera_id = ?
-    """, (carrera_id,))
-    pronosticos = cur.fetchall()
-
-    # 3️⃣ Calcular puntos
-    for pron in pronosticos:
-        puntos = calcular_puntos(pron, resultado)
-
-        cur.execute("""
-            UPDATE pronosticos
-            SET puntos = ?
-            WHERE id = ?
-        """, (puntos, pron["id"]))
-
-    conn.commit()
-    conn.close()
-
-    return "Puntos calculados correctamente"
+    return f"Puntos calculados correctamente ({cambiados} pronósticos actualizados)"
 # -------- RANKING GENERAL --------
 @app.route("/ranking")
+@condicional()
 def ranking():
     if "user_id" not in session:
         return render_template("index.html", error="Login incorrecto")
@@ -856,16 +804,7 @@ def ranking():
     conn = get_db()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT u.nombre,
-               COALESCE(SUM(p.puntos), 0) AS puntos
-        FROM usuarios u
-        LEFT JOIN pronosticos p ON p.user_id = u.id
-        GROUP BY u.id, u.nombre
-        ORDER BY puntos DESC
-    """)
-
-    ranking = cur.fetchall()
+    ranking = posiciones.obtener_ranking(cur)
     conn.close()
 
     return render_template(
@@ -885,43 +824,19 @@ def control_pronosticos():
     if not session.get("admin"):
         return "Acceso denegado", 403
 
-    conn = get_db()
-    cur = conn.cursor()
-
-    # Usuarios
-    cur.execute("SELECT id, nombre FROM usuarios ORDER BY nombre")
-    usuarios = cur.fetchall()
-
-    # Carreras
-    cur.execute("""
-        SELECT id, pais, fecha
-        FROM carreras
-        ORDER BY fecha
-    """)
-    carreras = cur.fetchall()
-
-    # Pronósticos existentes
-    cur.execute("""
-        SELECT user_id, carrera_id
-        FROM pronosticos
-    """)
-    pronosticos = cur.fetchall()
-
-    conn.close()
+    # La grilla se arma en el navegador con /control_pronosticos/datos
+    return render_template("control_pronosticos.html", filtros=list(control.FILTROS))
 
-    # Armar matriz user_id -> carrera_id -> True
-    matriz = {}
-    for u in usuarios:
-        matriz[u["id"]] = {}
 
-    for p in pronosticos:
-        matriz[p["user_id"]][p["carrera_id"]] = True
+@app.route("/control_pronosticos/datos")
+def control_pronosticos_datos():
+    if "user_id" not in session or not session.get("admin"):
+        return "Acceso denegado", 403
 
-    return render_template(
-        "control_pronosticos.html",
-        usuarios=usuarios,
-        carreras=carreras,
-        matriz=matriz
+    return control.datos(
+        get_db().cursor(),
+        despues=request.args.get("despues", ""),
+        filtro=request.args.get("filtro", "todos"),
     )
 
 #---------carrera visible--------
@@ -983,10 +898,54 @@ def pronosticos_fecha():
     )
 
 
+#---------RECALCULAR TEMPORADA COMPLETA----------
+@app.route("/admin/recalcular_temporada")
+def admin_recalcular_temporada():
+    if "user_id" not in session or not session.get("admin"):
+        return "Acceso denegado", 403
+
+    cambiados = recalcular_temporada(get_db())
+    return f"Temporada recalculada: {cambiados} pronósticos actualizados"
+
+
+#---------VERIFICAR TABLA DE POSICIONES----------
+@app.route("/admin/posiciones/verificar")
+def admin_verificar_posiciones():
+    if "user_id" not in session or not session.get("admin"):
+        return "Acceso denegado", 403
+
+    diferencias = posiciones.verificar(get_db())
+    if diferencias:
+        return f"Tabla de posiciones reconstruida ({diferencias} diferencias)"
+    return "Tabla de posiciones consistente"
+
+
+#---------ESTADO DEL POOL (para graficar)----------
+@app.route("/admin/db_stats")
+def admin_db_stats():
+    if "user_id" not in session or not session.get("admin"):
+        return "Acceso denegado", 403
+
+    return db.get_pool().estadisticas()
+
+
+#---------MÉTRICAS POR RUTA (de este worker)----------
+@app.route("/admin/metrics", methods=["GET", "POST"])
+def admin_metricas():
+    if "user_id" not in session or not session.get("admin"):
+        return "Acceso denegado", 403
+
+    if request.method == "POST":
+        metricas.get_registro().reiniciar()
+        return redirect("/admin/metrics")
+
+    return render_template("admin_metricas.html", **metricas.estado())
+
+
 #---------HUB FECHA ----------
 
 
 # -------- INICIAR APP --------
 if __name__ == "__main__":
     print("Flask está iniciando en http://localhost:5000 ...")
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=app.config["DESARROLLO"])
\ No newline at end of file
@@ -0,0 +1,76 @@
+# -------- ARRANQUE EN CALIENTE (gunicorn.conf.py) --------
+# Con preload_app el master importa app.py una sola vez y, antes del fork,
+# compila todas las plantillas (plantillas.py) y llena los caches en
+# memoria (catálogo de pilotos, snapshot del dashboard). Los workers los
+# heredan por copy-on-write y no los recalculan en su primer request.
+#
+# Después del fork cada worker hace unos requests internos a las páginas
+# más pedidas (abre su conexión del pool, llena el cache de sentencias) y
+# reporta cuánto tardó el primero: es lo que pagaría el primer usuario.
+import time
+
+import cache
+import catalogo
+import lecturas
+import metricas
+import posiciones
+from db import get_db
+
+# Páginas que se piden en el calentamiento de cada worker
+RUTAS_CALENTAMIENTO = ["/dashboard", "/ranking", "/calendario"]
+
+
+def _ms(inicio):
+    return round((time.perf_counter() - inicio) * 1000, 1)
+
+
+def calentar_datos(app):
+    """
+    Llena los caches versionados y recorre las consultas de lectura más
+    comunes. Cierra las conexiones al terminar: no se heredan en el fork.
+    """
+    from app import cache_dashboard
+
+    tiempos = {}
+    with app.app_context():
+        conn = get_db()
+        cur = conn.cursor()
+        version = cache.version_actual(conn)
+
+        inicio = time.perf_counter()
+        catalogo.pilotos()
+        tiempos["pilotos"] = _ms(inicio)
+
+        inicio = time.perf_counter()
+        cache_dashboard.obtener("dashboard", version, lambda: lecturas.snapshot_dashboard(cur))
+        lecturas.calendario(cur)
+        tiempos["calendario"] = _ms(inicio)
+
+        inicio = time.perf_counter()
+        posiciones.obtener_ranking(cur)
+        tiempos["ranking"] = _ms(inicio)
+
+    app.extensions["prode_pool"].cerrar_todas()
+    return tiempos
+
+
+def calentar_worker(app):
+    """
+    Requests internos a RUTAS_CALENTAMIENTO con una sesión de prueba, dos
+    vueltas. Devuelve (ms del primer request, ms de la misma ruta en caliente).
+    """
+    cliente = app.test_client()
+    # Que el calentamiento no cuente en /admin/metrics ni en /metrics
+    cliente.environ_base[metricas.CALENTAMIENTO] = True
+    with cliente.session_transaction() as sesion:
+        sesion["user_id"] = 0
+        sesion["user_name"] = "calentamiento"
+        sesion["avatar"] = ""
+
+    tiempos = []
+    for ruta in RUTAS_CALENTAMIENTO * 2:
+        inicio = time.perf_counter()
+        cliente.get(ruta)
+        tiempos.append(_ms(inicio))
+
+    return tiempos[0], tiempos[len(RUTAS_CALENTAMIENTO)]
@@ -0,0 +1,580 @@
+# -------- MODO ASGI --------
+#   uvicorn asgi:app --workers 4
+#   (o gunicorn -k uvicorn.workers.UvicornWorker -w 4 asgi:app)
+#   Antes: python assets.py (uvicorn solo no arma los bundles de CSS/JS; sin
+#   ellos las páginas piden Bootstrap al CDN)
+#
+# Las páginas de solo lectura que más se piden (dashboard, ranking,
+# calendario, fecha, mis pronósticos) se atienden con vistas async que
+# consultan SQLite por aiosqlite: cada conexión corre en su propio hilo y
+# el event loop no se bloquea esperando la base. Así un worker puede tener
+# cientos de requests en vuelo sin un hilo por request.
+#
+# El ranking en vivo (/stream, /stream/poll, /stream/datos) también es
+# async: cada oyente es una corrutina esperando en su asyncio.Queue, no un
+# hilo, así que no tiene el tope de oyentes por worker de en_vivo.py.
+#
+# Todo lo demás (login, formularios, admin, estáticos) sigue en la app
+# Flask de siempre, servida por a2wsgi con un pool de hilos: las
+# escrituras no cambian (escritor agrupado, commits, publicar la marca).
+#
+# Las vistas async corren dentro de un request context de Flask: sesión,
+# before/after_request, url_for, filtros y plantillas son los mismos. El
+# SQL también (lecturas.py); lo que todavía es sqlite3 sincrónico no corre
+# en el event loop: restaurar la sesión de "Recordarme" y renderizar las
+# plantillas van a un hilo, y el catálogo de pilotos del filtro |piloto se
+# carga antes de renderizar.
+import asyncio
+import os
+import sqlite3
+import threading
+
+import aiosqlite
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask import Response, g, render_template, request, session
+from werkzeug.exceptions import HTTPException
+
+import app as aplicacion
+import cache
+import catalogo
+import en_vivo
+import lecturas
+import posiciones
+from condicional import condicional_async
+
+flask_app = aplicacion.app
+
+
+# -------- POOL DE CONEXIONES ASYNC --------
+class PoolAsync:
+    """
+    Hasta `size` conexiones aiosqlite de solo lectura (un hilo cada una).
+    Si están todas ocupadas, el request espera su turno en el event loop.
+    """
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self.size = size
+        self._pid = None
+
+        # Contadores para graficar
+        self.abiertas = 0
+        self.esperas = 0
+
+    def _verificar_fork(self):
+        # Un pool por proceso (uvicorn --workers hace fork / spawn)
+        if self._pid != os.getpid():
+            self._libres = []
+            self._todas = []
+            self._cupo = asyncio.Semaphore(self.size)
+            self._pid = os.getpid()
+            # Las conexiones aiosqlite son hilos no daemon: si el proceso
+            # termina sin el lifespan shutdown (uvicorn --lifespan off, un
+            # error al arrancar) lo dejarían colgado. atexit no sirve: corre
+            # después de esperar a esos hilos; esto corre antes (es lo que
+            # usa concurrent.futures)
+            threading._register_atexit(self.detener)
+
+    async def _nueva(self):
+        conn = await aiosqlite.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        await conn.execute("PRAGMA journal_mode = WAL")
+        await conn.execute("PRAGMA busy_timeout = 5000")
+        # Estas conexiones nunca escriben
+        await conn.execute("PRAGMA query_only = 1")
+        self._todas.append(conn)
+        self.abiertas += 1
+        return conn
+
+    async def obtener(self):
+        self._verificar_fork()
+        if self._cupo.locked():
+            self.esperas += 1
+        await self._cupo.acquire()
+        try:
+            return self._libres.pop() if self._libres else await self._nueva()
+        except BaseException:
+            self._cupo.release()
+            raise
+
+    def devolver(self, conn):
+        self._libres.append(conn)
+        self._cupo.release()
+
+    async def cerrar_todas(self):
+        while self._pid == os.getpid() and self._todas:
+            await self._todas.pop().close()
+        self._libres = []
+
+    def detener(self):
+        """Sin event loop: corta el hilo de cada conexión que quede abierta."""
+        while self._pid == os.getpid() and self._todas:
+            self._todas.pop().stop()
+
+    def estadisticas(self):
+        return {
+            "path": self.path,
+            "size": self.size,
+            "abiertas": self.abiertas,
+            "esperas": self.esperas,
+        }
+
+
+def get_pool_async():
+    return flask_app.extensions["prode_pool_async"]
+
+
+async def uno(sql, params=()):
+    conn = await get_pool_async().obtener()
+    try:
+        async with conn.execute(sql, params) as cur:
+            return await cur.fetchone()
+    finally:
+        get_pool_async().devolver(conn)
+
+
+async def todos(sql, params=()):
+    conn = await get_pool_async().obtener()
+    try:
+        async with conn.execute(sql, params) as cur:
+            return await cur.fetchall()
+    finally:
+        get_pool_async().devolver(conn)
+
+
+async def cargar_pilotos():
+    """
+    catalogo.pilotos() por aiosqlite: deja el catálogo en g, donde lo busca
+    el filtro |piloto, así el render no consulta SQLite desde el event loop.
+    """
+    version = (await uno(cache.SQL_VERSION_DATOS))[0]
+    g.pilotos = await catalogo.cache_pilotos.obtener_async(
+        "pilotos", version, lambda: _leer_pilotos()
+    )
+
+
+async def _leer_pilotos():
+    return catalogo.armar(await todos(catalogo.SQL_PILOTOS))
+
+
+async def renderizar(plantilla, **contexto):
+    """
+    render_template en un hilo: una página grande (el ranking, los
+    pronósticos de una fecha) tarda lo suyo en Jinja y no puede frenar el
+    event loop. to_thread copia el contexto del request (sesión, g, url_for).
+    """
+    return await asyncio.to_thread(render_template, plantilla, **contexto)
+
+
+# -------- VISTAS ASYNC --------
+# Mismas consultas (lecturas.py) y plantillas que las vistas de app.py.
+async def dashboard():
+    if "user_id" not in session:
+        return await renderizar("index.html", error="Login incorrecto")
+
+    version = (await uno(cache.SQL_VERSION_DATOS))[0]
+    snapshot = await aplicacion.cache_dashboard.obtener_async(
+        "dashboard", version, snapshot_dashboard
+    )
+    carrera_activa = snapshot["carrera_activa"]
+
+    horas_restantes = None
+    ya_pronosticado = False
+
+    if carrera_activa and carrera_activa["fecha_limite_pronostico"]:
+        horas_restantes = aplicacion.horas_para_cierre(carrera_activa)
+        fila = await uno(lecturas.SQL_YA_PRONOSTICADO, (session["user_id"], carrera_activa["id"]))
+        ya_pronosticado = fila is not None
+
+    return await renderizar(
+        "dashboard.html",
+        carrera=carrera_activa,
+        carrera_anterior=snapshot["carrera_anterior"],
+        pronosticos_fecha=snapshot["pronosticos_fecha"],
+        horas_restantes=horas_restantes,
+        ya_pronosticado=ya_pronosticado,
+        proximas=snapshot["proximas"]
+    )
+
+
+async def snapshot_dashboard():
+    """lecturas.snapshot_dashboard, con las consultas en paralelo."""
+    carrera_activa, carrera_anterior, proximas = await asyncio.gather(
+        uno(lecturas.SQL_CARRERA_ACTIVA),
+        uno(lecturas.SQL_CARRERA_ANTERIOR),
+        todos(lecturas.SQL_PROXIMAS),
+    )
+
+    pronosticos_fecha = []
+    if carrera_anterior:
+        pronosticos_fecha = await todos(lecturas.SQL_PUNTOS_CARRERA, (carrera_anterior["id"],))
+
+    return {
+        "carrera_activa": carrera_activa,
+        "carrera_anterior": carrera_anterior,
+        "pronosticos_fecha": pronosticos_fecha,
+        "proximas": proximas,
+    }
+
+
+@condicional_async()
+async def ranking():
+    if "user_id" not in session:
+        return await renderizar("index.html", error="Login incorrecto")
+
+    ranking = await todos(posiciones.SQL_RANKING)
+    return await renderizar("ranking.html", ranking=ranking)
+
+
+@condicional_async()
+async def calendario():
+    if "user_id" not in session:
+        return await renderizar("index.html", error="Login incorrecto")
+
+    carreras = await todos(lecturas.SQL_CALENDARIO)
+    return await renderizar("calendario.html", carreras=carreras)
+
+
+async def version_pronosticos_carrera():
+    fila = await uno(lecturas.SQL_VERSION_PRONOSTICOS_CARRERA, (request.view_args["carrera_id"],))
+    return lecturas.version(fila)
+
+
+@condicional_async(extra=version_pronosticos_carrera)
+async def fecha_detalle(carrera_id):
+    carrera, resultado, pronosticos, _ = await asyncio.gather(
+        uno(lecturas.SQL_CARRERA, (carrera_id,)),
+        uno(lecturas.SQL_RESULTADO, (carrera_id,)),
+        todos(lecturas.SQL_PRONOSTICOS_CARRERA, (carrera_id,)),
+        cargar_pilotos(),
+    )
+
+    return await renderizar(
+        "pronosticos_fecha.html",
+        carrera=carrera,
+        resultado=resultado,
+        pronosticos=pronosticos
+    )
+
+
+async def version_pronosticos_usuario():
+    if "user_id" not in session:
+        return None
+    fila = await uno(lecturas.SQL_VERSION_PRONOSTICOS_USUARIO, (session["user_id"],))
+    return lecturas.version(fila)
+
+
+@condicional_async(extra=version_pronosticos_usuario)
+async def mis_pronosticos():
+    if "user_id" not in session:
+        return await renderizar("index.html", error="Login incorrecto")
+
+    pronosticos, _ = await asyncio.gather(
+        todos(lecturas.SQL_MIS_PRONOSTICOS, (session["user_id"],)),
+        cargar_pilotos(),
+    )
+    return await renderizar("mis_pronosticos.html", pronosticos=pronosticos)
+
+
+# -------- RANKING EN VIVO --------
+def _poner(cola, item):
+    """Deja solo lo último: un oyente lento se saltea los eventos viejos."""
+    if cola.full():
+        cola.get_nowait()
+    cola.put_nowait(item)
+
+
+class DifusorAsync:
+    """
+    en_vivo.Difusor para el event loop: una tarea por proceso mira la marca
+    y, cuando cambia el evento, lo deja en la cola de cada oyente.
+    """
+
+    def __init__(self, marca, intervalo=0.5, top=10):
+        self.marca = marca
+        self.intervalo = intervalo
+        self.top = top
+        self._pid = None
+
+        self.visto = 0        # última versión de datos revisada
+        self.version = 0      # versión de datos del último evento distinto
+        self.evento = None    # JSON listo para mandar
+        self._digest = None
+        self.enviados = 0
+
+    def _verificar_fork(self):
+        # Una tarea por proceso (uvicorn --workers hace fork / spawn)
+        if self._pid != os.getpid():
+            self._colas = set()
+            self._listo = None
+            self._tarea = None
+            self._pid = os.getpid()
+
+    async def _arrancar(self):
+        self._verificar_fork()
+        if self._listo is None:
+            self._listo = asyncio.ensure_future(self._revisar(notificar=False))
+            self._tarea = asyncio.create_task(self._bucle())
+        try:
+            await asyncio.shield(self._listo)
+        except Exception:
+            # Sin evento todavía: el bucle vuelve a intentar
+            pass
+
+    async def _bucle(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self._revisar()
+            except Exception:
+                # Que un error de la base no mate al difusor
+                continue
+
+    async def _revisar(self, notificar=True):
+        version, _ = await asyncio.to_thread(self.marca.leer)
+        if version is None or int(version) <= self.visto:
+            return
+
+        top, ultima = await asyncio.gather(
+            todos(en_vivo.SQL_TOP, (self.top + 1,)),
+            uno(lecturas.SQL_CARRERA_ANTERIOR),
+        )
+        texto, digest = en_vivo.codificar(en_vivo.evento(top, ultima, self.top))
+
+        self.visto = int(version)
+        if digest == self._digest:
+            # Cambió otra cosa (un piloto, una carrera futura): nada que avisar
+            return
+        self._digest = digest
+        self.version = int(version)
+        self.evento = texto
+        if notificar:
+            for cola in self._colas:
+                _poner(cola, (self.version, texto))
+
+    async def suscribir(self, desde):
+        """Cola del oyente, con el último evento si es más nuevo que `desde`."""
+        await self._arrancar()
+        cola = asyncio.Queue(maxsize=1)
+        self._colas.add(cola)
+        if self.evento is not None and self.version > desde:
+            _poner(cola, (self.version, self.evento))
+        return cola
+
+    def desuscribir(self, cola):
+        self._colas.discard(cola)
+
+    async def esperar(self, desde, timeout):
+        """(version, evento) si hay algo más nuevo que `desde`, si no (desde, None)."""
+        cola = await self.suscribir(desde)
+        try:
+            version, evento = await asyncio.wait_for(cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return desde, None
+        finally:
+            self.desuscribir(cola)
+        self.enviados += 1
+        return version, evento
+
+    def detener(self):
+        if self._pid == os.getpid() and self._tarea is not None:
+            self._tarea.cancel()
+
+    def estadisticas(self):
+        return {
+            "version": self.version,
+            "oyentes": len(self._colas) if self._pid == os.getpid() else 0,
+            "enviados": self.enviados,
+        }
+
+
+def get_difusor_async():
+    return flask_app.extensions["prode_difusor_async"]
+
+
+async def _esperar_desconexion(receive, cola):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    _poner(cola, None)
+
+
+async def _trozo(send, texto):
+    await send({"type": "http.response.body", "body": texto.encode(), "more_body": True})
+
+
+async def stream(environ, receive, send):
+    """/stream: el SSE de en_vivo.py, con el oyente esperando en su cola."""
+    with flask_app.request_context(environ):
+        # Sin restaurar "Recordarme": la página que abre el stream ya lo hizo
+        autorizado = "user_id" in session
+        desde = en_vivo.version_cliente()
+    if not autorizado:
+        return await _enviar(Response("", 401), send)
+
+    d = get_difusor_async()
+    cola = await d.suscribir(desde)
+    desconexion = asyncio.create_task(_esperar_desconexion(receive, cola))
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await _trozo(send, "retry: 5000\n\n")
+        while True:
+            try:
+                item = await asyncio.wait_for(cola.get(), flask_app.config["STREAM_LATIDO"])
+            except asyncio.TimeoutError:
+                # Latido: mantiene viva la conexión en proxies
+                await _trozo(send, ": latido\n\n")
+                continue
+            if item is None:
+                break
+            version, evento = item
+            d.enviados += 1
+            await _trozo(send, f"id: {version}\nevent: posiciones\ndata: {evento}\n\n")
+    finally:
+        desconexion.cancel()
+        d.desuscribir(cola)
+
+
+async def stream_poll():
+    if "user_id" not in session:
+        return "", 401
+
+    version, evento = await get_difusor_async().esperar(
+        en_vivo.version_cliente(), flask_app.config["STREAM_POLL_TIMEOUT"]
+    )
+    if evento is None:
+        return "", 204
+    return Response(
+        f'{{"version":{version},"datos":{evento}}}',
+        mimetype="application/json",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@condicional_async()
+async def stream_datos():
+    if "user_id" not in session:
+        return "", 401
+
+    version = (await uno(cache.SQL_VERSION_DATOS))[0]
+    texto = await en_vivo.cache_datos.obtener_async("datos", version, _armar_datos)
+    return Response(texto, mimetype="application/json")
+
+
+async def _armar_datos():
+    ranking, ultima = await asyncio.gather(
+        todos(posiciones.SQL_RANKING),
+        uno(lecturas.SQL_CARRERA_ANTERIOR),
+    )
+    puntos = await todos(lecturas.SQL_PUNTOS_CARRERA, (ultima["id"],)) if ultima else []
+    return en_vivo.codificar(en_vivo.datos(ranking, ultima, puntos))[0]
+
+
+# Endpoint de Flask -> vista async (solo GET; el resto va a la app WSGI)
+VISTAS = {
+    "dashboard": dashboard,
+    "ranking": ranking,
+    "calendario": calendario,
+    "fecha_detalle": fecha_detalle,
+    "mis_pronosticos": mis_pronosticos,
+    "stream_poll": stream_poll,
+    "stream_datos": stream_datos,
+}
+
+
+# -------- APLICACIÓN ASGI --------
+class _SinCuerpo:
+    """wsgi.input de un GET: nunca se lee."""
+
+    def read(self, *args):
+        return b""
+
+    def readline(self, *args):
+        return b""
+
+
+async def _atender(vista, environ, view_args):
+    with flask_app.request_context(environ):
+        try:
+            try:
+                if aplicacion.falta_restaurar_sesion():
+                    # Recordarme consulta y rota el validador con sqlite3:
+                    # en un hilo (to_thread copia el contexto del request)
+                    rv = await asyncio.to_thread(flask_app.preprocess_request)
+                else:
+                    rv = flask_app.preprocess_request()
+                if rv is None:
+                    rv = await vista(**view_args)
+            except Exception as e:
+                rv = flask_app.handle_user_exception(e)
+            return flask_app.finalize_request(rv)
+        except Exception as e:
+            return flask_app.handle_exception(e)
+
+
+async def _enviar(respuesta, send):
+    await send({
+        "type": "http.response.start",
+        "status": respuesta.status_code,
+        "headers": [
+            (k.lower().encode("latin-1"), v.encode("latin-1"))
+            for k, v in respuesta.headers.items()
+        ],
+    })
+    await send({"type": "http.response.body", "body": respuesta.get_data()})
+
+
+class AppASGI:
+    def __init__(self, wsgi_app):
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=flask_app.config["ASGI_HILOS"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        if scope["type"] == "http" and scope["method"] == "GET":
+            environ = build_environ(scope, _SinCuerpo())
+            try:
+                endpoint, view_args = flask_app.url_map.bind_to_environ(environ).match()
+            except HTTPException:
+                endpoint = None
+            if endpoint == "stream":
+                return await stream(environ, receive, send)
+            if endpoint in VISTAS:
+                respuesta = await _atender(VISTAS[endpoint], environ, view_args)
+                return await _enviar(respuesta, send)
+
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        try:
+            while True:
+                mensaje = await receive()
+                if mensaje["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif mensaje["type"] == "lifespan.shutdown":
+                    break
+        finally:
+            # También si la tarea se cancela
+            get_difusor_async().detener()
+            await get_pool_async().cerrar_todas()
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+flask_app.extensions["prode_pool_async"] = PoolAsync(
+    flask_app.config["DATABASE"], size=flask_app.config["ASGI_DB_POOL"]
+)
+flask_app.extensions["prode_difusor_async"] = DifusorAsync(
+    flask_app.extensions["prode_marca"],
+    intervalo=flask_app.config["STREAM_INTERVALO"],
+    top=flask_app.config["STREAM_TOP"],
+)
+app = AppASGI(flask_app)
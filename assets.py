@@ -0,0 +1,371 @@
+# -------- ASSETS (CSS / JS) --------
+# Bootstrap vendorizado + CSS propio en un bundle por tipo, con el hash
+# del contenido en el nombre y versiones .gz / .br precomprimidas.
+# Los templates piden cada bundle con {{ bundle('app.css') }}: con el
+# manifest es un solo archivo con hash en /assets/, que se sirve con cache
+# "immutable" y la variante comprimida que acepte el navegador. Los
+# archivos de static/vendor/ se commitean y el build falla si alguno no
+# coincide con el hash de integridad que publica Bootstrap.
+#
+# El build es un paso de deploy, no corre al importar la app: lo hace el
+# master de gunicorn en on_starting (gunicorn.conf.py), una vez antes del
+# fork. A mano:
+#   python assets.py --vendorizar   descarga Bootstrap a static/vendor/ (una vez, se commitea)
+#   python assets.py                arma los bundles en static/dist/ (o: flask --app app assets)
+# Si no hay manifest (no se corrió el build, o falló) la app anda igual:
+# bundle() arma los <link>/<script> de antes, Bootstrap del CDN con su hash
+# de integridad y los archivos propios sin agrupar, y lo avisa en el log.
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import logging
+import re
+import urllib.request
+
+from flask import abort, request, send_from_directory, url_for
+from markupsafe import Markup
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(BASE_DIR, "static")
+TEMPLATES = os.path.join(BASE_DIR, "templates")
+SALIDA = "dist"
+DIST = os.path.join(STATIC, SALIDA)
+MANIFEST = os.path.join(DIST, "manifest.json")
+URL_STATIC = "/static"
+
+# La misma versión que se pedía al CDN antes de los bundles
+BOOTSTRAP_VERSION = "5.3.2"
+CDN = f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist"
+# destino -> (origen, SHA-384 publicado por Bootstrap).
+# El JS va sin Popper: los templates solo usan collapse (la navbar). Para
+# dropdowns o tooltips hay que sumar @popperjs/core antes de bootstrap.min.js.
+VENDOR = {
+    "vendor/bootstrap.min.css": (
+        f"{CDN}/css/bootstrap.min.css",
+        "T3c6CoIi6uLrA9TneNEoa7RxnatzjcDSCmG1MXxSR1GAsXEV/Dwwykc2MPK8M2HN",
+    ),
+    "vendor/bootstrap.min.js": (
+        f"{CDN}/js/bootstrap.min.js",
+        "BBtl+eGJRgqQAUMxJ7pMwbEyER4l1g+O15P+16Ep7Q9Q+zqX6gSbd85u4mG4QzX+",
+    ),
+}
+
+BUNDLES = {
+    "app.css": ["vendor/bootstrap.min.css", "style.css"],
+    "app.js": ["vendor/bootstrap.min.js", "js/en_vivo.js"],
+    "control.js": ["js/control.js"],
+}
+
+# Clases que se arman dinámicamente y no aparecen literales en templates/JS
+SIEMPRE = set()
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CODIFICACIONES = (("br", ".br"), ("gzip", ".gz"))
+
+log = logging.getLogger("prode.assets")
+
+
+class AssetsError(Exception):
+    """Falta un archivo del bundle o uno vendorizado no coincide con su hash."""
+
+
+def _integridad(datos):
+    return base64.b64encode(hashlib.sha384(datos).digest()).decode()
+
+
+# -------- VENDORIZAR --------
+def vendorizar():
+    for destino, (url, integridad) in VENDOR.items():
+        ruta = os.path.join(STATIC, destino)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as r:
+            datos = r.read()
+        if _integridad(datos) != integridad:
+            raise AssetsError(f"{url} no coincide con su hash de integridad")
+        with open(ruta, "wb") as f:
+            f.write(datos)
+        print(f"✔ {destino} ({len(datos) / 1024:.0f} KB)")
+
+
+# -------- RECORTE DE CSS --------
+# Se quitan los selectores cuyas clases no aparecen en ningún template,
+# módulo de Python ni en el JS de los bundles (Bootstrap agrega .show,
+# .collapsing...; en_vivo.js arma filas del ranking).
+def palabras_usadas():
+    fuentes = [os.path.join(TEMPLATES, f) for f in os.listdir(TEMPLATES)]
+    fuentes += [os.path.join(BASE_DIR, f) for f in os.listdir(BASE_DIR) if f.endswith(".py")]
+    fuentes += [os.path.join(STATIC, f) for f in BUNDLES["app.js"]]
+
+    palabras = set(SIEMPRE)
+    for ruta in fuentes:
+        if os.path.isfile(ruta):
+            with open(ruta, encoding="utf-8", errors="ignore") as f:
+                palabras.update(re.findall(r"[\w-]+", f.read()))
+    return palabras
+
+
+def _bloques(css):
+    """(prelude, cuerpo) de cada bloque {...} de primer nivel."""
+    i, inicio, apertura, profundidad = 0, 0, 0, 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i += 1
+            while css[i] != c:
+                i += 2 if css[i] == "\\" else 1
+        elif css.startswith("/*", i):
+            i = css.index("*/", i) + 1
+        elif c == "{":
+            if profundidad == 0:
+                apertura = i
+            profundidad += 1
+        elif c == "}":
+            profundidad -= 1
+            if profundidad == 0:
+                prelude = re.sub(r"/\*.*?\*/", "", css[inicio:apertura], flags=re.S)
+                yield prelude.strip(), css[apertura + 1:i]
+                inicio = i + 1
+        i += 1
+
+
+def _selectores(prelude):
+    """Separa por comas de primer nivel (las de :not(a, b) no cuentan)."""
+    partes, profundidad, actual = [], 0, ""
+    for c in prelude:
+        if c == "," and profundidad == 0:
+            partes.append(actual)
+            actual = ""
+            continue
+        profundidad += (c == "(") - (c == ")")
+        actual += c
+    partes.append(actual)
+    return [p.strip() for p in partes]
+
+
+def recortar(css, usadas):
+    salida = []
+    for prelude, cuerpo in _bloques(css):
+        if prelude.startswith("@"):
+            if re.match(r"@(media|supports|container|layer)\b", prelude):
+                cuerpo = recortar(cuerpo, usadas)
+                if cuerpo:
+                    salida.append(f"{prelude}{{{cuerpo}}}")
+            else:
+                # @keyframes, @font-face, ... se dejan como están
+                salida.append(f"{prelude}{{{cuerpo}}}")
+            continue
+
+        vivos = [
+            s for s in _selectores(prelude)
+            if all(clase in usadas for clase in re.findall(r"\.(-?[_a-zA-Z][\w-]*)", s))
+        ]
+        if vivos:
+            salida.append(f"{','.join(vivos)}{{{cuerpo}}}")
+    return "".join(salida)
+
+
+# -------- BUILD --------
+def _reescribir_urls(css, origen):
+    """url() relativas al archivo original -> absolutas (el bundle se sirve desde /assets/)."""
+    carpeta = posixpath.dirname(origen)
+
+    def reemplazo(m):
+        url = m.group(2)
+        if re.match(r"(data:|https?:|/|#)", url):
+            return m.group(0)
+        destino = posixpath.normpath(posixpath.join(carpeta, url))
+        return f'url("{URL_STATIC}/{destino}")'
+
+    return re.sub(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""", reemplazo, css)
+
+
+def _leer_fuente(origen, usadas):
+    ruta = os.path.join(STATIC, origen)
+    extension = os.path.splitext(origen)[1]
+
+    if not os.path.exists(ruta):
+        if origen in VENDOR:
+            raise AssetsError(f"falta {origen}: correr python assets.py --vendorizar y commitearlo")
+        raise AssetsError(f"falta {origen}")
+
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    if origen in VENDOR and _integridad(datos) != VENDOR[origen][1]:
+        raise AssetsError(f"{origen} no es Bootstrap {BOOTSTRAP_VERSION} (hash distinto)")
+
+    contenido = datos.decode("utf-8")
+    # Los .map no se publican con el bundle
+    contenido = re.sub(r"^[/*#@ ]*sourceMappingURL=.*$", "", contenido, flags=re.M)
+    if extension == ".css":
+        if origen in VENDOR:
+            contenido = recortar(contenido, usadas)
+        contenido = _reescribir_urls(contenido, origen)
+    return contenido
+
+
+def _escribir(nombre, datos):
+    with open(os.path.join(DIST, nombre), "wb") as f:
+        f.write(datos)
+
+
+def construir():
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("⚠ sin el paquete brotli: solo se generan las versiones .gz")
+
+    os.makedirs(DIST, exist_ok=True)
+    usadas = palabras_usadas()
+    manifest = {}
+
+    for bundle, fuentes in BUNDLES.items():
+        datos = "\n".join(_leer_fuente(f, usadas) for f in fuentes).encode()
+
+        base, extension = os.path.splitext(bundle)
+        nombre = f"{base}.{hashlib.sha1(datos).hexdigest()[:10]}{extension}"
+        _escribir(nombre, datos)
+        comprimido = gzip.compress(datos, 9, mtime=0)
+        _escribir(nombre + ".gz", comprimido)
+        if brotli:
+            comprimido = brotli.compress(datos, quality=11)
+            _escribir(nombre + ".br", comprimido)
+
+        manifest[bundle] = nombre
+        original = sum(os.path.getsize(os.path.join(STATIC, f)) for f in fuentes)
+        print(f"{bundle:8} {original / 1024:7.0f} KB fuentes → {len(datos) / 1024:5.0f} KB "
+              f"→ {len(comprimido) / 1024:4.0f} KB comprimido  ({nombre})")
+
+    _limpiar(manifest)
+    tmp = MANIFEST + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, MANIFEST)
+    return manifest
+
+
+def _limpiar(nuevo):
+    """Borra bundles viejos; se conserva la generación anterior para los workers que sigan vivos."""
+    vigentes = set(nuevo.values())
+    if os.path.exists(MANIFEST):
+        with open(MANIFEST) as f:
+            vigentes.update(json.load(f).values())
+
+    for archivo in os.listdir(DIST):
+        if archivo == "manifest.json":
+            continue
+        if re.sub(r"\.(gz|br)$", "", archivo) not in vigentes:
+            os.remove(os.path.join(DIST, archivo))
+
+
+def _desactualizado():
+    if not os.path.exists(MANIFEST):
+        return True
+    generado = os.path.getmtime(MANIFEST)
+    return any(
+        os.path.getmtime(os.path.join(STATIC, f)) > generado
+        for fuentes in BUNDLES.values() for f in fuentes
+        if os.path.exists(os.path.join(STATIC, f))
+    )
+
+
+# -------- FLASK --------
+def leer_manifest():
+    """El manifest del último build, o None si no se corrió."""
+    if not os.path.exists(MANIFEST):
+        return None
+    with open(MANIFEST) as f:
+        return json.load(f)
+
+
+def _etiqueta(nombre, url, integridad=None):
+    atributos = ""
+    if integridad:
+        atributos = f' integrity="sha384-{integridad}" crossorigin="anonymous"'
+    if nombre.endswith(".css"):
+        return f'<link rel="stylesheet" href="{url}"{atributos}>'
+    return f'<script defer src="{url}"{atributos}></script>'
+
+
+def etiquetas_sin_bundle(nombre):
+    """Las fuentes del bundle por separado: Bootstrap del CDN, lo propio desde /static."""
+    etiquetas = []
+    for fuente in BUNDLES[nombre]:
+        if fuente in VENDOR:
+            etiquetas.append(_etiqueta(nombre, *VENDOR[fuente]))
+        else:
+            etiquetas.append(_etiqueta(nombre, url_for("static", filename=fuente)))
+    return "\n".join(etiquetas)
+
+
+def init_app(app):
+    # El manifest se lee en el primer render (después del build de
+    # on_starting). Con el servidor de desarrollo se rearma si cambió algo.
+    manifest = {}
+    avisado = []
+
+    def resolver(nombre):
+        if app.debug and _desactualizado():
+            manifest.clear()
+            try:
+                construir()
+            except AssetsError as e:
+                log.error("No se pudieron armar los bundles: %s", e)
+        if not manifest:
+            manifest.update(leer_manifest() or {})
+        if not manifest and not avisado:
+            avisado.append(True)
+            log.warning(
+                "No está static/dist/manifest.json: se sirve Bootstrap del CDN y el "
+                "CSS/JS propio sin agrupar. Correr python assets.py antes del deploy."
+            )
+        return manifest.get(nombre)
+
+    def bundle(nombre):
+        """<link> o <script> del bundle; sin build, los de cada fuente."""
+        generado = resolver(nombre)
+        if generado:
+            return Markup(_etiqueta(nombre, url_for("assets", nombre=generado)))
+        return Markup(etiquetas_sin_bundle(nombre))
+
+    app.jinja_env.globals["bundle"] = bundle
+
+    @app.cli.command("assets")
+    def comando_assets():
+        """Arma los bundles de static/dist/."""
+        construir()
+
+    @app.route("/assets/<nombre>")
+    def assets(nombre):
+        if not os.path.isfile(os.path.join(DIST, nombre)) or nombre == "manifest.json":
+            abort(404)
+
+        mimetype = mimetypes.guess_type(nombre)[0]
+        for codificacion, extension in CODIFICACIONES:
+            if request.accept_encodings[codificacion] and os.path.exists(
+                os.path.join(DIST, nombre + extension)
+            ):
+                respuesta = send_from_directory(DIST, nombre + extension, mimetype=mimetype)
+                respuesta.headers["Content-Encoding"] = codificacion
+                break
+        else:
+            respuesta = send_from_directory(DIST, nombre, mimetype=mimetype)
+
+        respuesta.vary.add("Accept-Encoding")
+        respuesta.headers["Cache-Control"] = CACHE_INMUTABLE
+        return respuesta
+
+
+if __name__ == "__main__":
+    import sys
+
+    try:
+        if "--vendorizar" in sys.argv:
+            vendorizar()
+        construir()
+    except AssetsError as e:
+        sys.exit(f"✘ {e}")
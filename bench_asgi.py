@@ -0,0 +1,175 @@
+# Compara el modo WSGI (gunicorn gthread) con el modo ASGI (uvicorn +
+# asgi.py) bajo la misma carga: N clientes concurrentes con keep-alive
+# pidiendo las páginas de lectura (dashboard, ranking, calendario, fecha,
+# mis pronósticos) sin ETag, o sea renderizando siempre.
+#
+# Cada servidor corre en un subproceso sobre una copia de la base, con la
+# misma cantidad de workers. Se mide requests/s, latencia p50/p99 y errores.
+#
+# Uso: python bench_asgi.py [clientes] [segundos] [workers] [hilos_wsgi]
+import asyncio
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+RUTAS = ["/dashboard", "/ranking", "/calendario", "/fecha/1", "/mis_pronosticos"]
+CARPETA_APP = os.path.dirname(os.path.abspath(__file__))
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def esperar_servidor(puerto, limite=30):
+    fin = time.time() + limite
+    while time.time() < fin:
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"el servidor no levantó en el puerto {puerto}")
+
+
+def cookie_sesion(path_db):
+    """Cookie de sesión firmada de un usuario real de la base."""
+    from app import app
+
+    conn = sqlite3.connect(path_db)
+    conn.row_factory = sqlite3.Row
+    user = conn.execute(
+        "SELECT id, nombre, avatar, admin FROM usuarios WHERE avatar IS NOT NULL LIMIT 1"
+    ).fetchone()
+    conn.close()
+
+    firma = app.session_interface.get_signing_serializer(app)
+    valor = firma.dumps({
+        "user_id": user["id"],
+        "user_name": user["nombre"],
+        "avatar": user["avatar"],
+        "admin": user["admin"],
+    })
+    return f'{app.config["SESSION_COOKIE_NAME"]}={valor}'
+
+
+async def cliente(puerto, cookie, fin, n, latencias, errores):
+    lector = escritor = None
+    i = n
+    while time.perf_counter() < fin:
+        ruta = RUTAS[i % len(RUTAS)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+            escritor.write(
+                f"GET {ruta} HTTP/1.1\r\nHost: bench\r\nCookie: {cookie}\r\n\r\n".encode()
+            )
+            await escritor.drain()
+
+            cabecera = await lector.readuntil(b"\r\n\r\n")
+            estado = int(cabecera.split(b" ", 2)[1])
+            largo = 0
+            cerrar = False
+            for linea in cabecera.lower().split(b"\r\n"):
+                if linea.startswith(b"content-length:"):
+                    largo = int(linea.split(b":")[1])
+                elif linea.startswith(b"connection:") and b"close" in linea:
+                    cerrar = True
+            await lector.readexactly(largo)
+            if cerrar:
+                escritor.close()
+                escritor = None
+
+            if estado != 200:
+                errores.append(estado)
+            else:
+                latencias.append(time.perf_counter() - inicio)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            errores.append(type(e).__name__)
+            if escritor is not None:
+                escritor.close()
+            escritor = None
+    if escritor is not None:
+        escritor.close()
+
+
+async def cargar(puerto, cookie, clientes, segundos):
+    latencias, errores = [], []
+    fin = time.perf_counter() + segundos
+    await asyncio.gather(*(
+        cliente(puerto, cookie, fin, n, latencias, errores) for n in range(clientes)
+    ))
+    return latencias, errores
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    hilos = int(sys.argv[4]) if len(sys.argv) > 4 else 8
+
+    carpeta = tempfile.mkdtemp()
+    path_db = os.path.join(carpeta, "prode.db")
+    shutil.copy(os.path.join(CARPETA_APP, "prode.db"), path_db)
+    os.environ["PRODE_DB"] = path_db
+    cookie = cookie_sesion(path_db)
+
+    modos = {
+        f"WSGI gunicorn gthread ({workers}w x {hilos}h)": [
+            sys.executable, "-m", "gunicorn", "app:app",
+            "-k", "gthread", "-w", str(workers), "--threads", str(hilos),
+        ],
+        f"ASGI uvicorn ({workers}w)": [
+            sys.executable, "-m", "uvicorn", "asgi:app",
+            "--workers", str(workers), "--no-access-log", "--log-level", "warning",
+        ],
+    }
+
+    print(f"{clientes} clientes, {segundos:.0f} s por modo, rutas: {', '.join(RUTAS)}")
+    try:
+        for nombre, comando in modos.items():
+            puerto = puerto_libre()
+            if comando[2] == "gunicorn":
+                comando = comando + ["-b", f"127.0.0.1:{puerto}"]
+            else:
+                comando = comando + ["--host", "127.0.0.1", "--port", str(puerto)]
+
+            servidor = subprocess.Popen(
+                comando, cwd=CARPETA_APP, env=os.environ,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                esperar_servidor(puerto)
+                # Calentar (plantillas, conexiones, cache del dashboard)
+                asyncio.run(cargar(puerto, cookie, 4, 1))
+                latencias, errores = asyncio.run(cargar(puerto, cookie, clientes, segundos))
+            finally:
+                servidor.terminate()
+                servidor.wait()
+
+            if not latencias:
+                print(f"  {nombre:34}: sin respuestas ({len(errores)} errores)")
+                continue
+            print(f"  {nombre:34}: {len(latencias) / segundos:7.0f} req/s  "
+                  f"p50 {percentil(latencias, 0.5) * 1000:6.1f} ms  "
+                  f"p99 {percentil(latencias, 0.99) * 1000:6.1f} ms  "
+                  f"{len(errores)} errores")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Benchmark de bcrypt para elegir BCRYPT_LOG_ROUNDS
+# Mide cuánto tarda un hash con cada costo en esta máquina y cuántos
+# logins por segundo aguanta el pool de hashing (HASH_HILOS).
+# Recomienda el costo más alto que queda por debajo del objetivo.
+#
+# Uso: python bench_bcrypt.py [objetivo_ms]   (por defecto 250 ms por login)
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+import config
+
+COSTOS = range(10, 15)
+PASSWORD = b"una-clave-de-prueba"
+
+
+def medir(costo, repeticiones=3):
+    sal = bcrypt.gensalt(rounds=costo)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        bcrypt.hashpw(PASSWORD, sal)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def logins_por_segundo(costo, hilos, cantidad=16):
+    hash_guardado = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds=costo))
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        inicio = time.perf_counter()
+        list(pool.map(lambda _: bcrypt.checkpw(PASSWORD, hash_guardado), range(cantidad)))
+    return cantidad / (time.perf_counter() - inicio)
+
+
+def main():
+    objetivo = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.25
+
+    print(f"Objetivo: {objetivo * 1000:.0f} ms por hash — "
+          f"actual BCRYPT_LOG_ROUNDS={config.BCRYPT_LOG_ROUNDS}, HASH_HILOS={config.HASH_HILOS}")
+
+    recomendado = COSTOS[0]
+    for costo in COSTOS:
+        t = medir(costo)
+        marca = "✔" if t <= objetivo else " "
+        print(f"{marca} costo {costo:2}: {t * 1000:8.1f} ms")
+        if t <= objetivo:
+            recomendado = costo
+        elif t > 4 * objetivo:
+            break
+
+    lps = logins_por_segundo(recomendado, config.HASH_HILOS)
+    print(f"\nRecomendado: PRODE_BCRYPT_ROUNDS={recomendado} "
+          f"(≈ {lps:.1f} logins/s por worker con {config.HASH_HILOS} hilos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Benchmark de envío de pronósticos con muchos usuarios a la vez
+# (simula los últimos minutos antes del cierre):
+#   - actual   : cada request hace SELECT + INSERT/UPDATE + commit en su conexión
+#   - agrupado : los requests encolan en el escritor agrupado (un commit por lote)
+# Mide pronósticos por segundo y cuántos terminan en "database is locked".
+#
+# Uso: python bench_pronosticos.py [hilos] [envios_por_hilo]
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import migraciones
+from escritor import EscritorAgrupado
+from pronosticos import guardar_pronostico
+
+PILOTOS = list(range(1, 21))
+TIMEOUT = 5
+
+
+def crear_base(path, usuarios):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migraciones.migrar(conn)
+    conn.executemany(
+        "INSERT INTO pilotos (id, nombre) VALUES (?, ?)",
+        [(p, f"Piloto {p}") for p in PILOTOS],
+    )
+    conn.execute("INSERT INTO carreras (id, pais, sprint) VALUES (1, 'Test', 1)")
+    conn.executemany(
+        "INSERT INTO usuarios (id, nombre, email, password) VALUES (?, ?, ?, '')",
+        [(u, f"usuario{u}", f"usuario{u}@prode") for u in range(1, usuarios + 1)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def envio():
+    pole, sprint, p1, p2, p3 = random.sample(PILOTOS, 5)
+    return pole, sprint, p1, p2, p3
+
+
+def conexion_request(path, synchronous):
+    conn = sqlite3.connect(path, timeout=TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    conn.execute(f"PRAGMA busy_timeout = {TIMEOUT * 1000}")
+    return conn
+
+
+def camino_actual(path, synchronous):
+    """Lo que hacía pronostico_carrera: SELECT, INSERT o UPDATE, commit."""
+    def enviar(user_id):
+        conn = conexion_request(path, synchronous)
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT id FROM pronosticos WHERE user_id = ? AND carrera_id = 1", (user_id,)
+            )
+            existente = cur.fetchone()
+            pole, sprint, p1, p2, p3 = envio()
+            if existente:
+                cur.execute("""
+                    UPDATE pronosticos
+                    SET pole = ?, sprint_ganador = ?, p1 = ?, p2 = ?, p3 = ?, pendiente = 1
+                    WHERE id = ?
+                """, (pole, sprint, p1, p2, p3, existente[0]))
+            else:
+                cur.execute("""
+                    INSERT INTO pronosticos (user_id, carrera_id, pole, sprint_ganador, p1, p2, p3)
+                    VALUES (?, 1, ?, ?, ?, ?, ?)
+                """, (user_id, pole, sprint, p1, p2, p3))
+            cur.execute(
+                "UPDATE usuarios SET version_pronosticos = version_pronosticos + 1 WHERE id = ?",
+                (user_id,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    return enviar
+
+
+def camino_agrupado(escritor):
+    def enviar(user_id):
+        escritor.ejecutar(guardar_pronostico, user_id, 1, *envio())
+    return enviar
+
+
+def correr(enviar, hilos, por_hilo):
+    errores = []
+
+    def trabajador(n):
+        for i in range(por_hilo):
+            try:
+                enviar(n * por_hilo + i + 1)
+            except sqlite3.OperationalError as e:
+                errores.append(str(e))
+
+    ts = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    inicio = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return time.perf_counter() - inicio, errores
+
+
+def main():
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    por_hilo = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    total = hilos * por_hilo
+    random.seed(2026)
+
+    print(f"{total} envíos desde {hilos} hilos")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        for nombre, agrupado, synchronous in (
+            ("actual (synchronous=NORMAL)", False, "NORMAL"),
+            ("actual (synchronous=FULL)", False, "FULL"),
+            ("agrupado (synchronous=FULL)", True, "FULL"),
+        ):
+            path = os.path.join(carpeta, f"{synchronous}-{agrupado}.db")
+            crear_base(path, total)
+
+            if agrupado:
+                escritor = EscritorAgrupado(path)
+                enviar = camino_agrupado(escritor)
+            else:
+                enviar = camino_actual(path, synchronous)
+            duracion, errores = correr(enviar, hilos, por_hilo)
+
+            conn = sqlite3.connect(path)
+            guardados = conn.execute("SELECT COUNT(*) FROM pronosticos").fetchone()[0]
+            conn.close()
+            assert guardados == total - len(errores)
+
+            extra = f"  lote promedio {escritor.estadisticas()['promedio_lote']}" if agrupado else ""
+            print(f"  {nombre:28}: {total / duracion:8.0f} envíos/s  "
+                  f"{len(errores):4} bloqueados{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Benchmark del cálculo de puntos: fila por fila vs. UPDATE único
+# (los dos caminos incluyen la actualización de la tabla de posiciones)
+# Uso: python bench_puntos.py [cantidad_pronosticos]
+import random
+import sqlite3
+import sys
+import time
+
+import migraciones
+import posiciones
+from puntos import calcular_puntos, puntuar_carrera
+
+# Ids de piloto (pronosticos y resultados guardan ids, no nombres)
+PILOTOS = list(range(1, 21))
+
+
+def crear_base(cantidad, sprint):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+
+    migraciones.migrar(conn)
+
+    podio = random.sample(PILOTOS, 3)
+    cur.execute("""
+        INSERT INTO resultados (carrera_id, pole, sprint_ganador, p1, p2, p3)
+        VALUES (1, ?, ?, ?, ?, ?)
+    """, (random.choice(PILOTOS), random.choice(PILOTOS) if sprint else None, *podio))
+
+    filas = []
+    for user_id in range(1, cantidad + 1):
+        p1, p2, p3 = random.sample(PILOTOS, 3)
+        filas.append((
+            user_id,
+            random.choice(PILOTOS),
+            random.choice(PILOTOS) if sprint else None,
+            p1, p2, p3,
+        ))
+
+    cur.executemany("""
+        INSERT INTO pronosticos (user_id, carrera_id, pole, sprint_ganador, p1, p2, p3)
+        VALUES (?, 1, ?, ?, ?, ?, ?)
+    """, filas)
+    cur.executemany(
+        "INSERT INTO usuarios (id, nombre, email, password) VALUES (?, ?, ?, '')",
+        [(u, f"usuario{u}", f"usuario{u}@prode") for u in range(1, cantidad + 1)],
+    )
+    conn.commit()
+    posiciones.reconstruir(conn)
+    return conn
+
+
+def puntuar_fila_por_fila(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM resultados WHERE carrera_id = 1")
+    resultado = cur.fetchone()
+
+    cur.execute("SELECT * FROM pronosticos WHERE carrera_id = 1")
+    for p in cur.fetchall():
+        cur.execute(
+            "UPDATE pronosticos SET puntos = ? WHERE id = ?",
+            (calcular_puntos(p, resultado), p["id"]),
+        )
+    posiciones.actualizar_carrera(conn, 1)
+    conn.commit()
+
+
+def puntos_actuales(conn):
+    return conn.execute("SELECT id, puntos FROM pronosticos ORDER BY id").fetchall()
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(2026)
+
+    for sprint in (False, True):
+        conn = crear_base(cantidad, sprint)
+
+        t0 = time.perf_counter()
+        puntuar_fila_por_fila(conn)
+        t_filas = time.perf_counter() - t0
+        esperado = [tuple(r) for r in puntos_actuales(conn)]
+
+        conn.execute("UPDATE pronosticos SET puntos = 0")
+        conn.commit()
+
+        t0 = time.perf_counter()
+        puntuar_carrera(conn, 1)
+        t_set = time.perf_counter() - t0
+        obtenido = [tuple(r) for r in puntos_actuales(conn)]
+
+        assert obtenido == esperado, "los puntos no coinciden"
+
+        # Re-puntuar sin cambios no debería escribir nada
+        t0 = time.perf_counter()
+        escritos = puntuar_carrera(conn, 1)
+        t_rerun = time.perf_counter() - t0
+        assert escritos == 0
+
+        print(f"{cantidad} pronósticos (sprint={sprint})")
+        print(f"  fila por fila : {t_filas:.3f}s")
+        print(f"  UPDATE único  : {t_set:.3f}s  ({t_filas / t_set:.1f}x)")
+        print(f"  re-puntuar    : {t_rerun:.3f}s  (sin cambios, {escritos} filas escritas)")
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+# Prueba de carga de una semana de carrera completa contra un servidor
+# local (gunicorn con gunicorn.conf.py, sobre una copia de la base):
+#
+#   1. Alta de usuarios por /register y login por /login (como un usuario).
+#   2. Ventana de pronósticos: cada usuario navega con una mezcla pesada de
+#      páginas (dashboard, ranking, fecha, formulario de pronóstico) y en
+#      algún momento manda su pronóstico. La ráfaga es configurable: por
+#      defecto el 80% de los usuarios lo manda en los últimos 10 minutos.
+#   3. Después del cierre el admin carga el resultado y calcula los puntos
+#      mientras los usuarios miran el ranking y la fecha.
+#
+# La ventana simulada (--ventana minutos) se comprime en --duracion
+# segundos. Al final se informa throughput y p50/p95/p99 por ruta, los
+# errores HTTP y cuántos "database is locked" quedaron en el log del
+# servidor.
+#
+# Cada usuario sale de una IP de loopback distinta (127.0.0.x) para que el
+# límite de intentos de login por IP no confunda la prueba.
+#
+# Uso: python bench_semana.py [--usuarios 200] [--duracion 60] [--ventana 60]
+#                             [--rafaga 0.8:10] [--espera 1.0] [--workers 2]
+#                             [--costo-bcrypt 4]
+import argparse
+import http.client
+import os
+import random
+import re
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+CARPETA_APP = os.path.dirname(os.path.abspath(__file__))
+
+# Mezcla de páginas mientras el pronóstico está abierto, y después de la carrera
+MEZCLA_SEMANA = {"dashboard": 40, "ranking": 20, "fecha": 15, "pronostico": 25}
+MEZCLA_CARRERA = {"ranking": 50, "fecha": 30, "dashboard": 20}
+
+# Fracción de --duracion que dura la parte posterior a la carrera
+FRACCION_POST_CARRERA = 0.2
+
+
+# -------- CLIENTE HTTP --------
+class Navegador:
+    """Un usuario: conexión keep-alive propia, cookies y su IP de origen."""
+
+    def __init__(self, puerto, ip, metricas):
+        self.puerto = puerto
+        self.ip = ip
+        self.metricas = metricas
+        self.cookies = {}
+        self.conn = None
+
+    def _conectar(self):
+        origen = (self.ip, 0) if self.ip else None
+        self.conn = http.client.HTTPConnection(
+            "127.0.0.1", self.puerto, timeout=60, source_address=origen
+        )
+
+    def pedir(self, metodo, ruta, etiqueta, form=None):
+        """(estado, cuerpo). Reintenta una vez si el servidor cerró el keep-alive."""
+        cuerpo = urlencode(form).encode() if form is not None else None
+        cabeceras = {"Cookie": "; ".join(f"{k}={v}" for k, v in self.cookies.items())}
+        if cuerpo is not None:
+            cabeceras["Content-Type"] = "application/x-www-form-urlencoded"
+
+        inicio = time.perf_counter()
+        for intento in range(2):
+            try:
+                if self.conn is None:
+                    self._conectar()
+                self.conn.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+                respuesta = self.conn.getresponse()
+                datos = respuesta.read()
+                break
+            except (http.client.HTTPException, OSError):
+                if self.conn is not None:
+                    self.conn.close()
+                self.conn = None
+                if intento == 1:
+                    self.metricas.registrar(etiqueta, time.perf_counter() - inicio, None)
+                    return None, b""
+
+        for valor in respuesta.headers.get_all("Set-Cookie") or []:
+            nombre, _, resto = valor.partition("=")
+            contenido = resto.split(";", 1)[0]
+            if "expires=Thu, 01 Jan 1970" in valor or not contenido:
+                self.cookies.pop(nombre, None)
+            else:
+                self.cookies[nombre] = contenido
+
+        self.metricas.registrar(etiqueta, time.perf_counter() - inicio, respuesta.status)
+        return respuesta.status, datos
+
+    def cerrar(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiempos = defaultdict(list)
+        self.errores = defaultdict(lambda: defaultdict(int))
+
+    def registrar(self, etiqueta, segundos, estado):
+        with self._lock:
+            if estado is not None and estado < 400:
+                self.tiempos[etiqueta].append(segundos)
+            else:
+                self.errores[etiqueta][estado or "conexión"] += 1
+
+
+# -------- PREPARACIÓN --------
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def ips_de_loopback(cantidad):
+    """127.0.0.x distintas si el sistema las acepta (Linux); si no, la default."""
+    try:
+        with socket.socket() as s:
+            s.bind(("127.0.0.2", 0))
+    except OSError:
+        return [None] * cantidad
+    return [f"127.0.{2 + i // 250}.{2 + i % 250}" for i in range(cantidad)]
+
+
+def preparar_base(path):
+    """Deja una carrera abierta a pronósticos: la de la semana simulada."""
+    conn = sqlite3.connect(path)
+    carrera_id, sprint = conn.execute(
+        "SELECT id, sprint FROM carreras ORDER BY id LIMIT 1"
+    ).fetchone()
+    limite = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%dT%H:%M")
+    conn.execute("UPDATE carreras SET status = 'futura' WHERE status = 'iniciada'")
+    conn.execute("""
+        UPDATE carreras
+        SET status = 'iniciada', clasificacion_iniciada = 0, fecha_limite_pronostico = ?
+        WHERE id = ?
+    """, (limite, carrera_id))
+    conn.commit()
+    conn.close()
+    return carrera_id, bool(sprint)
+
+
+def hacer_admin(path, email):
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE usuarios SET admin = 1 WHERE email = ?", (email,))
+    conn.commit()
+    conn.close()
+
+
+def levantar_servidor(path_db, puerto, workers, costo_bcrypt, log):
+    env = dict(os.environ, PRODE_DB=path_db, PRODE_BIND=f"127.0.0.1:{puerto}",
+               PRODE_WORKERS=str(workers))
+    if costo_bcrypt:
+        env["PRODE_BCRYPT_ROUNDS"] = str(costo_bcrypt)
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=CARPETA_APP, env=env, stdout=log, stderr=log,
+    )
+    fin = time.time() + 30
+    while time.time() < fin:
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=1).close()
+            return servidor
+        except OSError:
+            time.sleep(0.2)
+    servidor.terminate()
+    raise RuntimeError("el servidor no levantó (ver el log)")
+
+
+# -------- USUARIOS --------
+def alta_y_login(navegador, n, prefijo):
+    email = f"{prefijo}{n}@carga.prode"
+    navegador.pedir("POST", "/register", "POST /register", {
+        "nombre": f"Carga {n}", "email": email,
+        "password": "carga123", "password2": "carga123",
+    })
+    estado, _ = navegador.pedir("POST", "/login", "POST /login", {
+        "email": email, "password": "carga123",
+    })
+    return estado == 302
+
+
+def pilotos_del_formulario(html):
+    return [int(v) for v in re.findall(rb'<option value="(\d+)"', html)]
+
+
+def mandar_pronostico(navegador, carrera_id, sprint):
+    estado, html = navegador.pedir(
+        "GET", f"/pronostico/{carrera_id}", "GET /pronostico"
+    )
+    if estado != 200:
+        return
+    clave = re.search(rb'name="clave" value="([^"]+)"', html)
+    pilotos = sorted(set(pilotos_del_formulario(html)))
+    if len(pilotos) < 5:
+        return
+
+    elegidos = random.sample(pilotos, 5)
+    form = {"pole": elegidos[0], "p1": elegidos[1], "p2": elegidos[2], "p3": elegidos[3]}
+    if sprint:
+        form["sprint_ganador"] = elegidos[4]
+    if clave:
+        form["clave"] = clave.group(1).decode()
+    navegador.pedir("POST", f"/pronostico/{carrera_id}", "POST /pronostico", form)
+
+
+def navegar(navegador, mezcla, carrera_id):
+    pagina = random.choices(list(mezcla), weights=list(mezcla.values()))[0]
+    if pagina == "dashboard":
+        navegador.pedir("GET", "/dashboard", "GET /dashboard")
+    elif pagina == "ranking":
+        navegador.pedir("GET", "/ranking", "GET /ranking")
+    elif pagina == "fecha":
+        navegador.pedir("GET", f"/fecha/{carrera_id}", "GET /fecha")
+    else:
+        # Mirar el formulario sin mandar nada
+        navegador.pedir("GET", f"/pronostico/{carrera_id}", "GET /pronostico")
+
+
+def usuario(navegador, carrera_id, sprint, momento_envio, fin_ventana, fin_total, espera):
+    enviado = False
+    while time.perf_counter() < fin_total:
+        ahora = time.perf_counter()
+        if not enviado and ahora >= momento_envio:
+            mandar_pronostico(navegador, carrera_id, sprint)
+            enviado = True
+        else:
+            mezcla = MEZCLA_SEMANA if ahora < fin_ventana else MEZCLA_CARRERA
+            navegar(navegador, mezcla, carrera_id)
+
+        pausa = random.expovariate(1 / espera) if espera > 0 else 0
+        siguiente = time.perf_counter() + pausa
+        if not enviado:
+            siguiente = min(siguiente, max(momento_envio, time.perf_counter()))
+        time.sleep(max(0, siguiente - time.perf_counter()))
+
+
+def admin(navegador, carrera_id, sprint, fin_ventana):
+    """Al cierre: cargar el resultado oficial y calcular los puntos."""
+    time.sleep(max(0, fin_ventana - time.perf_counter()))
+    estado, html = navegador.pedir(
+        "GET", f"/admin/resultados/{carrera_id}", "GET /admin/resultados"
+    )
+    pilotos = sorted(set(pilotos_del_formulario(html)))
+    if estado != 200 or len(pilotos) < 5:
+        return
+    podio = random.sample(pilotos, 5)
+    navegador.pedir("POST", f"/admin/resultados/{carrera_id}", "POST /admin/resultados", {
+        "pole": podio[0], "sprint": podio[4] if sprint else "",
+        "p1": podio[1], "p2": podio[2], "p3": podio[3],
+    })
+    navegador.pedir(
+        "GET", f"/admin/calcular_puntos/{carrera_id}", "GET /admin/calcular_puntos"
+    )
+
+
+def momentos_de_envio(cantidad, inicio, duracion_ventana, fraccion, ultimos):
+    """`fraccion` de los usuarios manda en los últimos `ultimos` (fracción de la ventana)."""
+    corte = inicio + duracion_ventana * (1 - ultimos)
+    momentos = []
+    for _ in range(cantidad):
+        if random.random() < fraccion:
+            momentos.append(random.uniform(corte, inicio + duracion_ventana))
+        else:
+            momentos.append(random.uniform(inicio, corte))
+    return momentos
+
+
+# -------- REPORTE --------
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def reporte(titulo, metricas, segundos):
+    print(f"\n{titulo}\n{'ruta':28} {'ok':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8}  errores")
+    etiquetas = sorted(set(metricas.tiempos) | set(metricas.errores))
+    for etiqueta in etiquetas:
+        tiempos = metricas.tiempos.get(etiqueta, [])
+        errores = metricas.errores.get(etiqueta, {})
+        texto_errores = ", ".join(f"{k}: {v}" for k, v in errores.items()) or "-"
+        if tiempos:
+            print(f"{etiqueta:28} {len(tiempos):6} {len(tiempos) / segundos:7.1f} "
+                  f"{percentil(tiempos, 0.5) * 1000:8.1f} "
+                  f"{percentil(tiempos, 0.95) * 1000:8.1f} "
+                  f"{percentil(tiempos, 0.99) * 1000:8.1f}  {texto_errores}")
+        else:
+            print(f"{etiqueta:28} {0:6} {'':>7} {'':>8} {'':>8} {'':>8}  {texto_errores}")
+
+    total = sum(len(t) for t in metricas.tiempos.values())
+    print(f"Total: {total} requests ok en {segundos:.1f} s ({total / segundos:.1f} req/s)")
+
+
+def reporte_servidor(log_servidor):
+    with open(log_servidor, encoding="utf-8", errors="replace") as f:
+        log = f.read()
+    print()
+    print(f"'database is locked' en el log del servidor: {log.count('database is locked')}")
+    print(f"Errores 500 en el log del servidor: {log.count('Exception on ')}")
+
+
+# -------- MAIN --------
+def main():
+    parser = argparse.ArgumentParser(description="Carga de una semana de carrera")
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--duracion", type=float, default=60,
+                        help="segundos reales que dura la ventana de pronósticos")
+    parser.add_argument("--ventana", type=float, default=60,
+                        help="minutos simulados que representa esa ventana")
+    parser.add_argument("--rafaga", default="0.8:10",
+                        help="fracción:minutos, p.ej. 0.8:10 = el 80%% manda en los últimos 10 min")
+    parser.add_argument("--espera", type=float, default=1.0,
+                        help="pausa media entre requests de un usuario (0 = sin pausa)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--costo-bcrypt", type=int, default=None,
+                        help="costo de bcrypt del servidor (bajarlo acelera el alta)")
+    parser.add_argument("--semilla", type=int, default=2026)
+    args = parser.parse_args()
+
+    fraccion, minutos = args.rafaga.split(":")
+    fraccion, ultimos = float(fraccion), min(1.0, float(minutos) / args.ventana)
+    random.seed(args.semilla)
+
+    carpeta = tempfile.mkdtemp()
+    path_db = os.path.join(carpeta, "prode.db")
+    shutil.copy(os.path.join(CARPETA_APP, "prode.db"), path_db)
+    carrera_id, sprint = preparar_base(path_db)
+    log_servidor = os.path.join(carpeta, "servidor.log")
+    prefijo = f"u{int(time.time())}_"
+
+    puerto = puerto_libre()
+    with open(log_servidor, "w") as log:
+        servidor = levantar_servidor(path_db, puerto, args.workers, args.costo_bcrypt, log)
+
+    metricas_alta, metricas = Metricas(), Metricas()
+    ips = ips_de_loopback(args.usuarios + 1)
+    try:
+        # 1. Alta y login, con un admin aparte
+        print(f"Alta y login de {args.usuarios} usuarios...")
+        inicio = time.perf_counter()
+        jefe = Navegador(puerto, ips[-1], metricas_alta)
+        alta_y_login(jefe, "admin", prefijo)
+        hacer_admin(path_db, f"{prefijo}admin@carga.prode")
+        jefe.pedir("POST", "/login", "POST /login", {
+            "email": f"{prefijo}admin@carga.prode", "password": "carga123",
+        })
+
+        navegadores = [Navegador(puerto, ips[n], metricas_alta) for n in range(args.usuarios)]
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            logueados = sum(pool.map(
+                lambda n: alta_y_login(navegadores[n], n, prefijo), range(args.usuarios)
+            ))
+        segundos_alta = time.perf_counter() - inicio
+        print(f"  {logueados}/{args.usuarios} logueados en {segundos_alta:.1f} s")
+        for nav in navegadores + [jefe]:
+            nav.metricas = metricas
+
+        # 2 y 3. Semana de carrera comprimida + después de la carrera
+        print(f"Semana de carrera: {args.ventana:.0f} min simulados en {args.duracion:.0f} s, "
+              f"{fraccion:.0%} de los envíos en los últimos {float(minutos):.0f} min")
+        inicio = time.perf_counter()
+        fin_ventana = inicio + args.duracion
+        fin_total = fin_ventana + args.duracion * FRACCION_POST_CARRERA
+        momentos = momentos_de_envio(args.usuarios, inicio, args.duracion, fraccion, ultimos)
+
+        hilos = [
+            threading.Thread(target=usuario, args=(
+                nav, carrera_id, sprint, momento, fin_ventana, fin_total, args.espera,
+            ))
+            for nav, momento in zip(navegadores, momentos)
+        ]
+        hilos.append(threading.Thread(target=admin, args=(jefe, carrera_id, sprint, fin_ventana)))
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        for nav in navegadores + [jefe]:
+            nav.cerrar()
+        reporte("Alta y login", metricas_alta, segundos_alta)
+        reporte("Semana de carrera", metricas, time.perf_counter() - inicio)
+        reporte_servidor(log_servidor)
+
+        conn = sqlite3.connect(path_db)
+        guardados = conn.execute(
+            "SELECT COUNT(*) FROM pronosticos WHERE carrera_id = ? AND user_id IN "
+            "(SELECT id FROM usuarios WHERE email LIKE ?)",
+            (carrera_id, f"{prefijo}%"),
+        ).fetchone()[0]
+        conn.close()
+        print(f"Pronósticos guardados: {guardados}/{logueados}")
+    finally:
+        servidor.terminate()
+        servidor.wait()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# Prueba de carga de /stream: muchos oyentes SSE (y algunos por long-poll)
+# contra un worker, un cambio de puntos, y cuánto tarda en llegarles a
+# todos. Mientras las conexiones siguen abiertas se piden páginas comunes:
+# tienen que seguir respondiendo, porque los oyentes no pueden ocupar más
+# de STREAM_MAX_OYENTES hilos del worker.
+#
+# Corre la app sobre una copia de la base, con un servidor que atiende con
+# un pool fijo de config.HILOS hilos, como un worker de gunicorn gthread.
+#
+# Uso: python bench_stream.py [oyentes_sse] [oyentes_poll] [tope]
+#   tope: pisa STREAM_MAX_OYENTES (con un tope >= hilos se ve cómo las
+#   páginas se quedan sin hilos)
+import http.client
+import logging
+import os
+import queue
+import selectors
+import shutil
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Páginas que se piden con los oyentes conectados
+PAGINAS = ["/ranking", "/calendario", "/dashboard"]
+VUELTAS = 5
+# Más que esto para una página es que no había hilo libre
+ESPERA_PAGINA = 5
+
+
+def memoria_kb():
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith("VmRSS:"):
+                return int(linea.split()[1])
+    return 0
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def status(buffer):
+    """Status de la respuesta (0 si todavía no llegó nada)."""
+    partes = buffer.split(b" ", 2)
+    return int(partes[1]) if len(partes) > 2 else 0
+
+
+def servidor_gthread(app, hilos):
+    """Servidor de Werkzeug con un pool fijo de hilos (no uno por conexión)."""
+    from werkzeug.serving import BaseWSGIServer
+
+    class Servidor(BaseWSGIServer):
+        def __init__(self):
+            super().__init__("127.0.0.1", 0, app)
+            # Las conexiones esperan en la cola hasta que se libere un hilo
+            self._pendientes = queue.Queue()
+            for _ in range(hilos):
+                threading.Thread(target=self._atender, daemon=True).start()
+
+        def process_request(self, request, client_address):
+            self._pendientes.put((request, client_address))
+
+        def _atender(self):
+            while True:
+                request, client_address = self._pendientes.get()
+                try:
+                    self.finish_request(request, client_address)
+                except Exception:
+                    self.handle_error(request, client_address)
+                finally:
+                    self.shutdown_request(request)
+
+    return Servidor()
+
+
+def pedir_paginas(puerto, cookie):
+    """ms de cada página (None y corta si una no respondió a tiempo) y status distintos de 200."""
+    tiempos, errores = [], []
+    for ruta in PAGINAS * VUELTAS:
+        inicio = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", puerto, timeout=ESPERA_PAGINA)
+        try:
+            conn.request("GET", ruta, headers={"Cookie": cookie})
+            respuesta = conn.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(f"{ruta} {respuesta.status}")
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        except (socket.timeout, TimeoutError):
+            # Sin hilo libre: las que siguen esperarían lo mismo
+            tiempos.append(None)
+            break
+        finally:
+            conn.close()
+    return tiempos, errores
+
+
+def main():
+    cantidad_sse = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    cantidad_poll = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    carpeta = tempfile.mkdtemp()
+    base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prode.db")
+    shutil.copy(base, os.path.join(carpeta, "prode.db"))
+    os.environ["PRODE_DB"] = os.path.join(carpeta, "prode.db")
+    if len(sys.argv) > 3:
+        os.environ["PRODE_STREAM_OYENTES"] = sys.argv[3]
+
+    # Recién ahora: config.py lee PRODE_DB al importarse
+    import cache
+    from app import app
+    from config import HILOS
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    servidor = servidor_gthread(app, HILOS)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    puerto = servidor.server_port
+    tope = app.config["STREAM_MAX_OYENTES"]
+    print(f"worker de {HILOS} hilos, tope de {tope} oyentes")
+
+    firma = app.session_interface.get_signing_serializer(app)
+    sesion = firma.dumps({"user_id": 1, "user_name": "bench", "avatar": ""})
+    cookie = f'{app.config["SESSION_COOKIE_NAME"]}={sesion}'
+    version, _ = app.extensions["prode_marca"].leer()
+
+    memoria_antes, hilos_antes = memoria_kb(), threading.active_count()
+
+    sel = selectors.DefaultSelector()
+    clientes = {}
+    for i in range(cantidad_sse + cantidad_poll):
+        ruta = "/stream" if i < cantidad_sse else "/stream/poll"
+        s = socket.create_connection(("127.0.0.1", puerto))
+        s.sendall(
+            f"GET {ruta}?desde={version} HTTP/1.1\r\nHost: x\r\nCookie: {cookie}\r\n\r\n".encode()
+        )
+        s.setblocking(False)
+        clientes[s] = {"buffer": b"", "llego": None, "tipo": ruta}
+        sel.register(s, selectors.EVENT_READ)
+
+    # Que se atiendan todos los pedidos (los que pasan el tope se
+    # responden enseguida)
+    time.sleep(1 + (cantidad_sse + cantidad_poll) / 500)
+    for s, c in clientes.items():
+        try:
+            c["buffer"] += s.recv(65536)
+        except BlockingIOError:
+            pass
+
+    difusor = app.extensions["prode_difusor"]
+    sse = [status(c["buffer"]) for c in clientes.values() if c["tipo"] == "/stream"]
+    poll = [status(c["buffer"]) for c in clientes.values() if c["tipo"] == "/stream/poll"]
+    poll_esperando = difusor.oyentes - sse.count(200)
+    print(f"/stream: {sse.count(200)} abiertos, {sse.count(503)} con 503 (pasan a "
+          f"long-poll), {sse.count(0)} sin atender")
+    print(f"/stream/poll: {poll_esperando} esperando, {len(poll) - poll.count(0)} "
+          f"contestados al toque con Retry-After, {poll.count(0) - poll_esperando} sin atender")
+    print(f"  oyentes en el difusor: {difusor.oyentes}, rechazados: {difusor.rechazados}")
+    print(f"  memoria: +{(memoria_kb() - memoria_antes) / 1024:.1f} MB, "
+          f"hilos: +{threading.active_count() - hilos_antes}")
+
+    # Con los oyentes conectados, las páginas tienen que seguir andando
+    paginas, errores = pedir_paginas(puerto, cookie)
+    respondieron = [t for t in paginas if t is not None]
+    if respondieron:
+        print(f"  páginas con los oyentes conectados: {len(respondieron)}/{len(paginas)} "
+              f"respondieron — p50 {percentil(respondieron, 0.5):.0f} ms, "
+              f"máx {max(respondieron):.0f} ms")
+    else:
+        print(f"  páginas con los oyentes conectados: 0/{len(paginas)} respondieron "
+              f"en {ESPERA_PAGINA} s (sin hilos libres)")
+    for error in errores:
+        print(f"  ✘ {error}")
+
+    # Un cambio en el ranking, publicado como lo haría un request de admin
+    conn = sqlite3.connect(app.config["DATABASE"])
+    conn.execute("UPDATE posiciones SET puntos = puntos + 1 WHERE user_id = "
+                 "(SELECT user_id FROM posiciones ORDER BY posicion LIMIT 1)")
+    cache.datos_modificados(conn)
+    conn.commit()
+    inicio = time.perf_counter()
+    cache.publicar_version(conn, app.config["MARCA_VERSION"])
+    conn.close()
+
+    # Solo esperan el evento los que siguen conectados
+    esperando = {
+        s: c for s, c in clientes.items()
+        if status(c["buffer"]) in (0, 200)
+    }
+    pendientes = len(esperando)
+    limite = time.perf_counter() + 10
+    while pendientes and time.perf_counter() < limite:
+        for clave, _ in sel.select(timeout=0.5):
+            c = esperando.get(clave.fileobj)
+            if c is None:
+                continue
+            try:
+                datos = clave.fileobj.recv(65536)
+            except BlockingIOError:
+                continue
+            c["buffer"] += datos
+            if c["llego"] is None and (
+                b"event: posiciones" in c["buffer"] or b'"datos":' in c["buffer"]
+            ):
+                c["llego"] = time.perf_counter() - inicio
+                pendientes -= 1
+
+    for tipo in ("/stream", "/stream/poll"):
+        tiempos = [c["llego"] for c in esperando.values() if c["tipo"] == tipo and c["llego"]]
+        total = sum(1 for c in esperando.values() if c["tipo"] == tipo)
+        if not total:
+            continue
+        if tiempos:
+            print(f"  {tipo:13}: {len(tiempos)}/{total} conectados recibieron el evento — "
+                  f"p50 {percentil(tiempos, 0.5) * 1000:.0f} ms, "
+                  f"p99 {percentil(tiempos, 0.99) * 1000:.0f} ms, "
+                  f"máx {max(tiempos) * 1000:.0f} ms")
+        else:
+            print(f"  {tipo:13}: 0/{total} conectados recibieron el evento")
+
+    print(f"  eventos armados: 1 por worker (difusor), entregados: {difusor.enviados}")
+
+    for s in clientes:
+        s.close()
+    servidor.shutdown()
+    shutil.rmtree(carpeta, ignore_errors=True)
+    if errores or len(respondieron) < len(paginas):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
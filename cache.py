@@ -0,0 +1,123 @@
+# -------- VERSIÓN DE DATOS Y CACHE EN MEMORIA --------
+# version_datos es un contador global en la base que se incrementa con
+# cada escritura de admin (carreras, resultados, pilotos, usuarios,
+# puntajes). Como vive en SQLite lo ven todos los workers; cada worker
+# guarda en memoria lo que calculó para una versión y lo reusa mientras
+# la versión no cambie. La tabla la crea migraciones.py.
+#
+# Además la versión se publica en un archivo "marca" (config.MARCA_VERSION)
+# después del commit. Las respuestas condicionales (ETag / 304) leen ese
+# archivo, así un 304 no toca SQLite.
+import os
+import threading
+
+from flask import current_app, g, has_app_context
+
+
+SQL_VERSION_DATOS = "SELECT version FROM version_datos WHERE id = 1"
+
+
+def version_actual(conn):
+    return conn.execute(SQL_VERSION_DATOS).fetchone()[0]
+
+
+def datos_modificados(conn):
+    """Llamar dentro de la transacción de cualquier escritura de admin."""
+    conn.execute("UPDATE version_datos SET version = version + 1 WHERE id = 1")
+    if has_app_context():
+        g.datos_modificados = True
+
+
+# -------- MARCA DE VERSIÓN EN ARCHIVO --------
+def publicar_version(conn, path):
+    """Escribe la versión comprometida en el archivo marca (atómico)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(version_actual(conn)))
+    os.replace(tmp, path)
+
+
+class Marca:
+    """Lee la versión publicada; solo relee el archivo si cambió su mtime."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def leer(self):
+        """(version, mtime en segundos)"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None, None
+
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    self._version = f.read().strip()
+                self._mtime = mtime
+            return self._version, mtime / 1e9
+
+
+def init_app(app, conn):
+    """
+    Publica la versión al arrancar y después de cada request que escribió.
+    Llamar después de db.init_app: los teardown corren en orden inverso,
+    así la conexión del request sigue disponible acá.
+    """
+    path = app.config["MARCA_VERSION"]
+    app.extensions["prode_marca"] = Marca(path)
+    publicar_version(conn, path)
+
+    @app.teardown_appcontext
+    def publicar_si_cambio(exc=None):
+        conn = g.get("db")
+        if g.pop("datos_modificados", False) and conn is not None:
+            publicar_version(conn, path)
+
+
+def marca():
+    return current_app.extensions["prode_marca"]
+
+
+class CacheVersionado:
+    """Un valor por clave, válido mientras no cambie la versión de datos."""
+
+    def __init__(self):
+        self._valores = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _buscar(self, clave, version):
+        with self._lock:
+            guardado = self._valores.get(clave)
+        if guardado is not None and guardado[0] == version:
+            self.aciertos += 1
+            return True, guardado[1]
+        self.fallos += 1
+        return False, None
+
+    def _guardar(self, clave, version, valor):
+        with self._lock:
+            self._valores[clave] = (version, valor)
+        return valor
+
+    def obtener(self, clave, version, calcular):
+        hay, valor = self._buscar(clave, version)
+        if hay:
+            return valor
+        return self._guardar(clave, version, calcular())
+
+    async def obtener_async(self, clave, version, calcular):
+        """Como obtener, pero calcular es una corrutina (vistas de asgi.py)."""
+        hay, valor = self._buscar(clave, version)
+        if hay:
+            return valor
+        return self._guardar(clave, version, await calcular())
+
+    def limpiar(self):
+        with self._lock:
+            self._valores.clear()
@@ -0,0 +1,79 @@
+# -------- CATÁLOGO DE PILOTOS EN MEMORIA --------
+# pronosticos y resultados guardan ids de piloto; los nombres se resuelven
+# recién al renderizar, desde este mapa. Se recalcula solo cuando cambia
+# la versión de datos (editar un piloto la incrementa) y se lee una vez
+# por request.
+from flask import abort, g
+
+import cache
+from db import get_db
+
+cache_pilotos = cache.CacheVersionado()
+
+
+SQL_PILOTOS = """
+    SELECT id, nombre, equipo, nacionalidad, dorsal
+    FROM pilotos
+    ORDER BY nombre
+"""
+
+
+def cargar_pilotos(cur):
+    cur.execute(SQL_PILOTOS)
+    return armar(cur.fetchall())
+
+
+def armar(lista):
+    """Catálogo a partir de las filas de SQL_PILOTOS (también las de aiosqlite)."""
+    return {
+        "lista": lista,
+        "nombres": {p["id"]: p["nombre"] for p in lista},
+    }
+
+
+def pilotos():
+    if "pilotos" not in g:
+        conn = get_db()
+        g.pilotos = cache_pilotos.obtener(
+            "pilotos",
+            cache.version_actual(conn),
+            lambda: cargar_pilotos(conn.cursor()),
+        )
+    return g.pilotos
+
+
+def nombre_piloto(piloto_id):
+    if piloto_id is None:
+        return ""
+    return pilotos()["nombres"].get(piloto_id, "?")
+
+
+def pilotos_del_form(form, campos):
+    """
+    Ids de piloto elegidos en los <select> de `campos`, validados en una
+    sola pasada contra el catálogo en memoria. None si quedó vacío.
+    """
+    nombres = pilotos()["nombres"]
+    elegidos = {}
+
+    for campo in campos:
+        valor = form.get(campo)
+        if not valor:
+            elegidos[campo] = None
+            continue
+
+        try:
+            piloto_id = int(valor)
+        except ValueError:
+            abort(400, "Piloto inválido")
+
+        if piloto_id not in nombres:
+            abort(400, "Piloto inválido")
+        elegidos[campo] = piloto_id
+
+    return elegidos
+
+
+def piloto_del_form(form, campo):
+    """Id de piloto elegido en un <select>; None si quedó vacío."""
+    return pilotos_del_form(form, (campo,))[campo]
@@ -0,0 +1,115 @@
+# -------- RESPUESTAS CONDICIONALES (ETag / Last-Modified) --------
+# Las páginas que solo cambian cuando un admin escribe se validan contra
+# la marca de versión. Si el navegador ya tiene la versión actual se
+# responde 304 sin consultar SQLite ni renderizar Jinja.
+#
+# El ETag incluye los datos de sesión que se ven en la barra (usuario,
+# avatar, admin), y Cache-Control es "private": la página es por usuario.
+#
+# El 304 sale solo del ETag. Last-Modified se manda igual, pero el mtime de
+# la marca tiene resolución de segundos: dos escrituras en el mismo segundo
+# darían un If-Modified-Since "al día" con contenido viejo.
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+
+import cache
+
+
+def _etag(partes):
+    return hashlib.sha1("|".join(str(p) for p in partes).encode()).hexdigest()[:20]
+
+
+def _validar(extra=None, con_extra=False, marca=None):
+    """
+    (etag, ultima modificación, no_cambio) para el request actual,
+    o None si todavía no hay marca publicada. marca: (version, mtime) ya
+    leídos (las vistas async la leen fuera del event loop).
+    """
+    version, modificado = marca or cache.marca().leer()
+    if version is None:
+        return None
+
+    partes = [
+        version,
+        request.full_path,
+        session.get("user_id"),
+        session.get("user_name"),
+        session.get("avatar"),
+        session.get("admin"),
+    ]
+    if con_extra:
+        partes.append(extra)
+    etag = _etag(partes)
+
+    ultima = datetime.fromtimestamp(int(modificado), tz=timezone.utc)
+    return etag, ultima, etag in request.if_none_match
+
+
+def _marcar(respuesta, etag, ultima, con_extra=False):
+    respuesta.set_etag(etag)
+    if not con_extra:
+        # Con una versión fuera de la marca, la fecha de la marca no sirve
+        respuesta.last_modified = ultima
+    respuesta.headers["Cache-Control"] = "private, no-cache"
+    return respuesta
+
+
+def condicional(extra=None):
+    """
+    Decorador para vistas GET.
+    extra: función opcional que devuelve un valor más para el ETag, para
+    datos que cambian sin tocar version_datos (la versión de los pronósticos
+    del usuario o de la carrera).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if request.method != "GET":
+                return vista(*args, **kwargs)
+
+            valor = extra() if extra is not None else None
+            validacion = _validar(valor, extra is not None)
+            if validacion is None:
+                return vista(*args, **kwargs)
+            etag, ultima, no_cambio = validacion
+
+            if no_cambio:
+                respuesta = make_response("", 304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+
+            return _marcar(respuesta, etag, ultima, extra is not None)
+
+        return envoltura
+    return decorador
+
+
+def condicional_async(extra=None):
+    """Igual que condicional, para las vistas async de asgi.py."""
+    def decorador(vista):
+        @wraps(vista)
+        async def envoltura(*args, **kwargs):
+            valor = await extra() if extra is not None else None
+            marca = await asyncio.to_thread(cache.marca().leer)
+            validacion = _validar(valor, extra is not None, marca)
+            if validacion is None:
+                return await vista(*args, **kwargs)
+            etag, ultima, no_cambio = validacion
+
+            if no_cambio:
+                respuesta = make_response("", 304)
+            else:
+                respuesta = make_response(await vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+
+            return _marcar(respuesta, etag, ultima, extra is not None)
+
+        return envoltura
+    return decorador
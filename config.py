@@ -1 +1,89 @@
-SECRET_KEY = "pass1word"
\ No newline at end of file
+import os
+
+SECRET_KEY = "pass1word"
+
+# Desarrollo (PRODE_DESARROLLO=1 python app.py): modo debug y recarga de
+# plantillas al editarlas. En producción queda apagado.
+DESARROLLO = os.environ.get("PRODE_DESARROLLO", "0") == "1"
+
+# Ruta absoluta a la base (se puede pisar con la variable PRODE_DB)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE = os.environ.get("PRODE_DB", os.path.join(BASE_DIR, "prode.db"))
+
+# Archivo con la versión de datos publicada (para ETag / 304 sin tocar SQLite)
+MARCA_VERSION = DATABASE + ".version"
+
+# Plantillas: auto-reload solo en desarrollo y bytecode compilado en disco,
+# compartido por todos los workers y reinicios (ver plantillas.py)
+TEMPLATES_AUTO_RELOAD = DESARROLLO
+JINJA_CACHE_DIR = os.environ.get("PRODE_JINJA_CACHE", os.path.join(BASE_DIR, ".jinja_cache"))
+
+# Pool de conexiones por worker
+DB_POOL_SIZE = int(os.environ.get("PRODE_DB_POOL", "8"))
+DB_STATEMENT_CACHE = 256
+
+# Hilos por worker de gunicorn (gthread): uno por conexión del pool
+HILOS = int(os.environ.get("PRODE_HILOS", DB_POOL_SIZE))
+
+# Costo de bcrypt (2^n rondas). Elegirlo con: python bench_bcrypt.py
+BCRYPT_LOG_ROUNDS = int(os.environ.get("PRODE_BCRYPT_ROUNDS", "12"))
+
+# Hilos para calcular hashes (la mitad de los núcleos, para que quede CPU
+# para renderizar) y cuántos pedidos pueden esperar antes de responder 503
+HASH_HILOS = int(os.environ.get("PRODE_HASH_HILOS", max(1, (os.cpu_count() or 2) // 2)))
+HASH_COLA_MAX = int(os.environ.get("PRODE_HASH_COLA", "16"))
+
+# Intentos de login fallidos: (capacidad, fichas repuestas por segundo).
+# Por IP es más generoso porque varios usuarios pueden salir por la misma.
+LOGIN_LIMITE_IP = (30, 0.5)
+LOGIN_LIMITE_EMAIL = (5, 1 / 60)
+
+# Proxies de confianza delante de la app (con nginx: PRODE_PROXY_SALTOS=1).
+# Con 0 request.remote_addr es la IP de la conexión; detrás de un proxy esa
+# es la del proxy, y el límite por IP de login pasaría a ser uno solo para
+# todo el sitio. Con n, ProxyFix toma la IP (y el esquema) que agregó el
+# n-ésimo proxy en X-Forwarded-For / X-Forwarded-Proto. No poner más saltos
+# de los que hay: el cliente podría inventarse la IP en el header.
+PROXY_SALTOS = int(os.environ.get("PRODE_PROXY_SALTOS", "0"))
+
+# Escritor agrupado de pronósticos: máximo de operaciones por commit,
+# reintentos del BEGIN si se vence el busy_timeout y segundos que un
+# request espera su commit antes de responder 503 (menos que el timeout
+# de gunicorn; cubre los reintentos: 3 x busy_timeout de 5 s)
+ESCRITOR_LOTE_MAX = 64
+ESCRITOR_REINTENTOS = 2
+ESCRITOR_ESPERA_MAX = 20
+
+# Ranking en vivo (/stream): cada cuánto se mira la marca de versión,
+# latido para proxies y espera máxima del long-poll.
+# Cada oyente (SSE o long-poll esperando) ocupa un hilo del worker, así
+# que a lo sumo STREAM_MAX_OYENTES por worker: el resto de los hilos queda
+# siempre para las páginas. Pasado el tope, /stream responde 503 (el
+# navegador pasa a long-poll) y /stream/poll contesta en el acto, con
+# Retry-After de STREAM_POLL_REINTENTO segundos. En modo ASGI (asgi.py)
+# los oyentes son corrutinas y no hay tope.
+# Cada evento lleva los primeros STREAM_TOP del ranking; el resto se pide
+# a /stream/datos.
+STREAM_INTERVALO = 0.5
+STREAM_LATIDO = 15
+STREAM_POLL_TIMEOUT = 25
+STREAM_POLL_REINTENTO = 10
+STREAM_MAX_OYENTES = int(os.environ.get("PRODE_STREAM_OYENTES", max(1, HILOS // 4)))
+STREAM_TOP = 10
+
+# Modo ASGI (asgi.py): conexiones aiosqlite de lectura por worker (un hilo
+# cada una) e hilos para las rutas que siguen siendo WSGI
+ASGI_DB_POOL = int(os.environ.get("PRODE_ASGI_DB_POOL", "4"))
+ASGI_HILOS = int(os.environ.get("PRODE_ASGI_HILOS", "10"))
+
+# Métricas por request (/admin/metrics): cuántos requests por ruta entran
+# en los percentiles y desde cuántos ms un request va al log de lentos
+METRICAS_VENTANA = 500
+METRICAS_LENTO_MS = int(os.environ.get("PRODE_LENTO_MS", "500"))
+
+# /metrics para Prometheus (metricas_prom.py): el scraper manda
+# "Authorization: Bearer <token>". Sin token configurado no se sirve
+METRICAS_TOKEN = os.environ.get("PRODE_METRICAS_TOKEN")
+# Archivos mmap de las métricas de cada worker (gunicorn.conf.py la vacía
+# al arrancar)
+METRICAS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR", os.path.join(BASE_DIR, ".metricas"))
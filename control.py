@@ -0,0 +1,108 @@
+# -------- CONTROL DE PRONÓSTICOS (admin) --------
+# Quién mandó pronóstico para cada carrera. Con miles de usuarios no se
+# arma la matriz usuarios x carreras completa: SQLite devuelve, por
+# usuario, una máscara de bits (bit i = la i-ésima carrera del calendario
+# por fecha), de a una página por vez. La paginación es por clave: el
+# último nombre de la página (nombre es UNIQUE, así que su índice da el
+# orden y el punto de partida sin OFFSET).
+#
+# La grilla la arma el navegador (static/js/control.js) con el JSON de
+# /control_pronosticos/datos. Las máscaras se leen en JS sin operadores de
+# bits (que son de 32), así que entran hasta 53 carreras por temporada.
+POR_PAGINA = 200
+
+# filtro -> ¿solo los que no pronosticaron la carrera abierta?
+FILTROS = {"todos": False, "falta_activa": True}
+
+
+def carreras(cur):
+    """Calendario en el orden de los bits."""
+    cur.execute("""
+        SELECT id, pais, fecha
+        FROM carreras
+        ORDER BY fecha, id
+    """)
+    return cur.fetchall()
+
+
+def carrera_activa(cur):
+    """La carrera abierta a pronósticos (la misma que muestra el dashboard)."""
+    cur.execute("""
+        SELECT id
+        FROM carreras
+        WHERE status = 'iniciada'
+        ORDER BY fecha ASC
+        LIMIT 1
+    """)
+    fila = cur.fetchone()
+    return fila["id"] if fila else None
+
+
+def pagina(cur, despues="", falta=None, limite=POR_PAGINA):
+    """
+    Usuarios con nombre mayor a `despues`, en orden, con su máscara.
+    Con `falta` (id de carrera) solo los que no tienen pronóstico para ella.
+    """
+    cur.execute("""
+        WITH orden AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY fecha, id) - 1 AS bit
+            FROM carreras
+        )
+        SELECT u.id, u.nombre,
+               (SELECT COALESCE(SUM(1 << o.bit), 0)
+                FROM pronosticos p
+                JOIN orden o ON o.id = p.carrera_id
+                WHERE p.user_id = u.id) AS mascara
+        FROM usuarios u
+        WHERE u.nombre > :despues
+          AND (:falta IS NULL OR NOT EXISTS (
+                SELECT 1 FROM pronosticos p
+                WHERE p.user_id = u.id AND p.carrera_id = :falta
+          ))
+        ORDER BY u.nombre
+        LIMIT :limite
+    """, {"despues": despues, "falta": falta, "limite": limite})
+    return cur.fetchall()
+
+
+def total(cur, falta=None):
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM usuarios u
+        WHERE :falta IS NULL OR NOT EXISTS (
+            SELECT 1 FROM pronosticos p
+            WHERE p.user_id = u.id AND p.carrera_id = :falta
+        )
+    """, {"falta": falta})
+    return cur.fetchone()[0]
+
+
+def datos(cur, despues="", filtro="todos", limite=POR_PAGINA):
+    """
+    JSON compacto de una página: usuarios como [id, nombre, máscara] y
+    "siguiente" para pedir la próxima (None si era la última). La primera
+    página trae además el calendario y el total.
+    """
+    activa = carrera_activa(cur)
+    solo_faltan = FILTROS.get(filtro, False)
+    falta = activa if solo_faltan else None
+
+    # Sin carrera abierta a nadie le falta la activa
+    if solo_faltan and activa is None:
+        filas = []
+    else:
+        filas = pagina(cur, despues, falta, limite + 1)
+    respuesta = {
+        "usuarios": [[f["id"], f["nombre"], f["mascara"]] for f in filas[:limite]],
+        "siguiente": filas[limite - 1]["nombre"] if len(filas) > limite else None,
+    }
+
+    if not despues:
+        calendario = carreras(cur)
+        respuesta["carreras"] = [[c["id"], c["pais"], c["fecha"]] for c in calendario]
+        respuesta["activa"] = next(
+            (i for i, c in enumerate(calendario) if c["id"] == activa), None
+        )
+        respuesta["total"] = total(cur, falta) if filas else 0
+
+    return respuesta
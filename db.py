@@ -0,0 +1,205 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import g, current_app
+
+# -------- POOL DE CONEXIONES --------
+# Cada worker de gunicorn tiene su propio pool. Las conexiones se reusan
+# entre requests para no pagar en cada hit el open, el parseo del schema
+# y el calentamiento del cache de páginas.
+
+
+class CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que suma a la medición del request (metricas.py) el tiempo de
+    cada execute y cada fetch, y las filas que devuelve.
+    """
+
+    def _medir(self, inicio, filas=0):
+        medicion = self.connection.medicion
+        if medicion is not None:
+            medicion.tiempo((time.perf_counter() - inicio) * 1000, filas)
+
+    def execute(self, sql, params=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._medir(inicio)
+
+    def executemany(self, sql, params):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, params)
+        finally:
+            self._medir(inicio)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._medir(inicio, fila is not None)
+        return fila
+
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._medir(inicio, len(filas))
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._medir(inicio, len(filas))
+        return filas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        fila = super().__next__()
+        self._medir(inicio, 1)
+        return fila
+
+
+class ConexionPool(sqlite3.Connection):
+    """
+    Conexión que vuelve al pool en lugar de cerrarse.
+    Las rutas pueden seguir llamando conn.close(): el cierre real lo hace
+    el pool (o el teardown del request).
+
+    Mientras la usa un request, medicion apunta a su metricas.Medicion.
+    """
+
+    medicion = None
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    # Connection.execute de sqlite3 no pasa por cursor(): se redirige
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, params):
+        return self.cursor().executemany(sql, params)
+
+    def _trazar(self, sql):
+        medicion = self.medicion
+        if medicion is not None:
+            medicion.sentencia(sql)
+
+    def close(self):
+        pass
+
+    def cerrar_real(self):
+        super().close()
+
+
+class PoolSQLite:
+    def __init__(self, path, size=8, cached_statements=256):
+        self.path = path
+        self.size = size
+        self.cached_statements = cached_statements
+        self._libres = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        # Contadores para graficar
+        self.abiertas = 0
+        self.reusadas = 0
+        self.descartadas = 0
+
+    def _nueva(self):
+        conn = sqlite3.connect(
+            self.path,
+            factory=ConexionPool,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+            timeout=5,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.set_trace_callback(conn._trazar)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        with self._lock:
+            self.abiertas += 1
+        return conn
+
+    def _verificar_fork(self):
+        # Después de un fork el pool heredado no sirve: se arranca vacío
+        if os.getpid() != self._pid:
+            self._libres = queue.LifoQueue(maxsize=self.size)
+            self._pid = os.getpid()
+
+    def obtener(self):
+        self._verificar_fork()
+        try:
+            conn = self._libres.get_nowait()
+        except queue.Empty:
+            return self._nueva()
+
+        with self._lock:
+            self.reusadas += 1
+        return conn
+
+    def devolver(self, conn):
+        self._verificar_fork()
+
+        conn.medicion = None
+
+        # Nunca devolver una transacción a medio terminar
+        if conn.in_transaction:
+            conn.rollback()
+
+        try:
+            self._libres.put_nowait(conn)
+        except queue.Full:
+            conn.cerrar_real()
+            with self._lock:
+                self.descartadas += 1
+
+    def cerrar_todas(self):
+        while True:
+            try:
+                self._libres.get_nowait().cerrar_real()
+            except queue.Empty:
+                break
+
+    def estadisticas(self):
+        return {
+            "path": self.path,
+            "size": self.size,
+            "libres": self._libres.qsize(),
+            "abiertas": self.abiertas,
+            "reusadas": self.reusadas,
+            "descartadas": self.descartadas,
+        }
+
+
+# -------- INTEGRACIÓN CON FLASK --------
+def init_app(app):
+    app.extensions["prode_pool"] = PoolSQLite(
+        app.config["DATABASE"],
+        size=app.config.get("DB_POOL_SIZE", 8),
+        cached_statements=app.config.get("DB_STATEMENT_CACHE", 256),
+    )
+    app.teardown_appcontext(liberar_db)
+
+
+def get_pool():
+    return current_app.extensions["prode_pool"]
+
+
+def get_db():
+    """Conexión del app context actual (una sola por request)."""
+    if "db" not in g:
+        g.db = get_pool().obtener()
+        g.db.medicion = g.get("medicion")
+    return g.db
+
+
+def liberar_db(exc=None):
+    conn = g.pop("db", None)
+    if conn is not None:
+        get_pool().devolver(conn)
@@ -0,0 +1,306 @@
+# -------- RANKING EN VIVO (Server-Sent Events) --------
+# Cuando un admin carga resultados, en lugar de que todos refresquen
+# /ranking y /dashboard, los navegadores reciben un aviso por /stream
+# (SSE), o por /stream/poll (long-poll) si no hay EventSource o el worker
+# ya tiene demasiados oyentes.
+#
+# El evento es chico: la versión (su id), los primeros STREAM_TOP del
+# ranking y la última carrera corrida, sin los puntos de cada pronóstico.
+# Con cientos de oyentes no se manda el ranking entero a cada uno en cada
+# cambio: la página que muestra más que el top (el ranking completo, la
+# tabla de la carrera en el dashboard) lo pide a /stream/datos, que tiene
+# ETag contra la marca de versión y se arma una vez por versión.
+#
+# Un solo difusor por worker: un hilo mira la marca de versión (un stat
+# cada medio segundo, ver cache.py), y cuando cambia arma el evento UNA
+# vez y despierta a todos los oyentes. Los oyentes no tocan SQLite, pero
+# con gthread cada conexión abierta es un hilo del worker dormido en una
+# Condition: si fueran todos, las páginas no tendrían quién las atienda.
+# Por eso hay un tope de oyentes por worker (SSE y long-poll juntos, ver
+# config.STREAM_MAX_OYENTES). Pasado el tope, /stream responde 503 y el
+# navegador pasa a /stream/poll, que en ese caso no espera: contesta lo
+# que haya y pide volver en Retry-After segundos (un poll común). En modo
+# ASGI las tres rutas son async (asgi.py) y no hay tope.
+#
+# El id de cada evento es la versión de datos, que es la misma en todos
+# los workers: al reconectar (Last-Event-ID) no importa a cuál se llega.
+import hashlib
+import json
+import os
+import threading
+import time
+
+from flask import Response, current_app, request, session
+
+import cache
+import lecturas
+import posiciones
+from condicional import condicional
+from db import get_db
+
+# Los primeros n del ranking (se piden n + 1 para saber si hay más)
+SQL_TOP = """
+    SELECT posicion, nombre, puntos, carreras_jugadas, aciertos_exactos
+    FROM posiciones
+    ORDER BY posicion, nombre
+    LIMIT ?
+"""
+
+cache_datos = cache.CacheVersionado()
+
+
+def _ranking(filas):
+    return [
+        {
+            "posicion": r["posicion"],
+            "nombre": r["nombre"],
+            "puntos": r["puntos"],
+            "carreras_jugadas": r["carreras_jugadas"],
+            "aciertos_exactos": r["aciertos_exactos"],
+        }
+        for r in filas
+    ]
+
+
+def _carrera(ultima):
+    return {"id": ultima["id"], "pais": ultima["pais"], "fecha": ultima["fecha"]}
+
+
+def evento(top, ultima, n):
+    """Los primeros n del ranking (top trae n + 1 filas si hay más) y la última carrera."""
+    return {
+        "top": _ranking(top[:n]),
+        "completo": len(top) <= n,
+        "carrera": _carrera(ultima) if ultima else None,
+    }
+
+
+def datos(ranking, ultima, puntos):
+    """Ranking completo + puntos de la última carrera corrida (/stream/datos)."""
+    carrera = None
+    if ultima:
+        carrera = {
+            **_carrera(ultima),
+            "puntos": [{"usuario": p["usuario"], "puntos": p["puntos"]} for p in puntos],
+        }
+    return {"ranking": _ranking(ranking), "carrera": carrera}
+
+
+def armar_evento(cur, n):
+    cur.execute(SQL_TOP, (n + 1,))
+    top = cur.fetchall()
+    cur.execute(lecturas.SQL_CARRERA_ANTERIOR)
+    return evento(top, cur.fetchone(), n)
+
+
+def armar_datos(cur):
+    cur.execute(posiciones.SQL_RANKING)
+    ranking = cur.fetchall()
+    cur.execute(lecturas.SQL_CARRERA_ANTERIOR)
+    ultima = cur.fetchone()
+    puntos = []
+    if ultima:
+        cur.execute(lecturas.SQL_PUNTOS_CARRERA, (ultima["id"],))
+        puntos = cur.fetchall()
+    return datos(ranking, ultima, puntos)
+
+
+def codificar(datos):
+    """(JSON, digest) de un evento: el digest dice si cambió algo que se ve."""
+    texto = json.dumps(datos, separators=(",", ":"))
+    return texto, hashlib.sha1(texto.encode()).digest()
+
+
+class Difusor:
+    def __init__(self, pool, marca, intervalo=0.5, max_oyentes=2, top=10):
+        self.pool = pool
+        self.marca = marca
+        self.intervalo = intervalo
+        self.max_oyentes = max_oyentes
+        self.top = top
+
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.visto = 0        # última versión de datos revisada
+        self.version = 0      # versión de datos del último evento distinto
+        self.evento = None    # JSON listo para mandar
+        self._digest = None
+        self.oyentes = 0      # SSE y long-poll esperando
+        self.rechazados = 0
+        self.enviados = 0
+
+    def _arrancar(self):
+        # Un hilo por proceso (gunicorn hace fork)
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._revisar(notificar=False)
+            self._pid = os.getpid()
+            threading.Thread(target=self._bucle, name="difusor", daemon=True).start()
+
+    def _bucle(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self._revisar()
+            except Exception:
+                # Que un error de la base no mate al difusor
+                continue
+
+    def _revisar(self, notificar=True):
+        version, _ = self.marca.leer()
+        if version is None or int(version) <= self.visto:
+            return
+
+        conn = self.pool.obtener()
+        try:
+            texto, digest = codificar(armar_evento(conn.cursor(), self.top))
+        finally:
+            self.pool.devolver(conn)
+
+        with self._cond:
+            self.visto = int(version)
+            if digest == self._digest:
+                # Cambió otra cosa (un piloto, una carrera futura): nada que avisar
+                return
+            self._digest = digest
+            self.version = int(version)
+            self.evento = texto
+            if notificar:
+                self._cond.notify_all()
+
+    def esperar(self, desde, timeout):
+        """(version, evento) si hay algo más nuevo que `desde`, si no (desde, None)."""
+        if self._pid != os.getpid():
+            self._arrancar()
+
+        with self._cond:
+            hay = self._cond.wait_for(
+                lambda: self.evento is not None and self.version > desde, timeout
+            )
+            if not hay:
+                return desde, None
+            self.enviados += 1
+            return self.version, self.evento
+
+    def sumar_oyente(self):
+        """False si el worker ya tiene max_oyentes hilos esperando."""
+        with self._cond:
+            if self.oyentes >= self.max_oyentes:
+                self.rechazados += 1
+                return False
+            self.oyentes += 1
+            return True
+
+    def restar_oyente(self):
+        with self._cond:
+            self.oyentes -= 1
+
+    def estadisticas(self):
+        return {
+            "version": self.version,
+            "oyentes": self.oyentes,
+            "rechazados": self.rechazados,
+            "enviados": self.enviados,
+        }
+
+
+# -------- INTEGRACIÓN CON FLASK --------
+def version_cliente():
+    """Versión que ya tiene el cliente (Last-Event-ID al reconectar, o ?desde=)."""
+    valor = request.headers.get("Last-Event-ID") or request.args.get("desde")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+
+def init_app(app):
+    config = app.config
+
+    def difusor():
+        if "prode_difusor" not in app.extensions:
+            app.extensions["prode_difusor"] = Difusor(
+                app.extensions["prode_pool"],
+                app.extensions["prode_marca"],
+                intervalo=config["STREAM_INTERVALO"],
+                max_oyentes=config["STREAM_MAX_OYENTES"],
+                top=config["STREAM_TOP"],
+            )
+        return app.extensions["prode_difusor"]
+
+    @app.template_global()
+    def version_en_vivo():
+        version, _ = current_app.extensions["prode_marca"].leer()
+        return version or 0
+
+    @app.route("/stream")
+    def stream():
+        if "user_id" not in session:
+            return "", 401
+
+        d = difusor()
+        if not d.sumar_oyente():
+            # El cliente pasa a long-poll
+            return "", 503, {"Retry-After": "30"}
+
+        desde = version_cliente()
+
+        def eventos():
+            nonlocal desde
+            try:
+                yield "retry: 5000\n\n"
+                while True:
+                    version, evento = d.esperar(desde, config["STREAM_LATIDO"])
+                    if evento is None:
+                        # Latido: mantiene viva la conexión en proxies
+                        yield ": latido\n\n"
+                        continue
+                    desde = version
+                    yield f"id: {version}\nevent: posiciones\ndata: {evento}\n\n"
+            finally:
+                d.restar_oyente()
+
+        return Response(eventos(), mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
+    @app.route("/stream/poll")
+    def stream_poll():
+        if "user_id" not in session:
+            return "", 401
+
+        d = difusor()
+        if d.sumar_oyente():
+            try:
+                version, evento = d.esperar(version_cliente(), config["STREAM_POLL_TIMEOUT"])
+            finally:
+                d.restar_oyente()
+            reintento = {}
+        else:
+            # Sin hilos para esperar: lo que haya, y que vuelva más tarde
+            version, evento = d.esperar(version_cliente(), 0)
+            reintento = {"Retry-After": str(config["STREAM_POLL_REINTENTO"])}
+
+        if evento is None:
+            return "", 204, reintento
+        return Response(
+            f'{{"version":{version},"datos":{evento}}}',
+            mimetype="application/json",
+            headers={"Cache-Control": "no-cache", **reintento},
+        )
+
+    @app.route("/stream/datos")
+    @condicional()
+    def stream_datos():
+        if "user_id" not in session:
+            return "", 401
+
+        # Lo piden todos los oyentes tras cada evento: una vez por versión
+        conn = get_db()
+        texto = cache_datos.obtener(
+            "datos", cache.version_actual(conn), lambda: codificar(armar_datos(conn.cursor()))[0]
+        )
+        return Response(texto, mimetype="application/json")
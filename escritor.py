@@ -0,0 +1,233 @@
+# -------- ESCRITOR AGRUPADO (group commit) --------
+# En los últimos minutos antes del cierre cientos de usuarios mandan su
+# pronóstico a la vez. Si cada request abre su transacción, los escritores
+# se pelean por el lock de SQLite y algunos terminan en "database is locked".
+#
+# En cambio, los requests encolan la operación y un único hilo por worker
+# las ejecuta en lotes: una transacción y un fsync por lote. Cada request
+# espera a que su lote esté commiteado (durable: synchronous = FULL) antes
+# de responder. Cada operación corre en su propio SAVEPOINT, así un error
+# en una no tira abajo las demás del lote.
+#
+# Las operaciones reciben un cursor y no pueden usar nada de Flask
+# (corren en el hilo escritor, fuera del request).
+#
+# Si el lock de escritura no se consigue en busy_timeout (otro proceso
+# escribiendo mucho: puntuación, migraciones), el BEGIN se reintenta unas
+# veces antes de devolverle el error a todo el lote. La espera del lock y
+# los reintentos se ven en /metrics (metricas_prom.py).
+#
+# Si algo falla fuera de los SAVEPOINT (abrir la conexión, el ROLLBACK) el
+# lote entero se marca con el error, se reabre la conexión y el hilo sigue.
+# Si el hilo igual muriera, el próximo pedido lo vuelve a arrancar. Ningún
+# request espera más de `espera_max`: pasado ese tiempo recibe un 503 (su
+# operación se descarta si todavía no había empezado).
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+import metricas_prom
+
+log = logging.getLogger("prode.escritor")
+
+
+class EscritorNoDisponible(Exception):
+    """El lote no se commiteó dentro de espera_max."""
+
+
+class _Pedido:
+    __slots__ = ("operacion", "args", "listo", "resultado", "error", "cancelado")
+
+    def __init__(self, operacion, args):
+        self.operacion = operacion
+        self.args = args
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+        # El request se cansó de esperar: si no empezó, no se ejecuta
+        self.cancelado = False
+
+
+class EscritorAgrupado:
+    def __init__(self, path, lote_max=64, timeout=5, reintentos=2, espera_max=20):
+        self.path = path
+        self.lote_max = lote_max
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_max = espera_max
+        self._pid = None
+        self._hilo = None
+        self._lock = threading.Lock()
+
+        # Contadores para graficar
+        self.lotes = 0
+        self.operaciones = 0
+        self.mayor_lote = 0
+        self.fallas = 0
+        self.reinicios = 0
+
+    def _vivo(self):
+        return self._pid == os.getpid() and self._hilo.is_alive()
+
+    def _arrancar(self):
+        # Un hilo por proceso: se arranca al primer uso (después del fork)
+        # y de nuevo si murió; la cola se conserva dentro del proceso
+        with self._lock:
+            if self._vivo():
+                return
+            if self._pid == os.getpid():
+                self.reinicios += 1
+                log.error("el hilo escritor había muerto: se vuelve a arrancar")
+            else:
+                self._cola = queue.Queue()
+            self._hilo = threading.Thread(target=self._bucle, name="escritor", daemon=True)
+            self._hilo.start()
+            self._pid = os.getpid()
+
+    def _conectar(self):
+        conn = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False, timeout=self.timeout
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = FULL")
+        conn.execute(f"PRAGMA busy_timeout = {self.timeout * 1000}")
+        return conn
+
+    def ejecutar(self, operacion, *args):
+        """Encola operacion(cur, *args) y espera a que su lote quede commiteado."""
+        if not self._vivo():
+            self._arrancar()
+
+        pedido = _Pedido(operacion, args)
+        self._cola.put(pedido)
+        if not pedido.listo.wait(self.espera_max):
+            pedido.cancelado = True
+            raise EscritorNoDisponible()
+
+        if pedido.error is not None:
+            raise pedido.error
+        return pedido.resultado
+
+    def _bucle(self):
+        conn = None
+        try:
+            while True:
+                # Sin esperas artificiales: el lote es lo que se juntó mientras
+                # se commiteaba el anterior
+                lote = [self._cola.get()]
+                while len(lote) < self.lote_max:
+                    try:
+                        lote.append(self._cola.get_nowait())
+                    except queue.Empty:
+                        break
+
+                try:
+                    if conn is None:
+                        conn = self._conectar()
+                    self._escribir(conn, lote)
+                except Exception as e:
+                    # La conexión quedó en un estado desconocido: se reabre
+                    self.fallas += 1
+                    log.exception("falló un lote de %s operaciones", len(lote))
+                    for pedido in lote:
+                        if pedido.error is None:
+                            pedido.error = e
+                        pedido.resultado = None
+                    self._cerrar(conn)
+                    conn = None
+
+                self.lotes += 1
+                self.operaciones += len(lote)
+                self.mayor_lote = max(self.mayor_lote, len(lote))
+                for pedido in lote:
+                    pedido.listo.set()
+        finally:
+            # Si el hilo muere igual, que no se quede con el lock de escritura
+            self._cerrar(conn)
+
+    @staticmethod
+    def _cerrar(conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _empezar(self, cur):
+        """BEGIN IMMEDIATE: espera el lock de escritura, con reintentos."""
+        for intento in range(self.reintentos + 1):
+            inicio = time.perf_counter()
+            try:
+                cur.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if not metricas_prom.es_bloqueo(e):
+                    raise
+                metricas_prom.BLOQUEOS.labels("escritor").inc()
+                if intento == self.reintentos:
+                    raise
+            finally:
+                metricas_prom.ESPERA_ESCRITURA.observe(time.perf_counter() - inicio)
+
+    def _escribir(self, conn, lote):
+        cur = conn.cursor()
+        try:
+            self._empezar(cur)
+            for pedido in lote:
+                if pedido.cancelado:
+                    pedido.error = EscritorNoDisponible()
+                    continue
+                cur.execute("SAVEPOINT pedido")
+                try:
+                    pedido.resultado = pedido.operacion(cur, *pedido.args)
+                except Exception as e:
+                    cur.execute("ROLLBACK TO pedido")
+                    pedido.error = e
+                cur.execute("RELEASE pedido")
+            cur.execute("COMMIT")
+        except Exception as e:
+            # Si el ROLLBACK también falla, _bucle marca el lote y reconecta
+            if conn.in_transaction:
+                conn.rollback()
+            for pedido in lote:
+                if pedido.error is None:
+                    pedido.error = e
+                pedido.resultado = None
+
+    def estadisticas(self):
+        return {
+            "lotes": self.lotes,
+            "operaciones": self.operaciones,
+            "mayor_lote": self.mayor_lote,
+            "fallas": self.fallas,
+            "reinicios": self.reinicios,
+            "promedio_lote": round(self.operaciones / self.lotes, 2) if self.lotes else 0,
+        }
+
+
+# -------- INTEGRACIÓN CON FLASK --------
+def init_app(app):
+    app.extensions["prode_escritor"] = EscritorAgrupado(
+        app.config["DATABASE"],
+        lote_max=app.config.get("ESCRITOR_LOTE_MAX", 64),
+        reintentos=app.config.get("ESCRITOR_REINTENTOS", 2),
+        espera_max=app.config.get("ESCRITOR_ESPERA_MAX", 20),
+    )
+
+    @app.errorhandler(EscritorNoDisponible)
+    def no_disponible(_):
+        return (
+            "No pudimos guardar tu pronóstico a tiempo, probá de nuevo en unos segundos.",
+            503,
+            {"Retry-After": "5"},
+        )
+
+
+def get_escritor():
+    return current_app.extensions["prode_escritor"]
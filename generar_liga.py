@@ -0,0 +1,299 @@
+# Genera una base de prode grande y realista para pruebas de carga:
+#   - pilotos y calendario copiados de prode.db
+#   - N usuarios (10k a 500k) con la misma contraseña ("prode123")
+#     y un admin: admin@liga.prode. El hash se calcula una sola vez, con
+#     el costo de producción (config.BCRYPT_LOG_ROUNDS): así el primer
+#     login de cada uno no lo rehashea y bench_semana.py mide logins normales
+#   - pronósticos de toda la temporada hasta la fecha en curso, con
+#     elecciones sacadas de una distribución realista: los autos de punta
+#     se eligen mucho más y cada usuario tiene un piloto favorito
+#   - las primeras --corridas carreras con resultado y ya puntuadas
+#     (puntos_vectorizados.py), la siguiente abierta a pronósticos
+#
+# Todo se inserta con executemany en unas pocas transacciones y sin
+# journal: un millón de pronósticos se arma en segundos. Con la misma
+# --semilla sale siempre la misma base.
+#
+# Uso: python generar_liga.py [usuarios] [--salida prode_liga.db]
+#                             [--corridas 8] [--semilla 2026] [--forzar]
+#      PRODE_DB=prode_liga.db gunicorn app:app
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask_bcrypt import Bcrypt
+
+import migraciones
+import posiciones
+from config import BCRYPT_LOG_ROUNDS
+from puntos_vectorizados import Temporada
+
+CARPETA_APP = os.path.dirname(os.path.abspath(__file__))
+
+PASSWORD = "prode123"
+
+# Qué tan seguido se elige a un piloto según su equipo (el resto vale 1)
+FUERZA_EQUIPO = {
+    "McLaren": 12, "Ferrari": 8, "Red Bull": 8, "Mercedes": 7,
+    "Aston Martin": 2.5, "Williams": 2.5, "Alpine": 2, "Haas": 1.5,
+}
+# Peso extra del piloto favorito de cada usuario
+PESO_FAVORITO = 4
+
+# Cada usuario juega cada fecha con probabilidad "compromiso" ~ Beta(4, 1.5)
+COMPROMISO = (4, 1.5)
+# En la fecha abierta todavía no mandaron todos
+PARTICIPACION_ABIERTA = 0.6
+
+LOTE = 200_000
+
+
+def _ms(inicio):
+    return f"{time.perf_counter() - inicio:.1f} s"
+
+
+def elegir(rng, log_pesos, k):
+    """
+    k pilotos distintos por fila, sin reposición, con probabilidad según
+    log_pesos (filas x pilotos): truco de Gumbel, top-k de pesos + ruido.
+    Devuelve índices de columna, el primero es el más "elegido".
+    """
+    ruido = rng.gumbel(size=log_pesos.shape).astype(np.float32)
+    return np.argsort(-(log_pesos + ruido), axis=1)[:, :k]
+
+
+def copiar_catalogo(conn, origen, corridas):
+    conn.execute("ATTACH DATABASE ? AS origen", (origen,))
+    conn.execute("""
+        INSERT INTO pilotos (id, nombre, equipo, nacionalidad, dorsal)
+        SELECT id, nombre, equipo, nacionalidad, dorsal FROM origen.pilotos
+    """)
+    conn.execute("""
+        INSERT INTO carreras (id, pais, autodromo, fecha, sprint, imagen)
+        SELECT id, pais, autodromo, fecha, sprint, imagen FROM origen.carreras
+    """)
+    conn.commit()
+    conn.execute("DETACH DATABASE origen")
+
+    carreras = conn.execute("SELECT id, sprint FROM carreras ORDER BY fecha").fetchall()
+    corridas = carreras[:corridas]
+    abierta = carreras[len(corridas)] if len(carreras) > len(corridas) else None
+
+    conn.executemany(
+        "UPDATE carreras SET status = 'corrida', clasificacion_iniciada = 1 WHERE id = ?",
+        [(c,) for c, _ in corridas],
+    )
+    if abierta:
+        limite = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%dT%H:%M")
+        conn.execute(
+            "UPDATE carreras SET status = 'iniciada', fecha_limite_pronostico = ? WHERE id = ?",
+            (limite, abierta[0]),
+        )
+    conn.commit()
+
+    pilotos = conn.execute("SELECT id, equipo FROM pilotos ORDER BY id").fetchall()
+    return corridas, abierta, pilotos
+
+
+def crear_usuarios(conn, rng, cantidad):
+    hash_password = Bcrypt().generate_password_hash(PASSWORD, BCRYPT_LOG_ROUNDS).decode()
+    avatares = sorted(
+        a for a in os.listdir(os.path.join(CARPETA_APP, "static", "avatars"))
+        if a.startswith("avatar")
+    ) or [None]
+    elegidos = rng.integers(0, len(avatares), cantidad)
+    inicio = datetime(2025, 12, 1)
+    dias = rng.integers(0, 90, cantidad)
+
+    conn.execute("""
+        INSERT INTO usuarios (id, nombre, email, password, fecha_registro, admin, avatar)
+        VALUES (1, 'Admin', 'admin@liga.prode', ?, ?, 1, ?)
+    """, (hash_password, inicio.strftime("%Y-%m-%d %H:%M:%S"), avatares[0]))
+    conn.executemany("""
+        INSERT INTO usuarios (id, nombre, email, password, fecha_registro, avatar)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (
+            n, f"Jugador {n}", f"jugador{n}@liga.prode", hash_password,
+            (inicio + timedelta(days=int(dias[n - 2]))).strftime("%Y-%m-%d %H:%M:%S"),
+            avatares[elegidos[n - 2]],
+        )
+        for n in range(2, cantidad + 2)
+    ))
+    conn.commit()
+    return np.arange(1, cantidad + 2)
+
+
+def crear_pronosticos(rng, user_ids, carreras, abierta, pilotos):
+    """
+    Pronósticos por carrera; en la abierta participa menos gente. Array con
+    columnas user_id, carrera_id, pole, sprint_ganador (0 = sin sprint),
+    p1, p2, p3, en el orden de UNIQUE(user_id, carrera_id).
+    """
+    ids_piloto = np.array([p for p, _ in pilotos])
+    fuerza = np.log(np.array([FUERZA_EQUIPO.get(e, 1) for _, e in pilotos], dtype=np.float32))
+    favorito = rng.integers(0, len(pilotos), len(user_ids))
+    compromiso = rng.beta(*COMPROMISO, len(user_ids))
+
+    todas = [(c, s, 1.0) for c, s in carreras]
+    if abierta:
+        todas.append((abierta[0], abierta[1], PARTICIPACION_ABIERTA))
+
+    partes = []
+    for carrera_id, sprint, factor in todas:
+        juegan = np.flatnonzero(rng.random(len(user_ids)) < compromiso * factor)
+        for desde in range(0, len(juegan), LOTE):
+            filas = juegan[desde:desde + LOTE]
+            log_pesos = np.tile(fuerza, (len(filas), 1))
+            log_pesos[np.arange(len(filas)), favorito[filas]] += np.log(PESO_FAVORITO)
+
+            # pole, p1, p2, p3 distintos; la pole y el sprint se eligen aparte
+            parte = np.zeros((len(filas), 7), dtype=np.int64)
+            parte[:, 0] = user_ids[filas]
+            parte[:, 1] = carrera_id
+            parte[:, 2] = ids_piloto[elegir(rng, log_pesos, 1)[:, 0]]
+            if sprint:
+                parte[:, 3] = ids_piloto[elegir(rng, log_pesos, 1)[:, 0]]
+            parte[:, 4:] = ids_piloto[elegir(rng, log_pesos, 3)]
+            partes.append(parte)
+
+    filas = np.concatenate(partes)
+    return filas[np.lexsort((filas[:, 1], filas[:, 0]))]
+
+
+def sortear_resultados(rng, carreras, pilotos):
+    """Resultados de las carreras corridas: carrera_id, pole, sprint (0 = sin sprint), p1, p2, p3."""
+    ids_piloto = np.array([p for p, _ in pilotos])
+    fuerza = np.log(np.array([FUERZA_EQUIPO.get(e, 1) for _, e in pilotos], dtype=np.float32))
+    log_pesos = np.tile(fuerza, (len(carreras), 1))
+
+    resultados = np.zeros((len(carreras), 6), dtype=np.int64)
+    resultados[:, 0] = [c for c, _ in carreras]
+    resultados[:, 1] = ids_piloto[elegir(rng, log_pesos, 1)[:, 0]]
+    resultados[:, 2] = ids_piloto[elegir(rng, log_pesos, 1)[:, 0]] * [bool(s) for _, s in carreras]
+    resultados[:, 3:] = ids_piloto[elegir(rng, log_pesos, 3)]
+    # Temporada las espera ordenadas por id, como las trae su consulta
+    return resultados[np.argsort(resultados[:, 0])]
+
+
+def puntuar(resultados, pronosticos):
+    """
+    Puntos de cada fila con puntos_vectorizados (-1 = carrera sin resultado).
+    Los ids de pronosticos son 1..n en el orden del array.
+    """
+    ids = np.arange(1, len(pronosticos) + 1)
+    filas = np.column_stack((ids, pronosticos, np.full(len(pronosticos), -1)))
+    temporada = Temporada.desde_arrays(resultados, filas)
+
+    puntos = np.full(len(pronosticos), -1, dtype=np.int64)
+    puntos[temporada.ids[temporada.tiene] - 1] = temporada.puntuar()[temporada.tiene]
+    return puntos
+
+
+def guardar_resultados(conn, resultados):
+    conn.executemany("""
+        INSERT INTO resultados
+            (carrera_id, pole, sprint_ganador, p1, p2, p3, revision, revision_puntuada)
+        VALUES (?, ?, NULLIF(?, 0), ?, ?, ?, 1, 1)
+    """, resultados.tolist())
+    conn.commit()
+
+
+def guardar_pronosticos(conn, pronosticos, puntos):
+    # Los índices secundarios se arman una sola vez al final
+    indices = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'pronosticos' AND sql IS NOT NULL
+    """).fetchall()
+    for nombre, _ in indices:
+        conn.execute(f"DROP INDEX {nombre}")
+
+    # Primero a una tabla temporal en memoria, sin restricciones ni
+    # AUTOINCREMENT, con las filas tal cual salen de numpy; después un solo
+    # INSERT ... SELECT pasa todo a pronosticos sin volver a Python
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("""
+        CREATE TEMP TABLE carga
+            (id, user_id, carrera_id, pole, sprint_ganador, p1, p2, p3, puntos)
+    """)
+    filas = np.column_stack((np.arange(1, len(pronosticos) + 1), pronosticos, puntos))
+    for desde in range(0, len(filas), LOTE):
+        conn.executemany(
+            "INSERT INTO carga VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            filas[desde:desde + LOTE].tolist(),
+        )
+    conn.execute("""
+        INSERT INTO pronosticos
+            (id, user_id, carrera_id, pole, sprint_ganador, p1, p2, p3, puntos, pendiente)
+        SELECT id, user_id, carrera_id, pole, NULLIF(sprint_ganador, 0), p1, p2, p3,
+               NULLIF(puntos, -1), puntos < 0
+        FROM carga
+    """)
+    conn.execute("DROP TABLE carga")
+
+    for _, sql in indices:
+        conn.execute(sql)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una liga grande de prueba")
+    parser.add_argument("usuarios", type=int, nargs="?", default=10_000)
+    parser.add_argument("--salida", default=os.path.join(CARPETA_APP, "prode_liga.db"))
+    parser.add_argument("--origen", default=os.path.join(CARPETA_APP, "prode.db"),
+                        help="base de donde se copian pilotos y calendario")
+    parser.add_argument("--corridas", type=int, default=8,
+                        help="carreras ya corridas y puntuadas")
+    parser.add_argument("--semilla", type=int, default=2026)
+    parser.add_argument("--forzar", action="store_true", help="pisar --salida si existe")
+    args = parser.parse_args()
+
+    if os.path.exists(args.salida):
+        if not args.forzar:
+            parser.error(f"{args.salida} ya existe (usar --forzar para pisarlo)")
+        for sufijo in ("", "-wal", "-shm", ".version"):
+            if os.path.exists(args.salida + sufijo):
+                os.remove(args.salida + sufijo)
+
+    rng = np.random.default_rng(args.semilla)
+    total = time.perf_counter()
+
+    conn = sqlite3.connect(args.salida)
+    conn.row_factory = sqlite3.Row
+    # Base nueva: si se corta a la mitad se vuelve a generar
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    migraciones.migrar(conn)
+
+    inicio = time.perf_counter()
+    corridas, abierta, pilotos = copiar_catalogo(conn, args.origen, args.corridas)
+    user_ids = crear_usuarios(conn, rng, args.usuarios)
+    print(f"{len(user_ids)} usuarios, {len(pilotos)} pilotos, "
+          f"{len(corridas)} carreras corridas: {_ms(inicio)}")
+
+    inicio = time.perf_counter()
+    pronosticos = crear_pronosticos(rng, user_ids, corridas, abierta, pilotos)
+    resultados = sortear_resultados(rng, corridas, pilotos)
+    puntos = puntuar(resultados, pronosticos)
+    print(f"{len(pronosticos)} pronósticos ({(puntos >= 0).sum()} puntuados): {_ms(inicio)}")
+
+    inicio = time.perf_counter()
+    guardar_resultados(conn, resultados)
+    guardar_pronosticos(conn, pronosticos, puntos)
+    posiciones.reconstruir(conn)
+    print(f"Pronósticos y posiciones guardados: {_ms(inicio)}")
+
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("ANALYZE")
+    conn.close()
+
+    tamano = os.path.getsize(args.salida) / 1024 / 1024
+    print(f"{args.salida}: {tamano:.0f} MB en {_ms(total)} "
+          f"(usuarios jugador<n>@liga.prode / admin@liga.prode, contraseña {PASSWORD})")
+
+
+if __name__ == "__main__":
+    main()
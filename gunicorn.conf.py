@@ -0,0 +1,117 @@
+# -------- PERFIL DE PRODUCCIÓN PARA GUNICORN --------
+#   gunicorn app:app            (gunicorn lee este archivo solo)
+#
+# Workers e hilos pensados para SQLite: las lecturas escalan con procesos
+# (cada uno tiene su GIL), pero hay un solo escritor a la vez en toda la
+# base, así que más workers que núcleos solo suma peleas por el lock.
+# Dentro de cada worker, gthread con tantos hilos como conexiones tiene el
+# pool (DB_POOL_SIZE): cada hilo reusa una conexión caliente.
+#
+# Con preload_app el master importa la app, arma los bundles de CSS/JS
+# (assets.py: si el build falla se avisa y las páginas piden Bootstrap al
+# CDN), compila las plantillas y llena los caches antes del fork (ver arranque.py). Al levantar se reporta cuánto
+# tardó el arranque en frío y el primer request de cada worker.
+#
+# Las métricas de /metrics se suman entre workers con los archivos de
+# config.METRICAS_DIR (ver metricas_prom.py); se vacía en cada arranque.
+#
+# Detrás de nginx (o cualquier proxy) hay que poner PRODE_PROXY_SALTOS=1
+# para que la app vea la IP de cada cliente y no la del proxy (config.py).
+#
+# Todo se puede pisar con variables de entorno (PRODE_*) o por línea de
+# comandos (gunicorn -w 2 app:app).
+import os
+import time
+
+from config import HILOS, METRICAS_DIR
+
+_inicio = time.perf_counter()
+
+# Antes de que se importe la app (y prometheus_client)
+os.makedirs(METRICAS_DIR, exist_ok=True)
+for _archivo in os.listdir(METRICAS_DIR):
+    if _archivo.endswith(".db"):
+        os.remove(os.path.join(METRICAS_DIR, _archivo))
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = METRICAS_DIR
+
+bind = os.environ.get("PRODE_BIND", "0.0.0.0:8000")
+
+_nucleos = os.cpu_count() or 1
+workers = int(os.environ.get("PRODE_WORKERS", min(max(_nucleos, 2), 8)))
+worker_class = "gthread"
+threads = HILOS
+
+preload_app = True
+
+# /stream deja conexiones abiertas, cada una con su hilo: por eso hay un
+# tope de oyentes por worker (config.STREAM_MAX_OYENTES, un cuarto de los
+# hilos). El timeout es por request bloqueado, no por conexión (gthread
+# manda latidos al master igual)
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers de a poco; con preload el nuevo sale del master ya
+# caliente, así que no cuesta un arranque en frío
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = os.environ.get("PRODE_ACCESS_LOG")
+loglevel = os.environ.get("PRODE_LOG_LEVEL", "info")
+
+
+def _ms(inicio):
+    return round((time.perf_counter() - inicio) * 1000, 1)
+
+
+def on_starting(server):
+    # Con preload la app ya está importada cuando corre este hook
+    import arranque
+    import assets
+    import plantillas
+
+    app = server.app.wsgi()
+    server.log.info("App importada en %s ms", _ms(_inicio))
+
+    inicio = time.perf_counter()
+    try:
+        assets.construir()
+        server.log.info("Bundles armados en %s ms", _ms(inicio))
+    except assets.AssetsError as e:
+        server.log.error("No se armaron los bundles (%s): Bootstrap se sirve del CDN", e)
+
+    cantidad, ms = plantillas.precompilar(app)
+    server.log.info("%s plantillas compiladas en %s ms", cantidad, ms)
+
+    tiempos = arranque.calentar_datos(app)
+    server.log.info(
+        "Caches calientes: %s",
+        ", ".join(f"{nombre} {ms} ms" for nombre, ms in tiempos.items()),
+    )
+
+
+def when_ready(server):
+    server.log.info(
+        "Listo en %s ms: %s workers x %s hilos (%s)",
+        _ms(_inicio), server.cfg.workers, server.cfg.threads, server.cfg.worker_class_str,
+    )
+
+
+def post_fork(server, worker):
+    worker.inicio_fork = time.perf_counter()
+
+
+def post_worker_init(worker):
+    import arranque
+
+    primero, caliente = arranque.calentar_worker(worker.wsgi)
+    worker.log.info(
+        "Worker %s listo en %s ms; primer request %s ms (en caliente %s ms)",
+        worker.pid, _ms(worker.inicio_fork), primero, caliente,
+    )
+
+
+def child_exit(server, worker):
+    import metricas_prom
+
+    metricas_prom.proceso_terminado(worker.pid)
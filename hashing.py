@@ -0,0 +1,135 @@
+# -------- HASH DE CONTRASEÑAS --------
+# bcrypt es CPU pura: si toda la liga entra a la vez antes del cierre de
+# pronósticos, los workers quedan calculando hashes y el resto de las
+# páginas se traba. Por eso:
+#   - el costo es configurable (BCRYPT_LOG_ROUNDS, ver bench_bcrypt.py)
+#   - los hashes se calculan en un pool de pocos hilos (bcrypt libera el
+#     GIL), con un tope de pedidos en espera; pasado el tope se responde
+#     503 enseguida en lugar de encolar sin límite
+#   - al loguearse, un hash con otro costo se recalcula con el actual
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from flask_bcrypt import Bcrypt
+
+from metricas_prom import BCRYPT_SEGUNDOS
+
+bcrypt = Bcrypt()
+
+
+class Saturado(Exception):
+    """Hay demasiados hashes en curso o esperando."""
+
+
+class PoolHash:
+    def __init__(self, hilos, cola_max):
+        self.hilos = hilos
+        self.cola_max = cola_max
+        self.calculados = 0
+        self.rechazados = 0
+        self._pid = None
+        self._crear()
+
+    def _crear(self):
+        # Como el pool de SQLite: un executor por proceso (gunicorn hace fork)
+        self._pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="bcrypt")
+        self._cupos = threading.BoundedSemaphore(self.hilos + self.cola_max)
+
+    def ejecutar(self, funcion, *args):
+        if self._pid != os.getpid():
+            self._crear()
+
+        if not self._cupos.acquire(blocking=False):
+            self.rechazados += 1
+            raise Saturado()
+
+        try:
+            futuro = self._executor.submit(funcion, *args)
+        except BaseException:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+
+        self.calculados += 1
+        return futuro.result()
+
+    def estadisticas(self):
+        return {
+            "hilos": self.hilos,
+            "cola_max": self.cola_max,
+            "calculados": self.calculados,
+            "rechazados": self.rechazados,
+        }
+
+
+def init_app(app):
+    bcrypt.init_app(app)
+    app.extensions["prode_hash"] = PoolHash(app.config["HASH_HILOS"], app.config["HASH_COLA_MAX"])
+
+    @app.errorhandler(Saturado)
+    def saturado(_):
+        return (
+            "Hay muchos ingresos al mismo tiempo, probá de nuevo en unos segundos.",
+            503,
+            {"Retry-After": "2"},
+        )
+
+
+def get_pool():
+    return current_app.extensions["prode_hash"]
+
+
+# Se mide en el hilo del pool: el tiempo de bcrypt, sin la espera en la cola
+def _generar(password):
+    with BCRYPT_SEGUNDOS.labels("generar").time():
+        return bcrypt.generate_password_hash(password)
+
+
+def _verificar(hash_guardado, password):
+    with BCRYPT_SEGUNDOS.labels("verificar").time():
+        return bcrypt.check_password_hash(hash_guardado, password)
+
+
+def generar(password):
+    return get_pool().ejecutar(_generar, password).decode("utf-8")
+
+
+def verificar(hash_guardado, password):
+    return get_pool().ejecutar(_verificar, hash_guardado, password)
+
+
+def costo(hash_guardado):
+    """Costo de un hash "$2b$12$...", o None si no tiene ese formato."""
+    partes = hash_guardado.split("$")
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def necesita_rehash(hash_guardado):
+    return costo(hash_guardado) != current_app.config["BCRYPT_LOG_ROUNDS"]
+
+
+def rehash_si_corresponde(conn, user_id, hash_guardado, password):
+    """
+    Llamar solo después de verificar la contraseña. Si el pool está
+    saturado se deja para el próximo login.
+    """
+    if not necesita_rehash(hash_guardado):
+        return False
+
+    try:
+        nuevo = generar(password)
+    except Saturado:
+        return False
+
+    # Si otro request ya lo cambió (login paralelo, cambio de clave) no se pisa
+    conn.execute(
+        "UPDATE usuarios SET password = ? WHERE id = ? AND password = ?",
+        (nuevo, user_id, hash_guardado),
+    )
+    conn.commit()
+    return True
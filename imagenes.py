@@ -0,0 +1,204 @@
+# -------- IMÁGENES RESPONSIVE --------
+# Genera variantes WebP/AVIF en varios anchos de los fondos y de las
+# imágenes de circuitos, con el hash del contenido en el nombre, y un
+# manifest que usan los helpers de Jinja para armar <picture>/srcset.
+# Como el nombre cambia con el contenido se sirven con cache "immutable".
+#
+# El fondo se genera desde el PNG sin pérdida (img/bg-circuito.png), no
+# desde el JPG: así las variantes no arrastran los artefactos de comprimir
+# dos veces. El JPG queda como respaldo en style.css.
+#
+# Uso (antes de cada deploy, o cuando se agrega una imagen):
+#   python imagenes.py
+# Sin el manifest la app anda igual, pero con las imágenes originales: al
+# arrancar lo avisa en el log.
+import hashlib
+import io
+import json
+import logging
+import os
+
+from flask import request, url_for
+from markupsafe import Markup, escape
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(BASE_DIR, "static")
+SALIDA = "optimizadas"
+MANIFEST = os.path.join(STATIC, SALIDA, "manifest.json")
+
+CARPETAS = ("img", "circuitos", "images")
+EXTENSIONES = (".png", ".jpg", ".jpeg")
+ANCHOS = (480, 960, 1440, 1920)
+FORMATOS = {
+    # formato: (extensión, opciones de Pillow)
+    "avif": ("avif", {"quality": 50}),
+    "webp": ("webp", {"quality": 75, "method": 6}),
+}
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+log = logging.getLogger("prode.imagenes")
+
+
+# -------- BUILD --------
+def _anchos_para(ancho_original):
+    anchos = [a for a in ANCHOS if a < ancho_original]
+    anchos.append(min(ancho_original, ANCHOS[-1]))
+    return anchos
+
+
+def _guardar_variante(imagen, formato, opciones, base):
+    buffer = io.BytesIO()
+    imagen.save(buffer, format=formato.upper(), **opciones)
+    datos = buffer.getvalue()
+
+    digest = hashlib.sha1(datos).hexdigest()[:10]
+    nombre = f"{SALIDA}/{base}.{digest}.{FORMATOS[formato][0]}"
+    with open(os.path.join(STATIC, nombre), "wb") as f:
+        f.write(datos)
+    return nombre, len(datos)
+
+
+def construir():
+    from PIL import Image, features
+
+    os.makedirs(os.path.join(STATIC, SALIDA), exist_ok=True)
+    formatos = [f for f in FORMATOS if features.check(f)]
+    faltantes = set(FORMATOS) - set(formatos)
+    if faltantes:
+        print(f"⚠ Pillow sin soporte para: {', '.join(sorted(faltantes))} (se omiten)")
+
+    manifest = {}
+    total_original = 0
+    total_nuevo = 0
+
+    for carpeta in CARPETAS:
+        directorio = os.path.join(STATIC, carpeta)
+        if not os.path.isdir(directorio):
+            continue
+
+        for archivo in sorted(os.listdir(directorio)):
+            if not archivo.lower().endswith(EXTENSIONES):
+                continue
+
+            origen = f"{carpeta}/{archivo}"
+            peso_original = os.path.getsize(os.path.join(STATIC, origen))
+            base = f"{carpeta}-{os.path.splitext(archivo)[0]}"
+
+            with Image.open(os.path.join(STATIC, origen)) as imagen:
+                imagen.load()
+                if imagen.mode not in ("RGB", "RGBA"):
+                    imagen = imagen.convert("RGBA" if "transparency" in imagen.info else "RGB")
+                ancho, alto = imagen.size
+
+                entrada = {"ancho": ancho, "alto": alto, "variantes": {}}
+                mejor = peso_original
+
+                for formato in formatos:
+                    variantes = []
+                    for w in _anchos_para(ancho):
+                        h = round(alto * w / ancho)
+                        copia = imagen if w == ancho else imagen.resize((w, h), Image.LANCZOS)
+                        nombre, peso = _guardar_variante(
+                            copia, formato, FORMATOS[formato][1], f"{base}.w{w}"
+                        )
+                        variantes.append([w, nombre])
+                    entrada["variantes"][formato] = variantes
+                    # La última variante es la de mayor ancho: esa se compara con el original
+                    mejor = min(mejor, peso)
+
+            manifest[origen] = entrada
+            total_original += peso_original
+            total_nuevo += mejor
+            print(f"{origen:32} {peso_original / 1024:8.0f} KB → {mejor / 1024:7.0f} KB")
+
+    with open(MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    ahorro = total_original - total_nuevo
+    print(f"\nTotal: {total_original / 1024:.0f} KB → {total_nuevo / 1024:.0f} KB "
+          f"(ahorro {ahorro / 1024:.0f} KB, "
+          f"{100 * ahorro / max(total_original, 1):.0f}%) a ancho completo")
+
+
+# -------- HELPERS PARA JINJA --------
+def _srcset(variantes):
+    return ", ".join(f"{url_for('static', filename=n)} {w}w" for w, n in variantes)
+
+
+def crear_helpers(manifest):
+
+    def imagen_responsive(path, alt="", clase="", estilo="", sizes="100vw"):
+        entrada = manifest.get(path)
+        original = url_for("static", filename=path)
+
+        atributos = f'alt="{escape(alt)}" loading="lazy" decoding="async"'
+        if clase:
+            atributos += f' class="{escape(clase)}"'
+        if estilo:
+            atributos += f' style="{escape(estilo)}"'
+
+        if not entrada:
+            return Markup(f'<img src="{original}" {atributos}>')
+
+        fuentes = "".join(
+            f'<source type="image/{formato}" srcset="{_srcset(v)}" sizes="{escape(sizes)}">'
+            for formato, v in entrada["variantes"].items()
+        )
+        return Markup(
+            f"<picture>{fuentes}"
+            f'<img src="{original}" width="{entrada["ancho"]}" height="{entrada["alto"]}" {atributos}>'
+            f"</picture>"
+        )
+
+    def fondo_responsive(path, selector="body", overlay=None):
+        """<style> con el fondo en AVIF/WebP según el ancho de pantalla."""
+        entrada = manifest.get(path)
+        if not entrada:
+            return ""
+
+        capa = f"linear-gradient({overlay}, {overlay}), " if overlay else ""
+        reglas = []
+        anchos = [w for w, _ in next(iter(entrada["variantes"].values()))]
+
+        for i, w in enumerate(anchos):
+            opciones = ", ".join(
+                f'url("{url_for("static", filename=dict(v)[w])}") type("image/{formato}")'
+                for formato, v in entrada["variantes"].items()
+            )
+            regla = f"{selector} {{ background-image: {capa}image-set({opciones}); }}"
+            if i == 0:
+                reglas.append(regla)
+            else:
+                reglas.append(f"@media (min-width: {anchos[i - 1] + 1}px) {{ {regla} }}")
+
+        return Markup("<style>" + "\n".join(reglas) + "</style>")
+
+    return {"imagen_responsive": imagen_responsive, "fondo_responsive": fondo_responsive}
+
+
+def init_app(app):
+    manifest = {}
+    if os.path.exists(MANIFEST):
+        with open(MANIFEST) as f:
+            manifest = json.load(f)
+    else:
+        log.warning(
+            "No está %s: se sirven las imágenes originales (el fondo en "
+            "tamaño completo). Correr python imagenes.py antes del deploy.",
+            os.path.relpath(MANIFEST, BASE_DIR),
+        )
+
+    app.jinja_env.globals.update(crear_helpers(manifest))
+
+    prefijo = f"{app.static_url_path}/{SALIDA}/"
+
+    @app.after_request
+    def cache_inmutable(respuesta):
+        if request.path.startswith(prefijo) and respuesta.status_code == 200:
+            respuesta.headers["Cache-Control"] = CACHE_INMUTABLE
+        return respuesta
+
+
+if __name__ == "__main__":
+    construir()
@@ -0,0 +1,162 @@
+# -------- CONSULTAS DE LAS PÁGINAS DE LECTURA --------
+# Dashboard, calendario, fecha y mis pronósticos se sirven desde app.py
+# (sqlite3, con un cursor del pool) y desde asgi.py (aiosqlite). El SQL
+# vive acá una sola vez: app.py usa las funciones de abajo y asgi.py corre
+# las mismas constantes con sus uno()/todos() async. El ranking es
+# posiciones.SQL_RANKING y la versión de datos, cache.SQL_VERSION_DATOS.
+
+SQL_CARRERA_ACTIVA = """
+    SELECT *
+    FROM carreras
+    WHERE status = 'iniciada'
+    ORDER BY fecha ASC
+    LIMIT 1
+"""
+
+SQL_CARRERA_ANTERIOR = """
+    SELECT *
+    FROM carreras
+    WHERE status = 'corrida'
+    ORDER BY fecha DESC
+    LIMIT 1
+"""
+
+SQL_PROXIMAS = """
+    SELECT *
+    FROM carreras
+    WHERE status = 'futura'
+    ORDER BY fecha ASC
+    LIMIT 4
+"""
+
+SQL_PUNTOS_CARRERA = """
+    SELECT u.nombre AS usuario,
+           p.puntos
+    FROM pronosticos p
+    JOIN usuarios u ON u.id = p.user_id
+    WHERE p.carrera_id = ?
+    ORDER BY p.puntos DESC
+"""
+
+# Parte del usuario: una sola búsqueda por índice (user_id, carrera_id)
+SQL_YA_PRONOSTICADO = """
+    SELECT 1
+    FROM pronosticos
+    WHERE user_id = ? AND carrera_id = ?
+"""
+
+SQL_CALENDARIO = """
+    SELECT id AS nro_carrera, pais, autodromo, fecha, sprint
+    FROM carreras
+    ORDER BY id ASC
+"""
+
+SQL_CARRERA = "SELECT * FROM carreras WHERE id = ?"
+
+SQL_RESULTADO = "SELECT * FROM resultados WHERE carrera_id = ?"
+
+# Pronósticos de TODOS para una carrera
+SQL_PRONOSTICOS_CARRERA = """
+    SELECT
+        u.nombre AS usuario,
+        p.pole,
+        p.sprint_ganador,
+        p.p1, p.p2, p.p3,
+        p.puntos
+    FROM pronosticos p
+    JOIN usuarios u ON u.id = p.user_id
+    WHERE p.carrera_id = ?
+    ORDER BY p.puntos DESC
+"""
+
+SQL_MIS_PRONOSTICOS = """
+    SELECT
+        c.pais,
+        c.fecha,
+
+        -- Resultado oficial
+        r.pole AS res_pole,
+        r.sprint_ganador AS res_sprint,
+        r.p1 AS res_p1,
+        r.p2 AS res_p2,
+        r.p3 AS res_p3,
+
+        -- Pronóstico del usuario
+        p.pole AS pro_pole,
+        p.sprint_ganador AS pro_sprint,
+        p.p1 AS pro_p1,
+        p.p2 AS pro_p2,
+        p.p3 AS pro_p3,
+
+        p.puntos
+    FROM pronosticos p
+    JOIN carreras c ON c.id = p.carrera_id
+    LEFT JOIN resultados r ON r.carrera_id = c.id
+    WHERE p.user_id = ?
+    ORDER BY c.fecha ASC
+"""
+
+# Para los ETag de /fecha/<id> y /mis_pronosticos (ver condicional.py)
+SQL_VERSION_PRONOSTICOS_CARRERA = "SELECT version_pronosticos FROM carreras WHERE id = ?"
+
+SQL_VERSION_PRONOSTICOS_USUARIO = "SELECT version_pronosticos FROM usuarios WHERE id = ?"
+
+
+def _uno(cur, sql, params=()):
+    cur.execute(sql, params)
+    return cur.fetchone()
+
+
+def _todos(cur, sql, params=()):
+    cur.execute(sql, params)
+    return cur.fetchall()
+
+
+def snapshot_dashboard(cur):
+    """Parte del dashboard común a todos los usuarios."""
+    carrera_activa = _uno(cur, SQL_CARRERA_ACTIVA)
+    carrera_anterior = _uno(cur, SQL_CARRERA_ANTERIOR)
+
+    pronosticos_fecha = []
+    if carrera_anterior:
+        pronosticos_fecha = _todos(cur, SQL_PUNTOS_CARRERA, (carrera_anterior["id"],))
+
+    return {
+        "carrera_activa": carrera_activa,
+        "carrera_anterior": carrera_anterior,
+        "pronosticos_fecha": pronosticos_fecha,
+        "proximas": _todos(cur, SQL_PROXIMAS),
+    }
+
+
+def ya_pronosticado(cur, user_id, carrera_id):
+    return _uno(cur, SQL_YA_PRONOSTICADO, (user_id, carrera_id)) is not None
+
+
+def calendario(cur):
+    return _todos(cur, SQL_CALENDARIO)
+
+
+def fecha(cur, carrera_id):
+    """(carrera, resultado oficial, pronósticos de todos)"""
+    return (
+        _uno(cur, SQL_CARRERA, (carrera_id,)),
+        _uno(cur, SQL_RESULTADO, (carrera_id,)),
+        _todos(cur, SQL_PRONOSTICOS_CARRERA, (carrera_id,)),
+    )
+
+
+def mis_pronosticos(cur, user_id):
+    return _todos(cur, SQL_MIS_PRONOSTICOS, (user_id,))
+
+
+def version(fila):
+    return fila["version_pronosticos"] if fila else None
+
+
+def version_pronosticos_carrera(cur, carrera_id):
+    return version(_uno(cur, SQL_VERSION_PRONOSTICOS_CARRERA, (carrera_id,)))
+
+
+def version_pronosticos_usuario(cur, user_id):
+    return version(_uno(cur, SQL_VERSION_PRONOSTICOS_USUARIO, (user_id,)))
@@ -0,0 +1,82 @@
+# -------- LÍMITE DE INTENTOS DE LOGIN --------
+# Token buckets por IP y por email, guardados en SQLite para que todos
+# los workers de gunicorn vean los mismos. Se consultan antes de buscar
+# al usuario y de correr bcrypt: un script que martilla /login recibe 429
+# sin gastar CPU en hashes.
+#
+# Cada login fallido consume una ficha; las fichas se reponen a `ritmo`
+# por segundo hasta `capacidad`. La consulta previa solo lee (no abre una
+# transacción de escritura): los logins correctos, que son casi todos el
+# día de carrera, no compiten por el lock con los pronósticos. Solo
+# escribe un fallo, y un bucket vacío ya corta antes, así que ni un ataque
+# escribe más de una vez por ficha repuesta.
+#
+# Un bucket lleno equivale a no tener fila, así que las filas vencidas se
+# borran de vez en cuando.
+import math
+import random
+import time
+
+from flask import current_app
+
+# Proporción de fallos que además limpian los buckets vencidos
+PROBABILIDAD_LIMPIEZA = 0.01
+
+
+def _buckets(ip, email):
+    """(clave, capacidad, ritmo) de cada bucket que cuenta para este intento."""
+    config = current_app.config
+    return [
+        ("ip:" + (ip or "?"), *config["LOGIN_LIMITE_IP"]),
+        ("email:" + email.strip().lower(), *config["LOGIN_LIMITE_EMAIL"]),
+    ]
+
+
+def espera_login(conn, ip, email):
+    """
+    Antes de intentar el login. Devuelve None si puede seguir, o los
+    segundos a esperar si alguno de los buckets se quedó sin fichas.
+    """
+    buckets = _buckets(ip, email)
+    ahora = time.time()
+
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT clave, fichas, actualizado FROM limites_login WHERE clave IN (?, ?)",
+        [clave for clave, _, _ in buckets],
+    )
+    guardados = {clave: (fichas, actualizado) for clave, fichas, actualizado in cur.fetchall()}
+
+    espera = 0
+    for clave, capacidad, ritmo in buckets:
+        if clave not in guardados:
+            continue
+        fichas, actualizado = guardados[clave]
+        fichas = min(capacidad, fichas + (ahora - actualizado) * ritmo)
+        if fichas < 1:
+            espera = max(espera, math.ceil((1 - fichas) / ritmo))
+
+    return espera or None
+
+
+def _consumir(cur, clave, capacidad, ritmo, ahora):
+    cur.execute("""
+        INSERT INTO limites_login (clave, fichas, actualizado, expira)
+        VALUES (:clave, :capacidad - 1, :ahora, :ahora + (:capacidad + 1) / :ritmo)
+        ON CONFLICT(clave) DO UPDATE SET
+            fichas = MAX(-1, MIN(:capacidad, fichas + (:ahora - actualizado) * :ritmo) - 1),
+            actualizado = :ahora,
+            expira = :ahora + (:capacidad + 1) / :ritmo
+    """, {"clave": clave, "capacidad": capacidad, "ritmo": ritmo, "ahora": ahora})
+
+
+def fallo_login(conn, ip, email):
+    """Registra un login fallido: descuenta una ficha de cada bucket."""
+    ahora = time.time()
+    with conn:
+        cur = conn.cursor()
+        for clave, capacidad, ritmo in _buckets(ip, email):
+            _consumir(cur, clave, capacidad, ritmo, ahora)
+
+        if random.random() < PROBABILIDAD_LIMPIEZA:
+            cur.execute("DELETE FROM limites_login WHERE expira < ?", (ahora,))
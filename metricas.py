@@ -0,0 +1,247 @@
+# -------- MÉTRICAS POR REQUEST --------
+# Para cada request se mide: tiempo total, tiempo dentro de SQLite,
+# cantidad de consultas, filas leídas y tiempo de render de Jinja.
+#
+#   - Las conexiones del pool (db.py) tienen un trace callback de sqlite3
+#     que anota cada sentencia que corre (también las de executemany y los
+#     BEGIN/COMMIT implícitos), y un cursor que mide cuánto tarda cada
+#     execute y cada fetch y cuántas filas devuelve.
+#   - El render se mide con las señales before_render_template y
+#     template_rendered de Flask.
+#
+# Los agregados son por ruta y por worker, sobre una ventana de los
+# últimos METRICAS_VENTANA requests de cada ruta: se ven en /admin/metrics.
+# Los requests que pasan METRICAS_LENTO_MS van al log "prode.lentos" con
+# sus consultas más caras, y los últimos quedan también en la página.
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from flask import (
+    before_render_template, current_app, g, request, template_rendered,
+)
+
+import metricas_prom
+
+log_lentos = logging.getLogger("prode.lentos")
+
+# Sentencias guardadas por request (para el log de lentos)
+MAX_CONSULTAS = 200
+
+# Clave del environ de los requests internos de arranque.py: no se miden
+CALENTAMIENTO = "prode.calentamiento"
+
+
+class Medicion:
+    """Lo que pasó en un request. Vive en g.medicion."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.filas = 0
+        self.cantidad = 0
+        # [sql, ms, filas] de cada sentencia, en orden
+        self.consultas = []
+        self._render_inicio = []
+
+    def sentencia(self, sql):
+        """Trace callback: arranca una sentencia."""
+        self.cantidad += 1
+        if len(self.consultas) < MAX_CONSULTAS:
+            self.consultas.append([sql, 0.0, 0])
+
+    def tiempo(self, ms, filas=0):
+        """Tiempo y filas de la última sentencia (execute o fetch)."""
+        self.sql_ms += ms
+        self.filas += filas
+        if self.consultas:
+            self.consultas[-1][1] += ms
+            self.consultas[-1][2] += filas
+
+    def mas_caras(self, cantidad=5):
+        return sorted(self.consultas, key=lambda c: c[1], reverse=True)[:cantidad]
+
+
+class Ruta:
+    """Agregados de una ruta sobre la ventana de sus últimos requests."""
+
+    def __init__(self, ventana):
+        self.total = 0
+        self.errores = 0
+        # (total_ms, sql_ms, consultas, filas, render_ms)
+        self.muestras = deque(maxlen=ventana)
+
+    def agregar(self, muestra, error):
+        self.total += 1
+        self.errores += error
+        self.muestras.append(muestra)
+
+    def resumen(self):
+        tiempos = sorted(m[0] for m in self.muestras)
+        n = len(tiempos)
+
+        def percentil(p):
+            return round(tiempos[min(n - 1, int(n * p))], 1)
+
+        def promedio(i):
+            return round(sum(m[i] for m in self.muestras) / n, 1)
+
+        return {
+            "requests": self.total,
+            "errores": self.errores,
+            "p50": percentil(0.50),
+            "p95": percentil(0.95),
+            "p99": percentil(0.99),
+            "max": round(tiempos[-1], 1),
+            "sql_ms": promedio(1),
+            "consultas": promedio(2),
+            "filas": promedio(3),
+            "render_ms": promedio(4),
+        }
+
+
+class Registro:
+    """Agregados por ruta y últimos requests lentos de este worker."""
+
+    def __init__(self, ventana=500, lento_ms=500, max_lentos=50):
+        self.ventana = ventana
+        self.lento_ms = lento_ms
+        self.desde = time.time()
+        self._rutas = {}
+        self._lentos = deque(maxlen=max_lentos)
+        self._lock = threading.Lock()
+
+    def registrar(self, clave, medicion, status):
+        total_ms = (time.perf_counter() - medicion.inicio) * 1000
+        muestra = (
+            total_ms, medicion.sql_ms, medicion.cantidad,
+            medicion.filas, medicion.render_ms,
+        )
+        with self._lock:
+            ruta = self._rutas.get(clave)
+            if ruta is None:
+                ruta = self._rutas[clave] = Ruta(self.ventana)
+            ruta.agregar(muestra, status >= 500)
+
+        if total_ms >= self.lento_ms:
+            self._lento(clave, medicion, status, total_ms)
+        return total_ms
+
+    def _lento(self, clave, medicion, status, total_ms):
+        caras = medicion.mas_caras()
+        with self._lock:
+            self._lentos.append({
+                "hora": time.strftime("%H:%M:%S"),
+                "ruta": clave,
+                "url": request.full_path.rstrip("?"),
+                "status": status,
+                "total_ms": round(total_ms, 1),
+                "sql_ms": round(medicion.sql_ms, 1),
+                "consultas": medicion.cantidad,
+                "render_ms": round(medicion.render_ms, 1),
+                "sql": [(sql, round(ms, 1), filas) for sql, ms, filas in caras],
+            })
+
+        log_lentos.warning(
+            "%s %s %s en %.0f ms (SQL %.0f ms en %s consultas, render %.0f ms)%s",
+            clave, request.full_path.rstrip("?"), status, total_ms,
+            medicion.sql_ms, medicion.cantidad, medicion.render_ms,
+            "".join(f"\n    {ms:7.1f} ms {filas:6} filas  {' '.join(sql.split())}"
+                    for sql, ms, filas in caras),
+        )
+
+    def rutas(self):
+        with self._lock:
+            resumen = {clave: ruta.resumen() for clave, ruta in self._rutas.items()}
+        return sorted(resumen.items(), key=lambda r: r[1]["p95"], reverse=True)
+
+    def lentos(self):
+        with self._lock:
+            return list(reversed(self._lentos))
+
+    def reiniciar(self):
+        with self._lock:
+            self._rutas.clear()
+            self._lentos.clear()
+            self.desde = time.time()
+
+
+def medicion_actual():
+    return g.get("medicion")
+
+
+# -------- INTEGRACIÓN CON FLASK --------
+def init_app(app):
+    """Llamar antes de registrar otros before_request: así se mide todo."""
+    registro = app.extensions["prode_metricas"] = Registro(
+        ventana=app.config.get("METRICAS_VENTANA", 500),
+        lento_ms=app.config.get("METRICAS_LENTO_MS", 500),
+    )
+
+    @app.before_request
+    def empezar_medicion():
+        g.medicion = Medicion()
+        # Si la conexión ya se pidió (no debería), que también se mida
+        if "db" in g:
+            g.db.medicion = g.medicion
+
+    @app.teardown_request
+    def terminar_medicion(exc=None):
+        medicion = g.pop("medicion", None)
+        if (
+            medicion is None
+            or request.endpoint == "static"
+            or request.environ.get(CALENTAMIENTO)
+        ):
+            return
+        if "db" in g:
+            g.db.medicion = None
+        status = 500 if exc is not None else g.pop("status_respuesta", 200)
+        regla = request.url_rule.rule if request.url_rule else "(sin ruta)"
+        total_ms = registro.registrar(f"{request.method} {regla}", medicion, status)
+
+        # Los mismos datos, sumados entre workers, para /metrics
+        metricas_prom.observar_request(
+            request.method, regla, request.endpoint, status, total_ms / 1000
+        )
+        if metricas_prom.es_bloqueo(exc):
+            metricas_prom.BLOQUEOS.labels("request").inc()
+
+    @app.after_request
+    def anotar_status(respuesta):
+        g.status_respuesta = respuesta.status_code
+        return respuesta
+
+    def antes_de_render(sender, template, context, **extra):
+        medicion = medicion_actual()
+        if medicion is not None:
+            medicion._render_inicio.append(time.perf_counter())
+
+    def despues_de_render(sender, template, context, **extra):
+        medicion = medicion_actual()
+        if medicion is not None and medicion._render_inicio:
+            inicio = medicion._render_inicio.pop()
+            medicion.render_ms += (time.perf_counter() - inicio) * 1000
+
+    before_render_template.connect(antes_de_render, app, weak=False)
+    template_rendered.connect(despues_de_render, app, weak=False)
+
+
+def get_registro():
+    return current_app.extensions["prode_metricas"]
+
+
+def estado():
+    """Datos para /admin/metrics."""
+    registro = get_registro()
+    return {
+        "pid": os.getpid(),
+        "desde": time.strftime("%d/%m %H:%M:%S", time.localtime(registro.desde)),
+        "ventana": registro.ventana,
+        "lento_ms": registro.lento_ms,
+        "rutas": registro.rutas(),
+        "lentos": registro.lentos(),
+    }
@@ -0,0 +1,97 @@
+# -------- MÉTRICAS PARA PROMETHEUS (/metrics) --------
+# Histogramas y contadores para alertas, en el formato de texto de
+# Prometheus. A diferencia de /admin/metrics (metricas.py, por worker),
+# acá los valores son de todo el servidor:
+#
+#   Con gunicorn, gunicorn.conf.py define PROMETHEUS_MULTIPROC_DIR (y la
+#   vacía) antes de cargar la app: tiene que estar antes de importar
+#   prometheus_client. Cada worker escribe sus contadores en archivos mmap
+#   propios (una suma en memoria compartida, sin locks entre procesos ni
+#   IPC: casi gratis en el camino caliente) y /metrics suma los archivos
+#   de todos los workers, vivos y muertos. Sin esa variable (python app.py)
+#   se usa el registro normal del proceso.
+#
+# Rutas: la regla de Flask (/fecha/<int:carrera_id>), no la URL, así la
+# cantidad de series no crece con los ids. /metrics pide
+# "Authorization: Bearer <METRICAS_TOKEN>"; sin token configurado responde
+# 403 a todos (como /admin/metrics sin sesión de admin).
+import hmac
+import os
+import sqlite3
+
+from flask import Response, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+# Hasta 10 s: /stream y /stream/poll quedan fuera (ver SIN_LATENCIA)
+BUCKETS_REQUEST = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_SEGUNDOS = Histogram(
+    "prode_request_segundos", "Duración de los requests por ruta",
+    ["metodo", "ruta"], buckets=BUCKETS_REQUEST,
+)
+REQUESTS = Counter(
+    "prode_requests", "Requests por ruta y status",
+    ["metodo", "ruta", "status"],
+)
+BLOQUEOS = Counter(
+    "prode_sqlite_bloqueado", 'Errores "database is locked" (reintentados o no)',
+    ["origen"],
+)
+ESPERA_ESCRITURA = Histogram(
+    "prode_sqlite_espera_escritura_segundos",
+    "Espera del lock de escritura de SQLite (BEGIN IMMEDIATE del escritor)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PUNTUACION_SEGUNDOS = Histogram(
+    "prode_puntuacion_segundos", "Duración de puntuar una carrera (o la temporada)",
+    ["carrera"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+BCRYPT_SEGUNDOS = Histogram(
+    "prode_bcrypt_segundos", "Duración de cada hash o verificación de bcrypt",
+    ["operacion"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+# Conexiones abiertas por minutos: no sirven en un histograma de latencia
+SIN_LATENCIA = {"stream", "stream_poll"}
+
+
+def es_bloqueo(error):
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+def observar_request(metodo, ruta, endpoint, status, segundos):
+    REQUESTS.labels(metodo, ruta, str(status)).inc()
+    if endpoint not in SIN_LATENCIA:
+        REQUEST_SEGUNDOS.labels(metodo, ruta).observe(segundos)
+
+
+def exportar():
+    """Texto para Prometheus, sumando todos los workers si hay multiproceso."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro)
+
+
+def init_app(app):
+    token = app.config.get("METRICAS_TOKEN")
+    esperado = f"Bearer {token}".encode()
+
+    @app.route("/metrics")
+    def metrics():
+        enviado = request.headers.get("Authorization", "").encode()
+        if not token or not hmac.compare_digest(enviado, esperado):
+            return "Acceso denegado", 403
+        return Response(exportar(), content_type=CONTENT_TYPE_LATEST)
+
+
+def proceso_terminado(pid):
+    """Hook child_exit de gunicorn: cierra los archivos del worker que murió."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
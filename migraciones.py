@@ -0,0 +1,322 @@
+# -------- MIGRACIONES DE ESQUEMA --------
+# Reemplaza a los scripts sueltos (agregar_col_*.py, alter_*.py, ...).
+# La versión del esquema se guarda en PRAGMA user_version y cada
+# migración pendiente se aplica en orden, todas en una sola transacción.
+#
+# Uso:
+#   python migraciones.py            aplica las pendientes sobre config.DATABASE
+#   python migraciones.py --estado   muestra la versión actual
+#
+# Las migraciones tienen que poder correr sobre bases viejas que ya
+# tienen parte de los cambios (por eso CREATE ... IF NOT EXISTS y
+# agregar_columna, que no falla si la columna ya existe).
+import sqlite3
+import sys
+
+import posiciones
+
+
+def agregar_columna(cur, tabla, columna, definicion):
+    cur.execute(f"PRAGMA table_info({tabla})")
+    if columna not in {c[1] for c in cur.fetchall()}:
+        cur.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+
+# 1 – esquema base (el que hoy tiene prode.db)
+def m001_esquema_base(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            fecha_registro TEXT,
+            admin INTEGER DEFAULT 0,
+            avatar TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS carreras (
+            id INTEGER PRIMARY KEY,
+            pais TEXT,
+            autodromo TEXT,
+            fecha TEXT,
+            sprint INTEGER,
+            pronostico_abierto INTEGER DEFAULT 1,
+            clasificacion_iniciada INTEGER DEFAULT 0,
+            info_fecha TEXT,
+            fecha_clasificacion TEXT,
+            fecha_limite_pronostico TEXT,
+            imagen TEXT,
+            status TEXT DEFAULT 'futura'
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS pilotos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            equipo TEXT,
+            nacionalidad TEXT,
+            dorsal INTEGER
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resultados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            carrera_id INTEGER UNIQUE,
+            pole TEXT,
+            sprint_ganador TEXT,
+            p1 TEXT,
+            p2 TEXT,
+            p3 TEXT,
+            FOREIGN KEY (carrera_id) REFERENCES carreras(id)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS pronosticos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            carrera_id INTEGER NOT NULL,
+            pole TEXT,
+            sprint_ganador TEXT,
+            p1 TEXT,
+            p2 TEXT,
+            p3 TEXT,
+            puntos INTEGER DEFAULT 0,
+            UNIQUE(user_id, carrera_id)
+        )
+    """)
+
+
+# 2 – contador global de versión de datos (cache.py)
+def m002_version_datos(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS version_datos (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO version_datos (id, version) VALUES (1, 1)")
+
+
+# 3 – revisión de resultados y pronósticos pendientes (puntos.py)
+def m003_revision_puntos(cur):
+    agregar_columna(cur, "resultados", "revision", "INTEGER DEFAULT 1")
+    agregar_columna(cur, "resultados", "revision_puntuada", "INTEGER")
+    agregar_columna(cur, "pronosticos", "pendiente", "INTEGER DEFAULT 1")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pronosticos_pendiente
+        ON pronosticos (carrera_id) WHERE pendiente = 1
+    """)
+
+
+# 4 – tabla de posiciones materializada (posiciones.py)
+def m004_posiciones(cur):
+    cur.execute(posiciones.SQL_CREAR)
+    cur.execute(posiciones.SQL_INDICE)
+    cur.execute("SELECT 1 FROM posiciones LIMIT 1")
+    if cur.fetchone() is None:
+        posiciones.llenar(cur)
+
+
+# 5 – índices para los predicados más usados
+#     (pronosticos.user_id ya lo cubre el índice de UNIQUE(user_id, carrera_id))
+def m005_indices(cur):
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_carreras_status_fecha
+        ON carreras (status, fecha)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pronosticos_carrera_puntos
+        ON pronosticos (carrera_id, puntos)
+    """)
+
+
+# 6 – pronosticos/resultados guardan el id del piloto en lugar del nombre.
+#     Los nombres que no están en pilotos (mal escritos, pilotos que ya no
+#     corren) se agregan a pilotos para no perder el historial.
+SLOTS_PILOTO = ("pole", "sprint_ganador", "p1", "p2", "p3")
+
+
+def _id_piloto(columna):
+    return f"""(
+        SELECT MIN(pl.id) FROM pilotos pl
+        WHERE pl.nombre = NULLIF(TRIM(t.{columna}), '')
+    )"""
+
+
+def m006_pilotos_por_id(cur):
+    nombres = " UNION ".join(
+        f"SELECT TRIM({c}) AS nombre FROM {tabla}"
+        for tabla in ("pronosticos", "resultados")
+        for c in SLOTS_PILOTO
+    )
+    cur.execute(f"""
+        INSERT INTO pilotos (nombre)
+        SELECT nombre FROM ({nombres})
+        WHERE nombre IS NOT NULL AND nombre <> ''
+          AND nombre NOT IN (SELECT nombre FROM pilotos)
+    """)
+
+    ids = ", ".join(_id_piloto(c) for c in SLOTS_PILOTO)
+
+    cur.execute("""
+        CREATE TABLE pronosticos_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            carrera_id INTEGER NOT NULL,
+            pole INTEGER REFERENCES pilotos(id),
+            sprint_ganador INTEGER REFERENCES pilotos(id),
+            p1 INTEGER REFERENCES pilotos(id),
+            p2 INTEGER REFERENCES pilotos(id),
+            p3 INTEGER REFERENCES pilotos(id),
+            puntos INTEGER DEFAULT 0,
+            pendiente INTEGER DEFAULT 1,
+            UNIQUE(user_id, carrera_id)
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO pronosticos_nueva
+            (id, user_id, carrera_id, pole, sprint_ganador, p1, p2, p3, puntos, pendiente)
+        SELECT id, user_id, carrera_id, {ids}, puntos, pendiente
+        FROM pronosticos t
+    """)
+    cur.execute("DROP TABLE pronosticos")
+    cur.execute("ALTER TABLE pronosticos_nueva RENAME TO pronosticos")
+    cur.execute("""
+        CREATE INDEX idx_pronosticos_pendiente
+        ON pronosticos (carrera_id) WHERE pendiente = 1
+    """)
+    cur.execute("""
+        CREATE INDEX idx_pronosticos_carrera_puntos
+        ON pronosticos (carrera_id, puntos)
+    """)
+
+    cur.execute("""
+        CREATE TABLE resultados_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            carrera_id INTEGER UNIQUE,
+            pole INTEGER REFERENCES pilotos(id),
+            sprint_ganador INTEGER REFERENCES pilotos(id),
+            p1 INTEGER REFERENCES pilotos(id),
+            p2 INTEGER REFERENCES pilotos(id),
+            p3 INTEGER REFERENCES pilotos(id),
+            revision INTEGER DEFAULT 1,
+            revision_puntuada INTEGER,
+            FOREIGN KEY (carrera_id) REFERENCES carreras(id)
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO resultados_nueva
+            (id, carrera_id, pole, sprint_ganador, p1, p2, p3, revision, revision_puntuada)
+        SELECT id, carrera_id, {ids}, revision, revision_puntuada
+        FROM resultados t
+    """)
+    cur.execute("DROP TABLE resultados")
+    cur.execute("ALTER TABLE resultados_nueva RENAME TO resultados")
+
+
+# 7 – versión de los pronósticos de cada usuario (ETag de /mis_pronosticos)
+def m007_version_pronosticos(cur):
+    agregar_columna(cur, "usuarios", "version_pronosticos", "INTEGER NOT NULL DEFAULT 0")
+
+
+# 8 – buckets de intentos de login, compartidos entre workers (limites.py)
+def m008_limites_login(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS limites_login (
+            clave TEXT PRIMARY KEY,
+            fichas REAL NOT NULL,
+            actualizado REAL NOT NULL,
+            expira REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_limites_login_expira
+        ON limites_login (expira)
+    """)
+
+
+# 9 – tokens de "Recordarme" por dispositivo (recordarme.py)
+def m009_dispositivos(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dispositivos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES usuarios(id),
+            selector TEXT UNIQUE NOT NULL,
+            hash_validador TEXT NOT NULL,
+            creado TEXT,
+            usado TEXT,
+            expira REAL NOT NULL,
+            agente TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_dispositivos_usuario
+        ON dispositivos (user_id, expira)
+    """)
+
+
+# 10 – versión de los pronósticos de cada carrera (ETag de /fecha/<id>)
+def m010_version_pronosticos_carrera(cur):
+    agregar_columna(cur, "carreras", "version_pronosticos", "INTEGER NOT NULL DEFAULT 0")
+
+
+MIGRACIONES = [
+    m001_esquema_base,
+    m002_version_datos,
+    m003_revision_puntos,
+    m004_posiciones,
+    m005_indices,
+    m006_pilotos_por_id,
+    m007_version_pronosticos,
+    m008_limites_login,
+    m009_dispositivos,
+    m010_version_pronosticos_carrera,
+]
+
+
+def version_esquema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn):
+    """Aplica las migraciones pendientes. Devuelve la lista de las aplicadas."""
+    actual = version_esquema(conn)
+    pendientes = list(enumerate(MIGRACIONES, start=1))[actual:]
+    if not pendientes:
+        return []
+
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        # Otro worker pudo haber migrado mientras esperábamos el lock
+        actual = version_esquema(conn)
+        pendientes = list(enumerate(MIGRACIONES, start=1))[actual:]
+
+        for numero, migracion in pendientes:
+            migracion(cur)
+            cur.execute(f"PRAGMA user_version = {numero}")
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return [m.__name__ for _, m in pendientes]
+
+
+if __name__ == "__main__":
+    from config import DATABASE
+
+    conn = sqlite3.connect(DATABASE)
+
+    if "--estado" in sys.argv:
+        print(f"Esquema en versión {version_esquema(conn)} de {len(MIGRACIONES)}")
+    else:
+        aplicadas = migrar(conn)
+        for nombre in aplicadas:
+            print(f"✔ {nombre}")
+        print(f"Esquema en versión {version_esquema(conn)}")
+
+    conn.close()
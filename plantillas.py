@@ -0,0 +1,46 @@
+# -------- PLANTILLAS EN MODO PRODUCCIÓN --------
+# Jinja compila cada plantilla (parseo + generación de código Python) la
+# primera vez que se usa, en cada worker y después de cada reinicio. Con
+# un FileSystemBytecodeCache el código compilado queda en disco
+# (config.JINJA_CACHE_DIR) y lo reusan todos los workers y reinicios: solo
+# se recompila una plantilla cuando cambia su contenido. Jinja escribe los
+# archivos de forma atómica, así que varios workers pueden compartirlo.
+#
+# Fuera de desarrollo (PRODE_DESARROLLO=1) no se revisa en cada render si
+# la plantilla cambió en disco (auto-reload apagado).
+#
+# Precompilar todo templates/ (por ejemplo en el deploy):
+#   python plantillas.py
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_app(app):
+    carpeta = app.config["JINJA_CACHE_DIR"]
+    os.makedirs(carpeta, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(carpeta)
+    app.jinja_env.auto_reload = app.config["TEMPLATES_AUTO_RELOAD"]
+
+
+def precompilar(app):
+    """
+    Compila todas las plantillas .html: quedan en el cache de Jinja del
+    proceso y en el bytecode cache en disco. (cantidad, ms)
+    """
+    inicio = time.perf_counter()
+    nombres = app.jinja_env.list_templates(extensions=["html"])
+    for nombre in nombres:
+        app.jinja_env.get_template(nombre)
+    return len(nombres), round((time.perf_counter() - inicio) * 1000, 1)
+
+
+if __name__ == "__main__":
+    from app import app
+
+    antes = len(os.listdir(app.config["JINJA_CACHE_DIR"]))
+    cantidad, ms = precompilar(app)
+    nuevas = len(os.listdir(app.config["JINJA_CACHE_DIR"])) - antes
+    print(f"{cantidad} plantillas en {ms} ms ({nuevas} compiladas, "
+          f"{cantidad - nuevas} ya estaban en {app.config['JINJA_CACHE_DIR']})")
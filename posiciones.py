@@ -0,0 +1,166 @@
+# -------- TABLA DE POSICIONES MATERIALIZADA --------
+# /ranking lee de esta tabla en lugar de sumar todo el historial de
+# pronósticos en cada visita. Se actualiza al puntuar (solo los usuarios
+# afectados) y se puede reconstruir completa desde pronosticos.
+#
+# La tabla la crea migraciones.py. Las funciones de actualización no
+# hacen commit: corren dentro de la transacción de quien puntúa.
+
+SQL_CREAR = """
+CREATE TABLE IF NOT EXISTS posiciones (
+    user_id INTEGER PRIMARY KEY,
+    nombre TEXT,
+    puntos INTEGER NOT NULL DEFAULT 0,
+    posicion INTEGER,
+    carreras_jugadas INTEGER NOT NULL DEFAULT 0,
+    aciertos_exactos INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+SQL_INDICE = """
+CREATE INDEX IF NOT EXISTS idx_posiciones_posicion
+ON posiciones (posicion, nombre)
+"""
+
+# Agregado por usuario desde pronosticos. Solo cuentan como jugadas
+# las carreras que ya tienen resultado.
+SQL_AGREGADO = """
+    SELECT
+        u.id AS user_id,
+        u.nombre,
+        COALESCE(SUM(p.puntos), 0) AS puntos,
+        COUNT(r.carrera_id) AS carreras_jugadas,
+        COALESCE(SUM(
+            CASE WHEN r.carrera_id IS NULL THEN 0
+                 ELSE (p.p1 IS r.p1) + (p.p2 IS r.p2) + (p.p3 IS r.p3)
+            END
+        ), 0) AS aciertos_exactos
+    FROM usuarios u
+    LEFT JOIN pronosticos p ON p.user_id = u.id
+    LEFT JOIN resultados r ON r.carrera_id = p.carrera_id
+    WHERE {filtro}
+    GROUP BY u.id
+"""
+
+# Filtros de SQL_AGREGADO: los que pronosticaron una carrera, los de la
+# tabla temporal que arma actualizar_usuarios(), o todos (reconstrucción)
+FILTRO_CARRERA = "u.id IN (SELECT user_id FROM pronosticos WHERE carrera_id = ?)"
+FILTRO_AFECTADOS = "u.id IN (SELECT user_id FROM temp.usuarios_afectados)"
+FILTRO_TODOS = "1 = 1"
+
+SQL_UPSERT = """
+    INSERT INTO posiciones (user_id, nombre, puntos, carreras_jugadas, aciertos_exactos)
+    {agregado}
+    ON CONFLICT(user_id) DO UPDATE SET
+        nombre = excluded.nombre,
+        puntos = excluded.puntos,
+        carreras_jugadas = excluded.carreras_jugadas,
+        aciertos_exactos = excluded.aciertos_exactos
+    WHERE posiciones.nombre IS NOT excluded.nombre
+       OR posiciones.puntos IS NOT excluded.puntos
+       OR posiciones.carreras_jugadas IS NOT excluded.carreras_jugadas
+       OR posiciones.aciertos_exactos IS NOT excluded.aciertos_exactos
+"""
+
+# Posición con empates (1, 1, 3, ...); solo reescribe las que cambian
+SQL_POSICIONES = """
+    UPDATE posiciones
+    SET posicion = r.posicion
+    FROM (
+        SELECT user_id, RANK() OVER (ORDER BY puntos DESC) AS posicion
+        FROM posiciones
+    ) AS r
+    WHERE r.user_id = posiciones.user_id
+      AND posiciones.posicion IS NOT r.posicion
+"""
+
+
+def _actualizar(cur, filtro, params=()):
+    agregado = SQL_AGREGADO.format(filtro=filtro)
+    cur.execute(SQL_UPSERT.format(agregado=agregado), params)
+    cur.execute(SQL_POSICIONES)
+
+
+def actualizar_carrera(conn, carrera_id):
+    """Recalcula solo a los usuarios que pronosticaron esta carrera."""
+    _actualizar(conn.cursor(), FILTRO_CARRERA, (carrera_id,))
+
+
+def actualizar_usuarios(conn, user_ids):
+    cur = conn.cursor()
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS usuarios_afectados (user_id INTEGER PRIMARY KEY)")
+    cur.execute("DELETE FROM temp.usuarios_afectados")
+    cur.executemany(
+        "INSERT OR IGNORE INTO temp.usuarios_afectados (user_id) VALUES (?)",
+        [(u,) for u in user_ids],
+    )
+    _actualizar(cur, FILTRO_AFECTADOS)
+
+
+def quitar_usuario(conn, user_id):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM posiciones WHERE user_id = ?", (user_id,))
+    cur.execute(SQL_POSICIONES)
+
+
+def renombrar_usuario(conn, user_id, nombre):
+    conn.execute(
+        "UPDATE posiciones SET nombre = ? WHERE user_id = ?",
+        (nombre, user_id),
+    )
+
+
+def llenar(cur):
+    _actualizar(cur, FILTRO_TODOS)
+
+
+def reconstruir(conn):
+    """Reconstruye toda la tabla desde pronosticos."""
+    with conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM posiciones")
+        llenar(cur)
+
+
+def verificar(conn):
+    """
+    Compara la tabla con el agregado real y la reconstruye si difieren.
+    Devuelve la cantidad de filas inconsistentes encontradas.
+    """
+    cur = conn.cursor()
+    agregado = SQL_AGREGADO.format(filtro=FILTRO_TODOS)
+    columnas = "user_id, nombre, puntos, carreras_jugadas, aciertos_exactos"
+
+    cur.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT * FROM ({agregado})
+            EXCEPT
+            SELECT {columnas} FROM posiciones
+            UNION ALL
+            SELECT * FROM (
+                SELECT {columnas} FROM posiciones
+                EXCEPT
+                SELECT * FROM ({agregado})
+            )
+        )
+    """)
+    diferencias = cur.fetchone()[0]
+
+    if diferencias:
+        reconstruir(conn)
+
+    return diferencias
+
+
+# También la usa la vista async de asgi.py
+SQL_RANKING = """
+    SELECT user_id, nombre, puntos, posicion,
+           carreras_jugadas, aciertos_exactos
+    FROM posiciones
+    ORDER BY posicion, nombre
+"""
+
+
+def obtener_ranking(cur):
+    cur.execute(SQL_RANKING)
+    return cur.fetchall()
@@ -0,0 +1,113 @@
+# -------- GUARDADO DE PRONÓSTICOS --------
+# guardar_pronostico corre en el escritor agrupado (escritor.py): recibe
+# el cursor del lote, no usa nada de Flask.
+#
+# Cada formulario lleva una clave de idempotencia; un reenvío con la misma
+# clave (doble click, reintento del navegador) no vuelve a escribir.
+import threading
+from collections import OrderedDict
+
+
+def guardar_pronostico(cur, user_id, carrera_id, pole, sprint_ganador, p1, p2, p3):
+    """Un solo INSERT ... ON CONFLICT. Devuelve True si cambió algo."""
+    cur.execute("""
+        INSERT INTO pronosticos
+            (user_id, carrera_id, pole, sprint_ganador, p1, p2, p3)
+        VALUES (:user_id, :carrera_id, :pole, :sprint_ganador, :p1, :p2, :p3)
+        ON CONFLICT(user_id, carrera_id) DO UPDATE SET
+            pole = excluded.pole,
+            sprint_ganador = excluded.sprint_ganador,
+            p1 = excluded.p1,
+            p2 = excluded.p2,
+            p3 = excluded.p3,
+            pendiente = 1
+        WHERE pole IS NOT excluded.pole
+           OR sprint_ganador IS NOT excluded.sprint_ganador
+           OR p1 IS NOT excluded.p1
+           OR p2 IS NOT excluded.p2
+           OR p3 IS NOT excluded.p3
+    """, {
+        "user_id": user_id, "carrera_id": carrera_id, "pole": pole,
+        "sprint_ganador": sprint_ganador, "p1": p1, "p2": p2, "p3": p3,
+    })
+    if cur.rowcount == 0:
+        return False
+
+    # Invalida el ETag de /mis_pronosticos de este usuario y el de
+    # /fecha/<id>, que lista los pronósticos de todos
+    cur.execute("""
+        UPDATE usuarios
+        SET version_pronosticos = version_pronosticos + 1
+        WHERE id = ?
+    """, (user_id,))
+    cur.execute("""
+        UPDATE carreras
+        SET version_pronosticos = version_pronosticos + 1
+        WHERE id = ?
+    """, (carrera_id,))
+    return True
+
+
+class _Intento:
+    """El primer request con una clave: cuándo terminó y si commiteó."""
+
+    __slots__ = ("listo", "ok")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.ok = None
+
+
+class ClavesIdempotencia:
+    """
+    Claves de formulario ya guardadas (o en proceso) en este worker.
+    Si el reenvío cae en otro worker igual es inofensivo: el upsert no
+    escribe nada cuando los datos no cambiaron.
+
+    Solo cuenta como procesada una clave cuyo guardado se commiteó: si el
+    primero falla, la clave se libera y el reenvío la vuelve a procesar.
+    """
+
+    def __init__(self, maximo=10_000):
+        self.maximo = maximo
+        self._claves = OrderedDict()
+        self._lock = threading.Lock()
+        self.repetidas = 0
+
+    def procesada(self, clave):
+        with self._lock:
+            intento = self._claves.get(clave)
+            if intento is not None and intento.ok:
+                self.repetidas += 1
+                return True
+        return False
+
+    def reclamar(self, clave):
+        """
+        None si la clave está libre (el que llama la procesa y después
+        llama a terminar); si no, el intento en curso para pasarle a esperar.
+        """
+        with self._lock:
+            intento = self._claves.get(clave)
+            if intento is not None:
+                self.repetidas += 1
+                return intento
+
+            self._claves[clave] = _Intento()
+            while len(self._claves) > self.maximo:
+                self._claves.popitem(last=False)
+            return None
+
+    @staticmethod
+    def esperar(intento, timeout):
+        """True si el primero commiteó, False si falló, None si no terminó a tiempo."""
+        if not intento.listo.wait(timeout):
+            return None
+        return intento.ok
+
+    def terminar(self, clave, ok=True):
+        with self._lock:
+            intento = self._claves.get(clave) if ok else self._claves.pop(clave, None)
+        if intento is not None:
+            intento.ok = ok
+            intento.listo.set()
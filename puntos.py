@@ -0,0 +1,131 @@
+# -------- MOTOR DE PUNTOS --------
+# Reglas:
+#   pole acertada            -> 2
+#   ganador sprint acertado  -> 2 (solo si la carrera tuvo sprint)
+#   puesto de podio exacto   -> 3
+#   en el podio, otro puesto -> 1
+
+import cache
+import posiciones
+from metricas_prom import PUNTUACION_SEGUNDOS
+
+PUNTOS_POLE = 2
+PUNTOS_SPRINT = 2
+PUNTOS_PODIO_EXACTO = 3
+PUNTOS_PODIO = 1
+
+
+def calcular_puntos(pronostico, resultado):
+    """Puntos de un pronóstico, fila por fila (referencia de las reglas)."""
+    puntos = 0
+    podio_real = [resultado["p1"], resultado["p2"], resultado["p3"]]
+
+    if pronostico["pole"] == resultado["pole"]:
+        puntos += PUNTOS_POLE
+
+    if resultado["sprint_ganador"]:
+        if pronostico["sprint_ganador"] == resultado["sprint_ganador"]:
+            puntos += PUNTOS_SPRINT
+
+    for puesto in ("p1", "p2", "p3"):
+        if pronostico[puesto] == resultado[puesto]:
+            puntos += PUNTOS_PODIO_EXACTO
+        elif pronostico[puesto] in podio_real:
+            puntos += PUNTOS_PODIO
+
+    return puntos
+
+
+# Misma regla en SQL. Se usa IS (y no =) para que NULL contra NULL
+# cuente igual que None == None en calcular_puntos.
+SQL_PUNTOS = """
+    (CASE WHEN pole IS :pole THEN {pole} ELSE 0 END)
+  + (CASE WHEN :sprint_valido AND sprint_ganador IS :sprint THEN {sprint} ELSE 0 END)
+  + (CASE WHEN p1 IS :p1 THEN {exacto}
+          WHEN p1 IS :p2 OR p1 IS :p3 THEN {podio} ELSE 0 END)
+  + (CASE WHEN p2 IS :p2 THEN {exacto}
+          WHEN p2 IS :p1 OR p2 IS :p3 THEN {podio} ELSE 0 END)
+  + (CASE WHEN p3 IS :p3 THEN {exacto}
+          WHEN p3 IS :p1 OR p3 IS :p2 THEN {podio} ELSE 0 END)
+""".format(
+    pole=PUNTOS_POLE,
+    sprint=PUNTOS_SPRINT,
+    exacto=PUNTOS_PODIO_EXACTO,
+    podio=PUNTOS_PODIO,
+)
+
+
+def parametros_resultado(resultado):
+    return {
+        "pole": resultado["pole"],
+        "sprint": resultado["sprint_ganador"],
+        "sprint_valido": 1 if resultado["sprint_ganador"] else 0,
+        "p1": resultado["p1"],
+        "p2": resultado["p2"],
+        "p3": resultado["p3"],
+    }
+
+
+def obtener_resultado(cur, carrera_id):
+    cur.execute("""
+        SELECT pole, sprint_ganador, p1, p2, p3, revision, revision_puntuada
+        FROM resultados
+        WHERE carrera_id = ?
+    """, (carrera_id,))
+    return cur.fetchone()
+
+
+def puntuar_carrera(conn, carrera_id):
+    """
+    Único punto de entrada para puntuar una carrera (idempotente).
+
+    Si el resultado no cambió desde la última vez, solo se recalculan los
+    pronósticos marcados como pendientes. Si cambió, se recalcula toda la
+    carrera pero solo se escriben las filas cuyos puntos difieren.
+    Todo ocurre en una transacción, junto con la tabla de posiciones.
+
+    Devuelve la cantidad de filas escritas, o None si la carrera
+    todavía no tiene resultado cargado.
+    """
+    with PUNTUACION_SEGUNDOS.labels(str(carrera_id)).time():
+        return _puntuar_carrera(conn, carrera_id)
+
+
+def _puntuar_carrera(conn, carrera_id):
+    cur = conn.cursor()
+
+    resultado = obtener_resultado(cur, carrera_id)
+    if not resultado:
+        return None
+
+    params = parametros_resultado(resultado)
+    params["carrera_id"] = carrera_id
+    completo = resultado["revision_puntuada"] != resultado["revision"]
+    params["completo"] = 1 if completo else 0
+
+    with conn:
+        cur.execute(
+            "UPDATE pronosticos SET puntos = " + SQL_PUNTOS + ", pendiente = 0"
+            " WHERE carrera_id = :carrera_id"
+            "   AND (pendiente = 1 OR (:completo AND puntos IS NOT " + SQL_PUNTOS + "))"
+            " RETURNING user_id",
+            params,
+        )
+        usuarios = [r[0] for r in cur.fetchall()]
+
+        cur.execute("""
+            UPDATE resultados
+            SET revision_puntuada = revision
+            WHERE carrera_id = ?
+        """, (carrera_id,))
+
+        if completo:
+            # Con otro resultado también pueden cambiar los aciertos exactos
+            posiciones.actualizar_carrera(conn, carrera_id)
+        elif usuarios:
+            posiciones.actualizar_usuarios(conn, usuarios)
+
+        if usuarios:
+            cache.datos_modificados(conn)
+
+    return len(usuarios)
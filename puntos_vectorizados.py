@@ -0,0 +1,190 @@
+# -------- PUNTOS DE TODA LA TEMPORADA (NumPy) --------
+# Carga los pronósticos (ids de piloto) en arrays enteros usuarios x
+# carreras x slots (pole, sprint, p1, p2, p3), puntúa todo en una sola
+# pasada vectorizada y escribe solo los puntos que cambiaron.
+#
+# Uso: python puntos_vectorizados.py   (recalcula la temporada en config.DATABASE)
+import sqlite3
+
+import numpy as np
+
+import cache
+import posiciones
+from metricas_prom import PUNTUACION_SEGUNDOS
+from puntos import PUNTOS_POLE, PUNTOS_SPRINT, PUNTOS_PODIO_EXACTO, PUNTOS_PODIO
+
+SLOTS = ("pole", "sprint_ganador", "p1", "p2", "p3")
+POLE, SPRINT, P1, P2, P3 = range(5)
+
+# Código para NULL: NULL contra NULL cuenta como acierto, igual que en puntos.py.
+# Los ids de pilotos arrancan en 1, así que 0 queda libre.
+SIN_PILOTO = 0
+
+
+class Temporada:
+    """Pronósticos y resultados de la temporada como arrays de ids de piloto."""
+
+    def __init__(self, conn, solo_corridas=True):
+        cur = conn.cursor()
+
+        # Carreras con resultado cargado
+        cur.execute("""
+            SELECT r.carrera_id,
+                   COALESCE(r.pole, 0), COALESCE(r.sprint_ganador, 0),
+                   COALESCE(r.p1, 0), COALESCE(r.p2, 0), COALESCE(r.p3, 0)
+            FROM resultados r
+            JOIN carreras c ON c.id = r.carrera_id
+            WHERE ? = 0 OR c.status = 'corrida'
+            ORDER BY r.carrera_id
+        """, (1 if solo_corridas else 0,))
+        resultados = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 1 + len(SLOTS))
+
+        # Pronósticos de esas carreras
+        cur.execute("""
+            SELECT p.id, p.user_id, p.carrera_id,
+                   COALESCE(p.pole, 0), COALESCE(p.sprint_ganador, 0),
+                   COALESCE(p.p1, 0), COALESCE(p.p2, 0), COALESCE(p.p3, 0),
+                   COALESCE(p.puntos, -1)
+            FROM pronosticos p
+            JOIN resultados r ON r.carrera_id = p.carrera_id
+        """)
+        filas = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 4 + len(SLOTS))
+        self._armar(resultados, filas)
+
+        # Carreras cuyo resultado cambió desde la última vez que se puntuaron:
+        # ahí pueden cambiar los aciertos exactos (el desempate) aunque los
+        # puntos queden iguales, como en puntos.py
+        cur.execute("""
+            SELECT carrera_id
+            FROM resultados
+            WHERE revision_puntuada IS NOT revision
+        """)
+        corregidas = {r[0] for r in cur.fetchall()}
+        self.corregidas = [c for c in self.carrera_ids.tolist() if c in corregidas]
+
+    @classmethod
+    def desde_arrays(cls, resultados, filas):
+        """
+        Sin pasar por la base, con las mismas columnas que las consultas de
+        __init__ (0 = NULL, puntos -1 = sin puntuar). Para generar_liga.py.
+        """
+        temporada = cls.__new__(cls)
+        temporada._armar(np.asarray(resultados, dtype=np.int64), np.asarray(filas, dtype=np.int64))
+        temporada.corregidas = []
+        return temporada
+
+    def _armar(self, resultados, filas):
+        self.carrera_ids = resultados[:, 0]
+        self.col_carrera = {c: i for i, c in enumerate(self.carrera_ids.tolist())}
+        self.resultados = resultados[:, 1:].astype(np.int32)
+        self.sprint_valido = self.resultados[:, SPRINT] != SIN_PILOTO
+
+        filas = filas[np.isin(filas[:, 2], self.carrera_ids)]
+
+        self.user_ids, u = np.unique(filas[:, 1], return_inverse=True)
+        c = np.searchsorted(self.carrera_ids, filas[:, 2])
+
+        forma = (len(self.user_ids), len(self.carrera_ids))
+        self.pronosticos = np.full(forma + (len(SLOTS),), SIN_PILOTO, dtype=np.int32)
+        self.tiene = np.zeros(forma, dtype=bool)
+        self.ids = np.zeros(forma, dtype=np.int64)
+        self.puntos = np.full(forma, -1, dtype=np.int32)
+
+        self.pronosticos[u, c] = filas[:, 3:3 + len(SLOTS)]
+        self.tiene[u, c] = True
+        self.ids[u, c] = filas[:, 0]
+        self.puntos[u, c] = filas[:, -1]
+
+    def puntuar(self, resultados=None, sprint_valido=None):
+        """
+        Puntos usuarios x carreras en una sola pasada.
+        Se le pueden pasar resultados alternativos para consultas "qué pasaría si".
+        """
+        res = self.resultados if resultados is None else resultados
+        sprint_ok = self.sprint_valido if sprint_valido is None else sprint_valido
+        pro = self.pronosticos
+
+        puntos = (pro[..., POLE] == res[:, POLE]) * PUNTOS_POLE
+        puntos += ((pro[..., SPRINT] == res[:, SPRINT]) & sprint_ok) * PUNTOS_SPRINT
+
+        podio_pro = pro[..., P1:P3 + 1]                      # usuarios x carreras x 3
+        podio_res = res[:, P1:P3 + 1]                        # carreras x 3
+        exacto = podio_pro == podio_res
+        en_podio = (podio_pro[..., :, None] == podio_res[:, None, :]).any(axis=-1)
+
+        puntos += (exacto * PUNTOS_PODIO_EXACTO).sum(axis=-1)
+        puntos += ((en_podio & ~exacto) * PUNTOS_PODIO).sum(axis=-1)
+
+        return np.where(self.tiene, puntos, 0).astype(np.int32)
+
+    def totales(self, puntos=None):
+        """Total por usuario (mismo orden que user_ids)."""
+        if puntos is None:
+            puntos = self.puntuar()
+        return puntos.sum(axis=1)
+
+    def que_pasaria_si(self, carrera_id, pole, sprint_ganador, p1, p2, p3):
+        """Totales por usuario si la carrera terminara con este resultado (ids de piloto)."""
+        res = self.resultados.copy()
+        sprint_ok = self.sprint_valido.copy()
+
+        c = self.col_carrera[carrera_id]
+        res[c] = [x or SIN_PILOTO for x in (pole, sprint_ganador, p1, p2, p3)]
+        sprint_ok[c] = bool(sprint_ganador)
+
+        return self.totales(self.puntuar(res, sprint_ok))
+
+    def guardar(self, conn, puntos=None):
+        """Escribe solo los puntos que cambiaron. Devuelve cuántas filas tocó."""
+        if puntos is None:
+            puntos = self.puntuar()
+
+        cambiados = self.tiene & (puntos != self.puntos)
+        filas = list(zip(puntos[cambiados].tolist(), self.ids[cambiados].tolist()))
+
+        usuarios = self.user_ids[cambiados.any(axis=1)].tolist()
+        carreras = [(c,) for c in self.carrera_ids.tolist()]
+
+        with conn:
+            conn.executemany(
+                "UPDATE pronosticos SET puntos = ? WHERE id = ?", filas
+            )
+            # Todo quedó puntuado contra el resultado vigente
+            conn.executemany("""
+                UPDATE pronosticos SET pendiente = 0
+                WHERE carrera_id = ? AND pendiente = 1
+            """, carreras)
+            conn.executemany("""
+                UPDATE resultados SET revision_puntuada = revision
+                WHERE carrera_id = ?
+            """, carreras)
+            # En las corregidas se recalcula a todos los que jugaron esa carrera
+            for carrera_id in self.corregidas:
+                posiciones.actualizar_carrera(conn, carrera_id)
+            if usuarios:
+                posiciones.actualizar_usuarios(conn, usuarios)
+            if usuarios or self.corregidas:
+                cache.datos_modificados(conn)
+
+        self.corregidas = []
+        self.puntos = np.where(cambiados, puntos, self.puntos)
+        return len(filas)
+
+
+def recalcular_temporada(conn):
+    with PUNTUACION_SEGUNDOS.labels("temporada").time():
+        temporada = Temporada(conn)
+        return temporada.guardar(conn)
+
+
+if __name__ == "__main__":
+    from config import DATABASE, MARCA_VERSION
+
+    conn = sqlite3.connect(DATABASE)
+    conn.row_factory = sqlite3.Row
+    cambiados = recalcular_temporada(conn)
+    if cambiados:
+        cache.publicar_version(conn, MARCA_VERSION)
+    conn.close()
+
+    print(f"Temporada recalculada: {cambiados} pronósticos actualizados")
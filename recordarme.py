@@ -0,0 +1,146 @@
+# -------- RECORDARME (tokens de dispositivo) --------
+# Con "Recordarme" tildado, el login deja una cookie de larga duración que
+# restaura la sesión sin volver a pedir la contraseña (ni correr bcrypt).
+#
+# La cookie lleva "selector:validador", firmada con la SECRET_KEY:
+#   - una cookie adulterada se descarta sin tocar la base
+#   - selector: busca la fila en dispositivos (índice único)
+#   - validador: en la base solo se guarda su SHA-256; alcanza con un hash
+#     rápido porque es un valor aleatorio de 256 bits, no una contraseña
+# Cada vez que se usa se rota el validador. Revocar = borrar la fila.
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime
+
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeSerializer
+
+COOKIE = "recordarme"
+DURACION = 60 * 24 * 3600  # 60 días
+
+
+def _serializador():
+    return URLSafeSerializer(current_app.secret_key, salt="recordarme")
+
+
+def _hash(validador):
+    return hashlib.sha256(validador.encode()).hexdigest()
+
+
+def _leer_cookie():
+    valor = request.cookies.get(COOKIE)
+    if not valor:
+        return None, None
+    try:
+        selector, validador = _serializador().loads(valor).split(":", 1)
+    except (BadSignature, ValueError, AttributeError):
+        return None, None
+    return selector, validador
+
+
+def _programar_cookie(selector, validador):
+    g.recordarme_cookie = _serializador().dumps(f"{selector}:{validador}")
+
+
+def emitir(conn, user_id):
+    """Crea un dispositivo para el usuario y deja la cookie lista para la respuesta."""
+    selector = secrets.token_urlsafe(12)
+    validador = secrets.token_urlsafe(32)
+    ahora = time.time()
+
+    with conn:
+        conn.execute(
+            "DELETE FROM dispositivos WHERE user_id = ? AND expira < ?",
+            (user_id, ahora),
+        )
+        conn.execute("""
+            INSERT INTO dispositivos
+                (user_id, selector, hash_validador, creado, usado, expira, agente)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            user_id, selector, _hash(validador),
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"), None,
+            ahora + DURACION, request.user_agent.string[:200],
+        ))
+
+    _programar_cookie(selector, validador)
+
+
+def restaurar(conn):
+    """
+    Si la cookie es válida devuelve la fila del usuario y rota el
+    validador; si no, None (y la cookie se borra).
+    """
+    selector, validador = _leer_cookie()
+    if selector is None:
+        g.recordarme_cookie = ""
+        return None
+
+    ahora = time.time()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT d.id AS dispositivo_id, d.hash_validador, d.expira,
+               u.id, u.nombre, u.avatar, u.admin
+        FROM dispositivos d
+        JOIN usuarios u ON u.id = d.user_id
+        WHERE d.selector = ?
+    """, (selector,))
+    fila = cur.fetchone()
+
+    if (
+        fila is None
+        or fila["expira"] < ahora
+        or not hmac.compare_digest(fila["hash_validador"], _hash(validador))
+    ):
+        g.recordarme_cookie = ""
+        return None
+
+    nuevo = secrets.token_urlsafe(32)
+    with conn:
+        # Si otro request ya rotó este dispositivo no se pisa
+        cur.execute("""
+            UPDATE dispositivos
+            SET hash_validador = ?, usado = ?, expira = ?
+            WHERE id = ? AND hash_validador = ?
+        """, (
+            _hash(nuevo), datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            ahora + DURACION, fila["dispositivo_id"], fila["hash_validador"],
+        ))
+        if cur.rowcount:
+            _programar_cookie(selector, nuevo)
+
+    return fila
+
+
+def olvidar(conn):
+    """Logout: revoca el dispositivo de la cookie actual."""
+    selector, _ = _leer_cookie()
+    if selector is not None:
+        with conn:
+            conn.execute("DELETE FROM dispositivos WHERE selector = ?", (selector,))
+    if COOKIE in request.cookies:
+        g.recordarme_cookie = ""
+
+
+def revocar_usuario(conn, user_id):
+    """Borra todos los dispositivos del usuario (sin commit)."""
+    conn.execute("DELETE FROM dispositivos WHERE user_id = ?", (user_id,))
+
+
+def init_app(app):
+    @app.after_request
+    def actualizar_cookie(respuesta):
+        valor = g.pop("recordarme_cookie", None)
+        if valor:
+            respuesta.set_cookie(
+                COOKIE, valor,
+                max_age=DURACION,
+                httponly=True,
+                samesite="Lax",
+                secure=app.config.get("SESSION_COOKIE_SECURE", False),
+            )
+        elif valor == "":
+            respuesta.delete_cookie(COOKIE)
+        return respuesta
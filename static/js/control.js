@@ -0,0 +1,97 @@
+// Control de pronósticos: la grilla usuarios x carreras se arma acá con
+// las páginas de /control_pronosticos/datos (ver control.py). Cada usuario
+// viene como [id, nombre, máscara]: el bit i es la i-ésima carrera.
+(function () {
+    var raiz = document.getElementById("control");
+    if (!raiz) return;
+
+    var filtro = document.getElementById("control-filtro");
+    var cabecera = document.getElementById("control-carreras");
+    var cuerpo = document.getElementById("control-usuarios");
+    var total = document.getElementById("control-total");
+    var mas = document.getElementById("control-mas");
+
+    var carreras = [];
+    var activa = null;
+    var siguiente = null;
+    var cargando = false;
+    // Cambiar de filtro invalida las respuestas que sigan en camino
+    var pedido = 0;
+
+    function escapar(valor) {
+        var div = document.createElement("div");
+        div.textContent = valor;
+        return div.innerHTML;
+    }
+
+    // Sin operadores de bits: en JS son de 32 bits
+    function tiene(mascara, bit) {
+        return Math.floor(mascara / Math.pow(2, bit)) % 2 === 1;
+    }
+
+    function pintarCarreras() {
+        cabecera.innerHTML = "<th>Usuario</th>" + carreras.map(function (c, i) {
+            var fecha = c[2] ? c[2].slice(8, 10) + "-" + c[2].slice(5, 7) : "";
+            return '<th' + (i === activa ? ' class="activa"' : "") + ">" +
+                escapar(c[1]) + "<br>" + fecha + "</th>";
+        }).join("");
+    }
+
+    function pintarUsuarios(usuarios) {
+        cuerpo.insertAdjacentHTML("beforeend", usuarios.map(function (u) {
+            var celdas = carreras.map(function (c, i) {
+                return "<td" + (i === activa ? ' class="activa"' : "") + ">" +
+                    (tiene(u[2], i) ? "✔️" : "⏳") + "</td>";
+            }).join("");
+            return "<tr><td><strong>" + escapar(u[1]) + "</strong></td>" + celdas + "</tr>";
+        }).join(""));
+    }
+
+    function cargar(desde) {
+        if (cargando) return;
+        cargando = true;
+        var numero = pedido;
+
+        var url = raiz.dataset.url + "?filtro=" + encodeURIComponent(filtro.value) +
+            (desde ? "&despues=" + encodeURIComponent(desde) : "");
+
+        fetch(url, {credentials: "same-origin"})
+            .then(function (r) { return r.json(); })
+            .then(function (datos) {
+                if (numero !== pedido) return;
+                if (!desde) {
+                    carreras = datos.carreras;
+                    activa = datos.activa;
+                    total.textContent = "(" + datos.total + " usuarios)";
+                    cuerpo.innerHTML = "";
+                    pintarCarreras();
+                }
+                pintarUsuarios(datos.usuarios);
+                siguiente = datos.siguiente;
+                mas.hidden = !siguiente;
+            })
+            .finally(function () {
+                if (numero === pedido) cargando = false;
+            });
+    }
+
+    mas.addEventListener("click", function () {
+        if (siguiente) cargar(siguiente);
+    });
+
+    // La página siguiente se pide sola al llegar al final
+    if ("IntersectionObserver" in window) {
+        new IntersectionObserver(function (entradas) {
+            if (entradas[0].isIntersecting && siguiente) cargar(siguiente);
+        }).observe(mas);
+    }
+
+    filtro.addEventListener("change", function () {
+        pedido += 1;
+        cargando = false;
+        siguiente = null;
+        cargar(null);
+    });
+
+    cargar(null);
+})();
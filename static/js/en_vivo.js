@@ -0,0 +1,149 @@
+// Ranking en vivo: /stream (Server-Sent Events) y, si no se puede,
+// long-poll contra /stream/poll. Ver en_vivo.py.
+(function () {
+    var raiz = document.getElementById("en-vivo");
+    if (!raiz) return;
+
+    var version = parseInt(raiz.dataset.version || "0", 10);
+    var CLASES_PODIO = {1: "table-warning fw-bold", 2: "table-secondary fw-bold", 3: "table-light fw-bold"};
+    var BORDES_PODIO = {1: "border-warning", 2: "border-secondary", 3: "border-light"};
+
+    function escapar(valor) {
+        var div = document.createElement("div");
+        div.textContent = valor;
+        return div.innerHTML;
+    }
+
+    function medalla(posicion, prefijo) {
+        return {1: "🥇", 2: "🥈", 3: "🥉"}[posicion] || prefijo + posicion;
+    }
+
+    function pintarRanking(ranking) {
+        var tabla = document.getElementById("ranking-tabla");
+        if (tabla) {
+            tabla.innerHTML = ranking.map(function (r) {
+                return '<tr class="' + (CLASES_PODIO[r.posicion] || "") + '">' +
+                    "<td>" + medalla(r.posicion, "") + "</td>" +
+                    "<td>" + escapar(r.nombre) + "</td>" +
+                    "<td>" + r.carreras_jugadas + "</td>" +
+                    "<td>" + r.aciertos_exactos + "</td>" +
+                    "<td><strong>" + r.puntos + "</strong></td></tr>";
+            }).join("");
+        }
+
+        var cards = document.getElementById("ranking-cards");
+        if (cards) {
+            cards.innerHTML = ranking.map(function (r) {
+                return '<div class="card mb-2 shadow-sm ' + (BORDES_PODIO[r.posicion] || "") + '">' +
+                    '<div class="card-body d-flex justify-content-between align-items-center">' +
+                    '<div><div class="fw-bold">' + medalla(r.posicion, "#") + " " + escapar(r.nombre) + "</div></div>" +
+                    '<div class="text-end"><div class="fw-bold fs-5">' + r.puntos + "</div>" +
+                    '<small class="text-muted">pts</small></div></div></div>';
+            }).join("");
+        }
+    }
+
+    function pintarCarrera(carrera) {
+        var tabla = document.getElementById("carrera-tabla");
+        if (!tabla || tabla.dataset.carrera !== String(carrera.id)) return false;
+
+        tabla.innerHTML = carrera.puntos.map(function (p, i) {
+            return "<tr><td>" + (i + 1) + "</td><td>" + escapar(p.usuario) + "</td>" +
+                "<td><strong>" + p.puntos + "</strong></td></tr>";
+        }).join("");
+
+        var cards = document.getElementById("carrera-cards");
+        if (cards) {
+            cards.innerHTML = carrera.puntos.map(function (p, i) {
+                return '<div class="border rounded p-2 mb-2 d-flex justify-content-between align-items-center">' +
+                    "<div><strong>" + (i + 1) + ". " + escapar(p.usuario) + "</strong></div>" +
+                    '<span class="badge bg-primary">' + p.puntos + " pts</span></div>";
+            }).join("");
+        }
+        return true;
+    }
+
+    function avisar(carrera, pintada) {
+        var aviso = document.getElementById("en-vivo-aviso");
+        if (!aviso) {
+            aviso = document.createElement("div");
+            aviso.id = "en-vivo-aviso";
+            aviso.className = "alert alert-info mt-3";
+            raiz.insertBefore(aviso, raiz.firstChild);
+        }
+        aviso.innerHTML = "🏁 Resultados actualizados" +
+            (carrera ? " – " + escapar(carrera.pais) : "") +
+            (pintada ? "" : ' <a href="" class="alert-link">Recargar</a>');
+    }
+
+    // El evento trae solo el top del ranking: lo que no entra se pide a
+    // /stream/datos (con ETag), un poco después y no todos a la vez
+    function pedirDatos() {
+        return new Promise(function (listo) { setTimeout(listo, Math.random() * 2000); })
+            .then(function () { return fetch("/stream/datos", {credentials: "same-origin"}); })
+            .then(function (r) {
+                if (!r.ok) throw new Error(r.status);
+                return r.json();
+            });
+    }
+
+    function aplicar(nueva, evento) {
+        if (!(nueva > version)) return;
+        version = nueva;
+
+        var ranking = !!document.getElementById("ranking-tabla");
+        var tabla = document.getElementById("carrera-tabla");
+        var carrera = !!(evento.carrera && tabla && tabla.dataset.carrera === String(evento.carrera.id));
+
+        if ((ranking && !evento.completo) || carrera) {
+            pedirDatos().then(function (datos) {
+                // Llegó otro evento mientras tanto: ese pide lo suyo
+                if (nueva !== version) return;
+                pintarRanking(datos.ranking);
+                var pintada = datos.carrera ? pintarCarrera(datos.carrera) : true;
+                avisar(evento.carrera, pintada || ranking);
+            }, function () { avisar(evento.carrera, false); });
+            return;
+        }
+
+        pintarRanking(evento.top);
+        avisar(evento.carrera, ranking || !evento.carrera);
+    }
+
+    function longPoll() {
+        var espera = 0;
+        fetch("/stream/poll?desde=" + version, {credentials: "same-origin"})
+            .then(function (r) {
+                // Worker con el tope de oyentes: contesta sin esperar y
+                // dice cuándo volver
+                espera = parseInt(r.headers.get("Retry-After") || "0", 10) * 1000;
+                if (r.status === 200) {
+                    return r.json().then(function (j) { aplicar(j.version, j.datos); });
+                }
+                if (r.status !== 204) throw new Error(r.status);
+            })
+            .then(function () { setTimeout(longPoll, espera); },
+                  function () { setTimeout(longPoll, 10000); });
+    }
+
+    if (!window.EventSource) {
+        longPoll();
+        return;
+    }
+
+    var fuente = new EventSource("/stream?desde=" + version);
+    var abierta = false;
+    fuente.onopen = function () { abierta = true; };
+    fuente.addEventListener("posiciones", function (e) {
+        aplicar(parseInt(e.lastEventId, 10), JSON.parse(e.data));
+    });
+    fuente.onerror = function () {
+        // 503 (worker con demasiados oyentes) o un proxy que no deja pasar
+        // SSE: se cierra y se sigue por long-poll. Un corte después de
+        // abierta lo reintenta EventSource solo.
+        if (!abierta || fuente.readyState === EventSource.CLOSED) {
+            fuente.close();
+            longPoll();
+        }
+    };
+})();
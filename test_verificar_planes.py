@@ -0,0 +1,35 @@
+# Corre verificar_planes.py sobre una base en memoria con todas las
+# migraciones: una consulta nueva que recorra una tabla entera (o una
+# plantilla nueva sin variantes) hace fallar la suite.
+import os
+import sqlite3
+
+import migraciones
+import verificar_planes
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_ninguna_consulta_recorre_una_tabla_entera():
+    archivos = [os.path.join(CARPETA, a) for a in verificar_planes.ARCHIVOS]
+    revisadas, errores = verificar_planes.revisar(archivos)
+
+    assert revisadas > 0
+    assert errores == []
+
+
+def test_scan_con_indice_es_un_recorrido_completo():
+    conn = sqlite3.connect(":memory:")
+    migraciones.migrar(conn)
+
+    # Un índice solo da el orden: se lee la tabla entera igual
+    assert verificar_planes.scans_completos(
+        conn, "SELECT id FROM usuarios ORDER BY email"
+    )
+    assert verificar_planes.scans_completos(
+        conn, "SELECT user_id FROM posiciones ORDER BY posicion, nombre"
+    )
+    assert not verificar_planes.scans_completos(
+        conn, "SELECT id FROM usuarios WHERE email = ?"
+    )
+    conn.close()
@@ -0,0 +1,296 @@
+# Verifica el plan de ejecución de todas las consultas de la app.
+# Arma una base en memoria con las migraciones, corre EXPLAIN QUERY PLAN
+# sobre cada cur.execute(...) con SQL armado de literales y constantes, y
+# sobre cada constante de módulo con SQL (como las de lecturas.py), y falla
+# si alguna recorre una tabla entera.
+#
+# Solo un SEARCH cuenta como acceso por índice: un "SCAN x USING INDEX"
+# también lee la tabla entera, solo que en el orden del índice. Las
+# plantillas con {...} se arman con cada variante que usa la app
+# (PLANTILLAS) y los recorridos a propósito van en RECORRIDOS, con el motivo.
+#
+# Uso: python verificar_planes.py [archivos...]   (por defecto app.py y módulos)
+# Sale con código 1 si encuentra scans completos (sirve para CI; lo corre
+# también test_verificar_planes.py).
+import ast
+import os
+import re
+import sqlite3
+import sys
+
+import migraciones
+import posiciones
+
+ARCHIVOS = ["app.py", "puntos.py", "puntos_vectorizados.py", "posiciones.py",
+            "cache.py", "limites.py", "recordarme.py", "pronosticos.py",
+            "catalogo.py", "lecturas.py", "en_vivo.py", "asgi.py", "arranque.py",
+            "control.py"]
+
+# Tablas de catálogo: una fila por carrera / piloto de la temporada.
+# Recorrerlas enteras es lo esperado (calendario, lista de pilotos...).
+# usuarios_afectados es la lista temporal de posiciones.actualizar_usuarios():
+# tiene justo los usuarios a recalcular.
+TABLAS_CHICAS = {"carreras", "pilotos", "resultados", "version_datos", "usuarios_afectados"}
+
+# Variantes con las que se arma cada plantilla al correr
+FILTROS_POSICIONES = {
+    "carrera": posiciones.FILTRO_CARRERA,
+    "afectados": posiciones.FILTRO_AFECTADOS,
+    "todos": posiciones.FILTRO_TODOS,
+}
+PLANTILLAS = {
+    "posiciones.py:SQL_AGREGADO": {
+        nombre: {"filtro": filtro} for nombre, filtro in FILTROS_POSICIONES.items()
+    },
+    "posiciones.py:SQL_UPSERT": {
+        nombre: {"agregado": posiciones.SQL_AGREGADO.format(filtro=filtro)}
+        for nombre, filtro in FILTROS_POSICIONES.items()
+    },
+}
+
+# Consultas que recorren su tabla entera a propósito: "archivo:consulta"
+# (constante, o función para las escritas en el execute) -> motivo
+RECORRIDOS = {
+    "posiciones.py:SQL_POSICIONES": "RANK() se calcula sobre todos los usuarios",
+    "posiciones.py:SQL_RANKING": "/ranking muestra la tabla entera (en el orden del índice)",
+    "posiciones.py:SQL_AGREGADO[todos]": "reconstrucción completa de posiciones",
+    "posiciones.py:SQL_UPSERT[todos]": "reconstrucción completa de posiciones",
+    "en_vivo.py:SQL_TOP": "los primeros del ranking: en el orden del índice, corta en el LIMIT",
+    "app.py:admin_usuarios": "la administración lista a todos los usuarios",
+    "control.py:total": "cuenta a todos los usuarios (o a los que les falta la activa)",
+    "puntos_vectorizados.py:__init__": "carga todos los pronósticos de la temporada de una vez",
+}
+
+SQL = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+
+
+class Modulo:
+    """Valores de las constantes de un archivo, con los imports de módulos locales."""
+
+    _leidos = {}
+
+    @classmethod
+    def de(cls, path):
+        if path not in cls._leidos:
+            cls._leidos[path] = None  # imports circulares
+            cls._leidos[path] = cls(path)
+        return cls._leidos[path]
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            self.arbol = ast.parse(f.read(), path)
+        self.nombres = {}
+        carpeta = os.path.dirname(path)
+
+        for nodo in self.arbol.body:
+            if isinstance(nodo, ast.Import):
+                for a in nodo.names:
+                    modulo = self._local(carpeta, a.name)
+                    if modulo:
+                        self.nombres[a.asname or a.name] = modulo
+            elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+                modulo = self._local(carpeta, nodo.module)
+                if modulo:
+                    for a in nodo.names:
+                        if a.name in modulo.nombres:
+                            self.nombres[a.asname or a.name] = modulo.nombres[a.name]
+            elif (
+                isinstance(nodo, ast.Assign)
+                and len(nodo.targets) == 1
+                and isinstance(nodo.targets[0], ast.Name)
+            ):
+                valor = self.valor(nodo.value)
+                if valor is not None:
+                    self.nombres[nodo.targets[0].id] = valor
+
+    @classmethod
+    def _local(cls, carpeta, nombre):
+        path = os.path.join(carpeta, nombre.replace(".", os.sep) + ".py")
+        return cls.de(path) if os.path.exists(path) else None
+
+    def valor(self, nodo):
+        """Valor de literales, constantes, sumas y .format(...); None si no se puede saber."""
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (str, int)):
+            return nodo.value
+        if isinstance(nodo, ast.Name):
+            return self.nombres.get(nodo.id)
+        if isinstance(nodo, ast.Attribute) and isinstance(nodo.value, ast.Name):
+            modulo = self.nombres.get(nodo.value.id)
+            return modulo.nombres.get(nodo.attr) if isinstance(modulo, Modulo) else None
+        if isinstance(nodo, ast.BinOp) and isinstance(nodo.op, ast.Add):
+            izq, der = self.valor(nodo.left), self.valor(nodo.right)
+            if isinstance(izq, str) and isinstance(der, str):
+                return izq + der
+        if (
+            isinstance(nodo, ast.Call)
+            and isinstance(nodo.func, ast.Attribute)
+            and nodo.func.attr == "format"
+            and not nodo.args
+        ):
+            plantilla = self.valor(nodo.func.value)
+            kwargs = {k.arg: self.valor(k.value) for k in nodo.keywords}
+            if isinstance(plantilla, str) and None not in kwargs.values():
+                return plantilla.format(**kwargs)
+        return None
+
+
+def _funciones(arbol):
+    """(nodo, función que lo contiene) de cada nodo del archivo."""
+    pendientes = [(arbol, "<módulo>")]
+    while pendientes:
+        nodo, funcion = pendientes.pop()
+        for hijo in ast.iter_child_nodes(nodo):
+            if isinstance(hijo, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                pendientes.append((hijo, hijo.name))
+            else:
+                pendientes.append((hijo, funcion))
+            yield hijo, funcion
+
+
+def consultas(path):
+    """
+    (línea, nombre, sql) de cada constante de módulo con SQL (las plantillas,
+    una vez por variante de PLANTILLAS) y de cada .execute/.executemany (y
+    uno()/todos(), las consultas async de asgi.py) cuyo SQL se arma de
+    literales y constantes. Un execute(CONSTANTE) se revisa donde está la
+    constante. Una plantilla sin variantes sale con sql None.
+    """
+    modulo = Modulo.de(path)
+    archivo = os.path.basename(path)
+
+    for nodo in modulo.arbol.body:
+        if not (
+            isinstance(nodo, ast.Assign)
+            and len(nodo.targets) == 1
+            and isinstance(nodo.targets[0], ast.Name)
+            and nodo.targets[0].id.isupper()
+        ):
+            continue
+        nombre = nodo.targets[0].id
+        sql = modulo.nombres.get(nombre)
+        if not isinstance(sql, str) or not SQL.match(sql):
+            continue
+        variantes = PLANTILLAS.get(f"{archivo}:{nombre}")
+        if variantes:
+            for variante, kwargs in variantes.items():
+                yield nodo.lineno, f"{nombre}[{variante}]", sql.format(**kwargs).strip()
+        elif re.search(r"\{\w*\}", sql):
+            yield nodo.lineno, nombre, None
+        else:
+            yield nodo.lineno, nombre, sql.strip()
+
+    for nodo, funcion in _funciones(modulo.arbol):
+        if not isinstance(nodo, ast.Call) or not nodo.args:
+            continue
+        if isinstance(nodo.func, ast.Attribute):
+            llamada = nodo.func.attr
+        elif isinstance(nodo.func, ast.Name):
+            llamada = nodo.func.id
+        else:
+            continue
+        if llamada not in ("execute", "executemany", "uno", "todos"):
+            continue
+        if isinstance(nodo.args[0], (ast.Name, ast.Attribute)):
+            continue
+        sql = modulo.valor(nodo.args[0])
+        if isinstance(sql, str) and SQL.match(sql):
+            yield nodo.lineno, funcion, sql.strip()
+
+
+def parametros(sql):
+    nombres = re.findall(r":(\w+)", sql)
+    if nombres:
+        return {n: None for n in nombres}
+    return (None,) * sql.count("?")
+
+
+def alias_tablas(sql):
+    """El plan muestra el alias (p, u, c...): alias -> tabla real."""
+    alias = {}
+    for tabla, nombre in re.findall(r"(?:FROM|JOIN)\s+(?:temp\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.I):
+        alias[tabla] = tabla
+        if nombre:
+            alias[nombre] = tabla
+    return alias
+
+
+def tablas(conn):
+    return {
+        fila[0]
+        for esquema in ("main", "temp")
+        for fila in conn.execute(f"SELECT name FROM {esquema}.sqlite_master WHERE type = 'table'")
+    }
+
+
+def scans_completos(conn, sql, existentes=None):
+    """Líneas del plan que recorren una tabla entera (con o sin índice)."""
+    existentes = existentes or tablas(conn)
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, parametros(sql)).fetchall()
+    alias = alias_tablas(sql)
+    malos = []
+    for fila in plan:
+        detalle = fila[3]
+        m = re.match(r"SCAN (\w+)", detalle)
+        if not m:
+            continue
+        tabla = alias.get(m.group(1), m.group(1))
+        # Subconsultas, CTEs y CONSTANT ROW no son tablas
+        if tabla not in existentes or tabla in TABLAS_CHICAS:
+            continue
+        malos.append(detalle)
+    return malos
+
+
+def revisar(archivos):
+    """(consultas revisadas, errores como (archivo, línea, nombre, detalle, sql))."""
+    conn = sqlite3.connect(":memory:")
+    migraciones.migrar(conn)
+    conn.execute("CREATE TEMP TABLE usuarios_afectados (user_id INTEGER PRIMARY KEY)")
+    existentes = tablas(conn)
+
+    errores = []
+    revisadas = 0
+    recorren = set()
+    for path in archivos:
+        archivo = os.path.basename(path)
+        for linea, nombre, sql in consultas(path):
+            revisadas += 1
+            if sql is None:
+                errores.append((archivo, linea, nombre, "plantilla sin variantes en PLANTILLAS", ""))
+                continue
+            clave = f"{archivo}:{nombre}"
+            malos = scans_completos(conn, sql, existentes)
+            if malos:
+                recorren.add(clave)
+            if clave in RECORRIDOS:
+                continue
+            for detalle in malos:
+                errores.append((archivo, linea, nombre, detalle, sql))
+
+    # Que la lista no se quede con excepciones que ya no hacen falta
+    revisados = {os.path.basename(path) for path in archivos}
+    for clave in RECORRIDOS:
+        archivo, nombre = clave.split(":", 1)
+        if archivo in revisados and clave not in recorren:
+            errores.append((archivo, 0, nombre, "ya no recorre la tabla: sacarla de RECORRIDOS", ""))
+
+    conn.close()
+    return revisadas, errores
+
+
+def main():
+    archivos = sys.argv[1:] or ARCHIVOS
+    revisadas, errores = revisar(archivos)
+
+    for archivo, linea, nombre, detalle, sql in errores:
+        print(f"✘ {archivo}:{linea} ({nombre})  {detalle}")
+        if sql:
+            print("    " + " ".join(sql.split())[:120])
+
+    print(f"{revisadas} consultas revisadas, {len(errores)} scans completos "
+          f"({len(RECORRIDOS)} recorridos a propósito)")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()